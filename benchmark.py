@@ -0,0 +1,37 @@
+from os.path import exists
+from sys import exit
+
+import evolution
+from engine.benchmark import get_regressions, load_results, run_game_benchmarks, run_generation_benchmarks, \
+    save_results
+
+# Benchmark arguments
+BOARD_SIZES = [(6, 6), (18, 18), (32, 18)]
+POPULATION_SIZES = [50, 200, 800]
+REPEATS = 3
+
+# Results of every run are written to RESULTS_PATH and compared with BASELINE_PATH. Without a baseline the results
+# become the baseline, delete it to measure against a new one.
+RESULTS_PATH = 'benchmark-results.json'
+BASELINE_PATH = 'benchmark-baseline.json'
+# Relative slowdown reported as a regression
+REGRESSION_TOLERANCE = 0.2
+
+if __name__ == '__main__':
+    results = run_game_benchmarks(BOARD_SIZES, REPEATS)
+    results.update(run_generation_benchmarks(evolution, POPULATION_SIZES, repeats=REPEATS))
+
+    for name, result in sorted(results.items()):
+        print('{}: {:.4g} {}'.format(name, result['value'], result['unit']))
+
+    save_results(results, RESULTS_PATH)
+
+    if not exists(BASELINE_PATH):
+        save_results(results, BASELINE_PATH)
+        exit(0)
+
+    regressions = get_regressions(results, load_results(BASELINE_PATH), REGRESSION_TOLERANCE)
+    for name, baseline_value, value, change in regressions:
+        print('Regression {}: {:.4g} -> {:.4g} ({:+.1%})'.format(name, baseline_value, value, change))
+
+    exit(1 if len(regressions) > 0 else 0)
@@ -0,0 +1,355 @@
+from math import ceil
+from random import Random
+
+from numpy import arange, argmax, flatnonzero, full, sqrt, where, zeros
+
+from engine.cells import SnackPlacement
+from engine.directions import AXIS_TABLE, DELTA_X_TABLE, DELTA_Y_TABLE, LEFT, TURN_TABLE
+from engine.game import Game, GameStatus, GameEndReason
+from engine.inference import PhenotypeStack
+
+
+class BatchGame:
+    """N games sharing board size and scoring rules, advanced together in lock-step.
+
+    Every game follows exactly the rules of Game.get_next_game, so for the same phenotype and seed a game solved
+    here ends with the same score, snake and snack as a scalar Game. Step limits are supported, cycle detection is
+    not.
+    """
+
+    def __init__(self, width, height, phenotypes, seeds, game_representation_strategy,
+                 snake_length=5, snack_eaten_points=1, moved_toward_snack_points=0.1,
+                 moved_away_from_snack_points=-0.2, max_points_threshold=200, min_points_threshold=-10,
+                 max_steps=None, max_steps_without_snack=None):
+        self.width = width
+        self.height = height
+        self.phenotypes = phenotypes
+        self.phenotype_stacks = []
+        self.stack_ids = zeros(len(phenotypes), dtype=int)
+        self.stack_positions = zeros(len(phenotypes), dtype=int)
+        self.seeds = seeds
+        self.random_generators = [Random(seed) for seed in seeds]
+        self.game_representation_strategy = game_representation_strategy
+        self.snack_eaten_points = snack_eaten_points
+        self.moved_toward_snack_points = moved_toward_snack_points
+        self.moved_away_from_snack_points = moved_away_from_snack_points
+        self.max_points_threshold = max_points_threshold
+        self.min_points_threshold = min_points_threshold
+        self.max_steps = max_steps
+        self.max_steps_without_snack = max_steps_without_snack
+
+        self.number_of_games = len(phenotypes)
+        self.number_of_cells = width * height
+        # Snake can not be longer than the board plus the block appended after eating the last snack.
+        self.capacity = max(self.number_of_cells, snake_length) + 2
+
+        self.statuses = full(self.number_of_games, GameStatus.INITIALIZED.value)
+        # GameEndReason values of ended games, 0 while a game is running.
+        self.end_reasons = zeros(self.number_of_games, dtype=int)
+        self.steps = zeros(self.number_of_games, dtype=int)
+        self.steps_since_snack = zeros(self.number_of_games, dtype=int)
+        self.scores = zeros(self.number_of_games)
+        self.directions = full(self.number_of_games, LEFT)
+        self.snacks_x = zeros(self.number_of_games, dtype=int)
+        self.snacks_y = zeros(self.number_of_games, dtype=int)
+        self.snack_perspectives_x = zeros(self.number_of_games, dtype=int)
+        self.snack_perspectives_y = zeros(self.number_of_games, dtype=int)
+        self.last_snack_distances = zeros(self.number_of_games)
+
+        # Snake blocks are kept in ring buffers. Head is at head_indices, tail at head_indices + lengths - 1.
+        self.snakes_x = zeros((self.number_of_games, self.capacity), dtype=int)
+        self.snakes_y = zeros((self.number_of_games, self.capacity), dtype=int)
+        self.head_indices = zeros(self.number_of_games, dtype=int)
+        self.lengths = zeros(self.number_of_games, dtype=int)
+
+        # Number of snake blocks covering each cell, cells are ordered like product(range(width), range(height)).
+        self.occupancy = zeros((self.number_of_games, self.number_of_cells), dtype=int)
+
+        self.initialize_phenotype_stacks()
+        self.initialize_snakes(snake_length)
+        for index in range(self.number_of_games):
+            self.initialize_snack(index)
+        self.initialize_last_snack_distances()
+
+    def initialize_phenotype_stacks(self):
+        for stack_id, (indices, phenotype_stack) in enumerate(PhenotypeStack.get_phenotype_stacks(self.phenotypes)):
+            self.phenotype_stacks.append(phenotype_stack)
+            self.stack_ids[indices] = stack_id
+            self.stack_positions[indices] = arange(len(indices))
+
+    def initialize_snakes(self, snake_length=5):
+        middle_x = ceil(self.width / 2)
+        middle_y = ceil(self.height / 2)
+
+        for index in range(snake_length):
+            self.snakes_x[:, index] = middle_x + index
+            self.snakes_y[:, index] = middle_y
+
+            if self.is_on_board(middle_x + index, middle_y):
+                self.occupancy[:, self.get_cell(middle_x + index, middle_y)] += 1
+
+        self.lengths[:] = snake_length
+        self.snack_perspectives_x[:] = middle_x + snake_length
+        self.snack_perspectives_y[:] = middle_y
+
+    def initialize_snack(self, index):
+        available_cells = flatnonzero(self.occupancy[index] == 0)
+
+        # Board is full, there is no place left for a snack.
+        if len(available_cells) == 0:
+            self.end_games([index], GameEndReason.BOARD_FILLED)
+            return
+
+        snack_cell = self.random_generators[index].choice(available_cells)
+        self.snacks_x[index], self.snacks_y[index] = divmod(int(snack_cell), self.height)
+
+    def initialize_last_snack_distances(self):
+        heads_x, heads_y = self.get_snake_head_positions(arange(self.number_of_games))
+        self.last_snack_distances[:] = self.get_snake_snacks_distances(heads_x, heads_y, self.snacks_x,
+                                                                       self.snacks_y)
+
+    def is_on_board(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get_cell(self, x, y):
+        return x * self.height + y
+
+    def get_snake_head_positions(self, indices):
+        head_indices = self.head_indices[indices]
+        return self.snakes_x[indices, head_indices], self.snakes_y[indices, head_indices]
+
+    def get_snake(self, index):
+        head_index = self.head_indices[index]
+        blocks = (arange(self.lengths[index]) + head_index) % self.capacity
+        return list(zip(self.snakes_x[index, blocks].tolist(), self.snakes_y[index, blocks].tolist()))
+
+    def get_snack(self, index):
+        return int(self.snacks_x[index]), int(self.snacks_y[index])
+
+    def end_games(self, indices, end_reason):
+        self.statuses[indices] = GameStatus.ENDED.value
+        self.end_reasons[indices] = end_reason.value
+
+    def get_live_indices(self):
+        return flatnonzero(self.statuses != GameStatus.ENDED.value)
+
+    @staticmethod
+    def get_snake_snacks_distances(snake_heads_x, snake_heads_y, snacks_x, snacks_y):
+        coefficients1 = (snake_heads_x - snacks_x).astype(float) ** 2
+        coefficients2 = (snake_heads_y - snacks_y).astype(float) ** 2
+        return sqrt(coefficients1 + coefficients2)
+
+    def grow_snakes(self, indices):
+        for index in indices:
+            tail_index = (self.head_indices[index] + self.lengths[index]) % self.capacity
+            x = self.snack_perspectives_x[index]
+            y = self.snack_perspectives_y[index]
+            self.snakes_x[index, tail_index] = x
+            self.snakes_y[index, tail_index] = y
+            self.lengths[index] += 1
+
+            if self.is_on_board(x, y):
+                self.occupancy[index, self.get_cell(x, y)] += 1
+
+    def move_forward(self, indices, new_directions):
+        current_directions = self.directions[indices]
+
+        # Handle inadequate move. As result snake is moving in the same direction.
+        axes = self.get_axes(current_directions)
+        moving_directions = where(axes == self.get_axes(new_directions), current_directions, new_directions)
+
+        heads_x, heads_y = self.get_snake_head_positions(indices)
+        new_heads_x = heads_x + self.get_deltas_x(moving_directions)
+        new_heads_y = heads_y + self.get_deltas_y(moving_directions)
+
+        # Release the tail block, it becomes the snack perspective.
+        tail_indices = (self.head_indices[indices] + self.lengths[indices] - 1) % self.capacity
+        tails_x = self.snakes_x[indices, tail_indices]
+        tails_y = self.snakes_y[indices, tail_indices]
+        self.update_occupancy(indices, tails_x, tails_y, -1)
+        self.snack_perspectives_x[indices] = tails_x
+        self.snack_perspectives_y[indices] = tails_y
+
+        # Push the new head block.
+        head_indices = (self.head_indices[indices] - 1) % self.capacity
+        self.head_indices[indices] = head_indices
+        self.snakes_x[indices, head_indices] = new_heads_x
+        self.snakes_y[indices, head_indices] = new_heads_y
+        self.update_occupancy(indices, new_heads_x, new_heads_y, 1)
+
+    def update_occupancy(self, indices, xs, ys, change):
+        on_board = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.occupancy[indices[on_board], self.get_cell(xs[on_board], ys[on_board])] += change
+
+    @staticmethod
+    def get_axes(directions):
+        return AXIS_TABLE[directions]
+
+    @staticmethod
+    def get_deltas_x(directions):
+        return DELTA_X_TABLE[directions]
+
+    @staticmethod
+    def get_deltas_y(directions):
+        return DELTA_Y_TABLE[directions]
+
+    @staticmethod
+    def get_full_game_representation_strategy(batch_game, indices):
+        number_of_cells = batch_game.number_of_cells
+        game_representation = zeros((len(indices), number_of_cells + 4))
+
+        # Encode game board
+        occupancy = batch_game.occupancy[indices]
+        game_representation[:, :number_of_cells] = occupancy > 0
+
+        rows = arange(len(indices))
+        snack_cells = batch_game.get_cell(batch_game.snacks_x[indices], batch_game.snacks_y[indices])
+        game_representation[rows, snack_cells] = where(occupancy[rows, snack_cells] > 0, 1, -1)
+
+        # Encode current direction
+        game_representation[rows, number_of_cells + batch_game.directions[indices] - 1] = 1
+
+        return game_representation
+
+    @staticmethod
+    def get_feature_based_game_representation_strategy(batch_game, indices):
+        game_representation = zeros((len(indices), 8))
+        heads_x, heads_y = batch_game.get_snake_head_positions(indices)
+
+        snacks_x = batch_game.snacks_x[indices]
+        snacks_y = batch_game.snacks_y[indices]
+
+        left = snacks_x < heads_x
+        right = ~left & (snacks_x > heads_x)
+        top = ~left & ~right & (snacks_y < heads_y)
+        bottom = ~left & ~right & ~top & (snacks_y > heads_y)
+        game_representation[:, 0] = left
+        game_representation[:, 1] = right
+        game_representation[:, 2] = top
+        game_representation[:, 3] = bottom
+
+        # Encode current direction
+        rows = arange(len(indices))
+        game_representation[rows, 4 + batch_game.directions[indices] - 1] = 1
+
+        return game_representation
+
+    def get_predictions(self, indices, game_state_representations):
+        predictions = zeros((len(indices), TURN_TABLE.shape[1]))
+        stack_ids = self.stack_ids[indices]
+
+        # One batched forward pass per topology
+        for stack_id, phenotype_stack in enumerate(self.phenotype_stacks):
+            selected_rows = flatnonzero(stack_ids == stack_id)
+            if len(selected_rows) == 0:
+                continue
+
+            stack_positions = self.stack_positions[indices[selected_rows]]
+            predictions[selected_rows] = PhenotypeStack.get_predictions(phenotype_stack, stack_positions,
+                                                                        game_state_representations[selected_rows])
+
+        return predictions
+
+    @staticmethod
+    def get_new_directions_from_predictions(predictions, current_directions):
+        best_decisions = argmax(predictions, axis=1)
+        return TURN_TABLE[current_directions, best_decisions]
+
+    @staticmethod
+    def get_next_batch_game(batch_game):
+        indices = batch_game.get_live_indices()
+        if len(indices) == 0:
+            return batch_game
+
+        heads_x, heads_y = batch_game.get_snake_head_positions(indices)
+
+        # Handle games reaching points thresholds
+        scores = batch_game.scores[indices]
+        reached_max = scores >= batch_game.max_points_threshold
+        reached_min = ~reached_max & (scores <= batch_game.min_points_threshold)
+
+        # Handle snakes hitting walls or themselves
+        on_board = (heads_x >= 0) & (heads_x < batch_game.width) & (heads_y >= 0) & (heads_y < batch_game.height)
+        head_cells = batch_game.get_cell(where(on_board, heads_x, 0), where(on_board, heads_y, 0))
+        collided = ~reached_max & ~reached_min & (~on_board | (batch_game.occupancy[indices, head_cells] > 1))
+
+        ended = reached_max | reached_min | collided
+
+        # Handle runaway games
+        out_of_steps = zeros(len(indices), dtype=bool)
+        if batch_game.max_steps is not None:
+            out_of_steps = ~ended & (batch_game.steps[indices] >= batch_game.max_steps)
+            ended |= out_of_steps
+
+        stagnated = zeros(len(indices), dtype=bool)
+        if batch_game.max_steps_without_snack is not None:
+            stagnated = ~ended & (batch_game.steps_since_snack[indices] >= batch_game.max_steps_without_snack)
+            ended |= stagnated
+
+        batch_game.end_games(indices[reached_max], GameEndReason.MAX_POINTS_THRESHOLD)
+        batch_game.end_games(indices[reached_min], GameEndReason.MIN_POINTS_THRESHOLD)
+        batch_game.end_games(indices[collided], GameEndReason.COLLISION)
+        batch_game.end_games(indices[out_of_steps], GameEndReason.STEP_LIMIT)
+        batch_game.end_games(indices[stagnated], GameEndReason.STAGNATION)
+        indices = indices[~ended]
+        heads_x = heads_x[~ended]
+        heads_y = heads_y[~ended]
+
+        # Handle snake eating snack points
+        new_snack_distances = batch_game.get_snake_snacks_distances(heads_x, heads_y, batch_game.snacks_x[indices],
+                                                                    batch_game.snacks_y[indices])
+        eating = (heads_x == batch_game.snacks_x[indices]) & (heads_y == batch_game.snacks_y[indices])
+        approaching = new_snack_distances < batch_game.last_snack_distances[indices]
+        batch_game.scores[indices] += where(eating, batch_game.snack_eaten_points,
+                                            where(approaching, batch_game.moved_toward_snack_points,
+                                                  batch_game.moved_away_from_snack_points))
+
+        eating_indices = indices[eating]
+        batch_game.steps_since_snack[eating_indices] = 0
+        for index in eating_indices:
+            batch_game.initialize_snack(index)
+
+        # Snakes which filled the whole board have nowhere left to grow.
+        batch_game.grow_snakes(eating_indices[batch_game.statuses[eating_indices] != GameStatus.ENDED.value])
+
+        batch_game.last_snack_distances[indices] = new_snack_distances
+
+        # Games which ran out of board space do not make decisions.
+        indices = indices[batch_game.statuses[indices] != GameStatus.ENDED.value]
+        if len(indices) == 0:
+            return batch_game
+
+        # Make decisions
+        game_state_representations = batch_game.game_representation_strategy(batch_game, indices)
+        predictions = batch_game.get_predictions(indices, game_state_representations)
+        new_directions = batch_game.get_new_directions_from_predictions(predictions, batch_game.directions[indices])
+
+        # Move forward
+        batch_game.move_forward(indices, new_directions)
+
+        # Update current directions
+        batch_game.directions[indices] = new_directions
+        batch_game.steps[indices] += 1
+        batch_game.steps_since_snack[indices] += 1
+
+        return batch_game
+
+    @staticmethod
+    def is_game_supported(game_arguments):
+        # Game keyword arguments which batch games play exactly like scalar games.
+        return (game_arguments.get('game_representation_strategy') in BATCH_GAME_REPRESENTATION_STRATEGIES and
+                game_arguments.get('snack_placement', SnackPlacement.COMPATIBLE) == SnackPlacement.COMPATIBLE and
+                not game_arguments.get('detect_cycles', False))
+
+    @staticmethod
+    def get_solved_batch_game(batch_game):
+        while len(batch_game.get_live_indices()) > 0:
+            BatchGame.get_next_batch_game(batch_game)
+
+        return batch_game
+
+# Batch counterparts of scalar game representation strategies
+BATCH_GAME_REPRESENTATION_STRATEGIES = {
+    Game.get_full_game_representation_strategy: BatchGame.get_full_game_representation_strategy,
+    Game.get_feature_based_game_representation_strategy: BatchGame.get_feature_based_game_representation_strategy,
+}
@@ -0,0 +1,167 @@
+from json import dump, load
+from platform import python_version
+from time import perf_counter
+
+from femos.core import get_number_of_nn_weights
+from femos.phenotypes import Phenotype
+from numpy import __version__ as numpy_version
+from numpy.random import default_rng
+
+from engine.evaluation import EvaluationService
+from engine.features import get_input_nodes
+from engine.game import Game, GameStatus
+
+REPRESENTATION_STRATEGIES = {
+    'full': Game.get_full_game_representation_strategy,
+    'features': Game.get_feature_based_game_representation_strategy,
+}
+
+
+def get_benchmark_phenotypes(number_of_phenotypes, input_nodes, hidden_layers_nodes, output_nodes, seed=777,
+                             use_bias=False):
+    # Same weights in every run, so results of different runs play the same games.
+    random_generator = default_rng(seed)
+    number_of_weights = get_number_of_nn_weights(input_nodes, hidden_layers_nodes, output_nodes, use_bias)
+
+    return [Phenotype(random_generator.uniform(-1, 1, number_of_weights), input_nodes, hidden_layers_nodes,
+                      output_nodes, use_bias) for index in range(number_of_phenotypes)]
+
+
+def get_benchmark_games(width, height, representation, number_of_games, hidden_layers_nodes):
+    strategy = REPRESENTATION_STRATEGIES[representation]
+    input_nodes = get_input_nodes(strategy, width, height)
+    phenotypes = get_benchmark_phenotypes(number_of_games, input_nodes, hidden_layers_nodes, 3)
+
+    return [Game(width, height, phenotype, seed, strategy) for seed, phenotype in enumerate(phenotypes)]
+
+
+def measure_steps_per_second(width, height, representation, number_of_games=50, hidden_layers_nodes=(16,),
+                             minimum_duration=0.25):
+    # Only steps are timed, games are set up again until the minimum duration is reached.
+    steps = 0
+    duration = 0
+    while steps == 0 or duration < minimum_duration:
+        games = get_benchmark_games(width, height, representation, number_of_games, list(hidden_layers_nodes))
+
+        start_time = perf_counter()
+        for game in games:
+            while game.status != GameStatus.ENDED:
+                Game.get_next_game(game)
+            steps += game.steps
+        duration += perf_counter() - start_time
+
+    return steps / duration
+
+
+def measure_episodes_per_second(width, height, representation, number_of_games=50, hidden_layers_nodes=(16,),
+                                minimum_duration=0.25):
+    # Phenotypes are created outside of the measured time, games inside of it.
+    strategy = REPRESENTATION_STRATEGIES[representation]
+    input_nodes = get_input_nodes(strategy, width, height)
+    phenotypes = get_benchmark_phenotypes(number_of_games, input_nodes, list(hidden_layers_nodes), 3)
+
+    episodes = 0
+    start_time = perf_counter()
+    while episodes == 0 or perf_counter() - start_time < minimum_duration:
+        for seed, phenotype in enumerate(phenotypes):
+            Game.get_solved_game(Game(width, height, phenotype, seed, strategy))
+        episodes += number_of_games
+
+    return episodes / (perf_counter() - start_time)
+
+
+def measure_generation_seconds(evaluation_strategy, phenotypes, minimum_duration=0.25):
+    generations = 0
+    start_time = perf_counter()
+    while generations == 0 or perf_counter() - start_time < minimum_duration:
+        evaluation_strategy(phenotypes)
+        generations += 1
+
+    return (perf_counter() - start_time) / generations
+
+
+def get_best_value(measure, repeats, higher_is_better=True):
+    # Best of several runs is the least disturbed by other processes.
+    values = [measure() for repeat in range(repeats)]
+    return max(values) if higher_is_better else min(values)
+
+
+def get_result(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def run_game_benchmarks(board_sizes, repeats=3):
+    results = {}
+
+    for width, height in board_sizes:
+        for representation in REPRESENTATION_STRATEGIES:
+            suffix = '{}/{}x{}'.format(representation, width, height)
+
+            steps_per_second = get_best_value(lambda: measure_steps_per_second(width, height, representation),
+                                              repeats)
+            results['steps_per_second/' + suffix] = get_result(steps_per_second, 'steps/s', True)
+
+            episodes_per_second = get_best_value(lambda: measure_episodes_per_second(width, height, representation),
+                                                 repeats)
+            results['episodes_per_second/' + suffix] = get_result(episodes_per_second, 'episodes/s', True)
+
+    return results
+
+
+def run_generation_benchmarks(evolution, population_sizes, hidden_layers_nodes=(16,), repeats=3):
+    """Wall time of evolution.evaluation_strategy with the evaluation settings of the evolution module."""
+    results = {}
+
+    with EvaluationService(evolution.GAME_ARGUMENTS, evolution.BATCH_EVALUATION,
+                           minimum_chunk_size=evolution.MINIMUM_CHUNK_SIZE,
+                           kernel_evaluation=evolution.KERNEL_EVALUATION) as evaluation_service:
+        evolution.evaluation_service = evaluation_service
+
+        for population_size in population_sizes:
+            phenotypes = get_benchmark_phenotypes(population_size, evolution.INPUT_NODES, list(hidden_layers_nodes),
+                                                  evolution.OUTPUT_NODES)
+
+            # First generation also starts workers and compiles kernels, it is not measured.
+            evolution.evaluation_strategy(phenotypes)
+            generation_seconds = get_best_value(
+                lambda: measure_generation_seconds(evolution.evaluation_strategy, phenotypes), repeats, False)
+            results['generation_seconds/{}'.format(population_size)] = get_result(generation_seconds, 's', False)
+
+        evolution.evaluation_service = None
+
+    return results
+
+
+def get_environment():
+    return {'python': python_version(), 'numpy': numpy_version}
+
+
+def save_results(results, path):
+    with open(path, 'w') as file:
+        dump({'environment': get_environment(), 'results': results}, file, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as file:
+        return load(file)['results']
+
+
+def get_regressions(results, baseline, tolerance=0.1):
+    """Results worse than the baseline by more than the tolerance, as (name, baseline value, value, change).
+
+    Change is the relative difference to the baseline, negative when the result got worse. Results missing in
+    either of them are not compared.
+    """
+    regressions = []
+
+    for name in sorted(set(results) & set(baseline)):
+        baseline_value = baseline[name]['value']
+        value = results[name]['value']
+        change = (value - baseline_value) / baseline_value
+        if not results[name]['higher_is_better']:
+            change = -change
+
+        if change < -tolerance:
+            regressions.append((name, baseline_value, value, change))
+
+    return regressions
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from shelve import open as open_shelf
+
+
+def get_configuration_digest(game_arguments):
+    parts = []
+    for name, value in sorted(game_arguments.items()):
+        # Functions are identified by their qualified name, their repr contains a memory address.
+        if callable(value) and hasattr(value, '__qualname__'):
+            value = value.__module__ + '.' + value.__qualname__
+
+        parts.append('{}={!r}'.format(name, value))
+
+    return blake2b(';'.join(parts).encode(), digest_size=16).digest()
+
+
+class FitnessCache:
+    """Results of solved games keyed by a hash of the weights, topology, game arguments and seed.
+
+    Weights include bias weights and the topology whether the phenotype uses bias, see EvaluationService.get_topology,
+    so phenotypes sharing their layers but not their bias never share a key.
+
+    Games are deterministic given those, so a key always maps to the same result. Most recently used entries are
+    kept in memory, when a path is given every result is also written to a shelve store which outlives the process.
+    """
+
+    def __init__(self, maximum_size=100000, path=None):
+        self.maximum_size = maximum_size
+        self.entries = OrderedDict()
+        self.store = open_shelf(path) if path is not None else None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    @staticmethod
+    def get_key(configuration_digest, topology, weights, seed):
+        key = blake2b(configuration_digest, digest_size=20)
+        key.update(repr((topology, seed)).encode())
+        key.update(weights.tobytes())
+        return key.hexdigest()
+
+    def get(self, key):
+        result = self.entries.get(key)
+
+        if result is None and self.store is not None:
+            result = self.store.get(key)
+            if result is not None:
+                self.add_entry(key, result)
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.add_entry(key, result)
+
+        if self.store is not None:
+            self.store[key] = result
+
+    def add_entry(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maximum_size:
+            self.entries.popitem(last=False)
@@ -0,0 +1,86 @@
+from enum import Enum
+
+
+class SnackPlacement(Enum):
+    # Same snack sequence as choosing from the ordered list of free cells, O(log cells) per update.
+    COMPATIBLE = 1
+    # Free cells are kept unordered, O(1) per update and per placement.
+    FAST = 2
+
+
+class FreeCellPool:
+    """Free board cells kept in an indexed array with swap-remove.
+
+    When ordered, a Fenwick tree over free cells is kept as well, so the k-th free cell in board order is found
+    without building the list of free cells.
+    """
+    __slots__ = ['number_of_cells', 'ordered', 'cells', 'indices', 'tree']
+
+    def __init__(self, number_of_cells, ordered=False):
+        self.number_of_cells = number_of_cells
+        self.ordered = ordered
+        self.cells = list(range(number_of_cells))
+        self.indices = list(range(number_of_cells))
+
+        self.tree = None
+        if ordered:
+            # Fenwick tree of an all ones array
+            self.tree = [index & -index for index in range(number_of_cells + 1)]
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.indices[cell] >= 0
+
+    def remove(self, cell):
+        index = self.indices[cell]
+        last_cell = self.cells.pop()
+
+        if last_cell != cell:
+            self.cells[index] = last_cell
+            self.indices[last_cell] = index
+
+        self.indices[cell] = -1
+
+        if self.ordered:
+            self.update_tree(cell, -1)
+
+    def add(self, cell):
+        self.indices[cell] = len(self.cells)
+        self.cells.append(cell)
+
+        if self.ordered:
+            self.update_tree(cell, 1)
+
+    def update_tree(self, cell, change):
+        position = cell + 1
+        while position <= self.number_of_cells:
+            self.tree[position] += change
+            position += position & -position
+
+    def get_ordered_cell(self, number):
+        position = 0
+        remaining = number + 1
+        step = 1 << self.number_of_cells.bit_length()
+
+        while step:
+            next_position = position + step
+            if next_position <= self.number_of_cells and self.tree[next_position] < remaining:
+                position = next_position
+                remaining -= self.tree[next_position]
+            step >>= 1
+
+        return position
+
+    def get_random_cell(self, random_generator):
+        if len(self.cells) == 0:
+            raise IndexError('Cannot choose from an empty sequence')
+
+        # Random.choice(sequence) draws its index with randrange(len(sequence))
+        number = random_generator.randrange(len(self.cells))
+
+        if self.ordered:
+            return self.get_ordered_cell(number)
+
+        return self.cells[number]
@@ -0,0 +1,216 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from os import listdir, makedirs, remove, replace
+from os.path import join
+from random import getstate, setstate
+
+from femos.core import get_next_population
+from femos.genotypes import SimpleGenotype, UncorrelatedNStepSizeGenotype, UncorrelatedOneStepSizeGenotype
+from numpy import array, float64, int64, isnan, load, nan, savez, uint32
+
+CHECKPOINT_PREFIX = 'generation-'
+CHECKPOINT_EXTENSION = '.checkpoint.npz'
+
+# Genotype kinds, stored as a number next to the weights
+SIMPLE_GENOTYPE = 0
+UNCORRELATED_ONE_STEP_SIZE_GENOTYPE = 1
+UNCORRELATED_N_STEP_SIZE_GENOTYPE = 2
+
+# Everything an evolution run needs to continue from the end of a generation. Random states are the states of the
+# random module, which femos mutates and selects with, and of the generator of evaluation seeds, either a
+# random.Random or a SeedStream. Curriculum state is the state of a CurriculumScheduler, if the run has one.
+Checkpoint = namedtuple('Checkpoint', ['generation', 'population', 'random_state', 'generator_state',
+                                       'best_weights', 'best_fitness', 'curriculum_state'], defaults=(None,))
+
+
+def get_genotype_kind(genotype):
+    if isinstance(genotype, UncorrelatedNStepSizeGenotype):
+        return UNCORRELATED_N_STEP_SIZE_GENOTYPE
+
+    if isinstance(genotype, UncorrelatedOneStepSizeGenotype):
+        return UNCORRELATED_ONE_STEP_SIZE_GENOTYPE
+
+    if isinstance(genotype, SimpleGenotype):
+        return SIMPLE_GENOTYPE
+
+    raise ValueError('Unsupported genotype {}'.format(type(genotype).__name__))
+
+
+def get_population_arrays(population):
+    # One row of weights per genotype, mutation step sizes are a column or a matrix of the same shape as weights.
+    genotype_kind = get_genotype_kind(population[0])
+    weights = array([genotype.weights for genotype in population], dtype=float64)
+
+    if genotype_kind == UNCORRELATED_N_STEP_SIZE_GENOTYPE:
+        mutation_step_sizes = array([genotype.mutation_step_sizes for genotype in population], dtype=float64)
+    elif genotype_kind == UNCORRELATED_ONE_STEP_SIZE_GENOTYPE:
+        mutation_step_sizes = array([[genotype.mutation_step_size] for genotype in population], dtype=float64)
+    else:
+        mutation_step_sizes = array([], dtype=float64)
+
+    return genotype_kind, weights, mutation_step_sizes
+
+
+def get_population(genotype_kind, weights, mutation_step_sizes):
+    # Genotypes hold lists of floats, tolist() gives back the exact values they were saved with.
+    if genotype_kind == UNCORRELATED_N_STEP_SIZE_GENOTYPE:
+        return [UncorrelatedNStepSizeGenotype(row, step_sizes)
+                for row, step_sizes in zip(weights.tolist(), mutation_step_sizes.tolist())]
+
+    if genotype_kind == UNCORRELATED_ONE_STEP_SIZE_GENOTYPE:
+        return [UncorrelatedOneStepSizeGenotype(row, step_sizes[0])
+                for row, step_sizes in zip(weights.tolist(), mutation_step_sizes.tolist())]
+
+    if genotype_kind == SIMPLE_GENOTYPE:
+        return [SimpleGenotype(row) for row in weights.tolist()]
+
+    raise ValueError('Unsupported genotype kind {}'.format(genotype_kind))
+
+
+def get_random_state_arrays(random_state):
+    # State of random.Random is (version, 624 words and a position, next gaussian or None).
+    version, internal_state, gauss_next = random_state
+    return array([version] + list(internal_state), dtype=uint32), array([nan if gauss_next is None else gauss_next])
+
+
+def get_random_state(internal_state, gauss_next):
+    gauss_next = gauss_next[0]
+    return int(internal_state[0]), tuple(int(value) for value in internal_state[1:]), \
+        None if isnan(gauss_next) else float(gauss_next)
+
+
+def get_generator_state_arrays(generator_state):
+    # SeedStream state is a number of generations, stored without a gaussian.
+    if isinstance(generator_state, int):
+        return array([generator_state], dtype=int64), array([])
+
+    return get_random_state_arrays(generator_state)
+
+
+def get_generator_state(internal_state, gauss_next):
+    if len(gauss_next) == 0:
+        return int(internal_state[0])
+
+    return get_random_state(internal_state, gauss_next)
+
+
+def get_checkpoint_path(directory, generation):
+    return join(directory, '{}{:06d}{}'.format(CHECKPOINT_PREFIX, generation, CHECKPOINT_EXTENSION))
+
+
+def get_checkpoint_paths(directory):
+    # Zero padded generations sort in the order they were written.
+    try:
+        file_names = listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    return [join(directory, file_name) for file_name in sorted(file_names)
+            if file_name.startswith(CHECKPOINT_PREFIX) and file_name.endswith(CHECKPOINT_EXTENSION)]
+
+
+def save_checkpoint(directory, checkpoint, checkpoints_to_keep=None):
+    """Writes the checkpoint as uncompressed arrays, only the newest checkpoints_to_keep files are kept.
+
+    Checkpoint is written to a temporary file first and renamed, an interrupted write never leaves a partial
+    checkpoint behind.
+    """
+    makedirs(directory, exist_ok=True)
+    genotype_kind, weights, mutation_step_sizes = get_population_arrays(checkpoint.population)
+    random_state, random_gauss_next = get_random_state_arrays(checkpoint.random_state)
+    generator_state, generator_gauss_next = get_generator_state_arrays(checkpoint.generator_state)
+
+    path = get_checkpoint_path(directory, checkpoint.generation)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        savez(file, generation=checkpoint.generation, genotype_kind=genotype_kind, weights=weights,
+              mutation_step_sizes=mutation_step_sizes, random_state=random_state,
+              random_gauss_next=random_gauss_next, generator_state=generator_state,
+              generator_gauss_next=generator_gauss_next,
+              best_weights=array(checkpoint.best_weights if checkpoint.best_weights is not None else [],
+                                 dtype=float64),
+              best_fitness=array(checkpoint.best_fitness if checkpoint.best_fitness is not None else nan),
+              curriculum_state=array(checkpoint.curriculum_state if checkpoint.curriculum_state is not None else [],
+                                     dtype=int64))
+    replace(temporary_path, path)
+
+    if checkpoints_to_keep is not None:
+        for old_path in get_checkpoint_paths(directory)[:-checkpoints_to_keep]:
+            remove(old_path)
+
+    return path
+
+
+def load_checkpoint(path):
+    with load(path) as arrays:
+        best_fitness = float(arrays['best_fitness'])
+        best_weights = arrays['best_weights'].tolist()
+        curriculum_state = tuple(arrays['curriculum_state'].tolist()) if 'curriculum_state' in arrays.files else ()
+
+        return Checkpoint(int(arrays['generation']),
+                          get_population(int(arrays['genotype_kind']), arrays['weights'],
+                                         arrays['mutation_step_sizes']),
+                          get_random_state(arrays['random_state'], arrays['random_gauss_next']),
+                          get_generator_state(arrays['generator_state'], arrays['generator_gauss_next']),
+                          best_weights if not isnan(best_fitness) else None,
+                          best_fitness if not isnan(best_fitness) else None,
+                          curriculum_state if len(curriculum_state) > 0 else None)
+
+
+def load_latest_checkpoint(directory):
+    checkpoint_paths = get_checkpoint_paths(directory)
+    return load_checkpoint(checkpoint_paths[-1]) if len(checkpoint_paths) > 0 else None
+
+
+def get_checkpointed_population(initial_population, phenotype_strategy, evaluation_strategy,
+                                parent_selection_strategy, mutation_strategy, offspring_selection_strategy,
+                                random_generator, checkpoint_directory, checkpoint_interval=1,
+                                checkpoints_to_keep=None, resume=True, duration=None, epochs=None,
+                                epoch_callback=None, curriculum=None):
+    """Evolves the population like femos.core.get_evolved_population and checkpoints it every checkpoint_interval
+    generations.
+
+    With resume the run continues from the latest checkpoint in checkpoint_directory, the random module and
+    random_generator are restored, as is the stage of the curriculum, so the following generations are the same as
+    in a run which was never interrupted. Run ends after duration hours of this process or once epochs generations
+    are evolved in total. Returns the last checkpoint, which is also written when the run ends.
+    """
+    checkpoint = load_latest_checkpoint(checkpoint_directory) if resume else None
+
+    if checkpoint is None:
+        checkpoint = Checkpoint(0, initial_population, getstate(), random_generator.getstate(), None, None,
+                                curriculum.getstate() if curriculum is not None else None)
+    else:
+        setstate(checkpoint.random_state)
+        random_generator.setstate(checkpoint.generator_state)
+        if curriculum is not None and checkpoint.curriculum_state is not None:
+            curriculum.setstate(checkpoint.curriculum_state)
+
+    end_datetime = datetime.now() + timedelta(hours=duration) if duration is not None else None
+    generation, population = checkpoint.generation, checkpoint.population
+    best_weights, best_fitness = checkpoint.best_weights, checkpoint.best_fitness
+
+    while (epochs is None or generation < epochs) and (end_datetime is None or datetime.now() <= end_datetime):
+        next_population, phenotype_values, start_time, end_time = get_next_population(
+            population, phenotype_strategy, evaluation_strategy, parent_selection_strategy, mutation_strategy,
+            offspring_selection_strategy)
+
+        # Values belong to the evaluated population, not to its offspring.
+        best_index = max(range(len(population)), key=lambda index: phenotype_values[index])
+        if best_fitness is None or phenotype_values[best_index] > best_fitness:
+            best_weights, best_fitness = list(population[best_index].weights), phenotype_values[best_index]
+
+        generation, population = generation + 1, next_population
+        checkpoint = Checkpoint(generation, population, getstate(), random_generator.getstate(), best_weights,
+                                best_fitness, curriculum.getstate() if curriculum is not None else None)
+
+        if generation % checkpoint_interval == 0:
+            save_checkpoint(checkpoint_directory, checkpoint, checkpoints_to_keep)
+
+        if epoch_callback is not None:
+            epoch_callback(generation, phenotype_values, start_time, end_time)
+
+    if generation % checkpoint_interval != 0:
+        save_checkpoint(checkpoint_directory, checkpoint, checkpoints_to_keep)
+
+    return checkpoint
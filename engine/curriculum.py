@@ -0,0 +1,81 @@
+from collections import namedtuple
+
+from numpy import quantile
+
+from engine.features import get_input_nodes
+from engine.seeding import EvaluationConfig
+
+# Game arguments a stage changes, its episodes per phenotype (None keeps the configured ones) and the population
+# fitness which moves the curriculum to the next stage (None for the last stage).
+CurriculumStage = namedtuple('CurriculumStage', ['game_arguments', 'episodes_per_phenotype', 'milestone'])
+
+
+class CurriculumScheduler:
+    """Plays generations on a sequence of stages, e.g. growing boards, snakes and point thresholds.
+
+    After every generation the fitness_quantile of population fitness is compared with the milestone of the current
+    stage, once it reached the milestone in patience consecutive generations the next stage starts. Fitness of
+    different stages is not comparable, milestones are given in the points of their own stage.
+
+    Phenotypes keep their number of inputs between stages, so boards can only grow with representations whose
+    number of inputs does not depend on the board size.
+    """
+
+    def __init__(self, evaluation_config, stages, fitness_quantile=0.9, patience=3):
+        self.evaluation_config = evaluation_config
+        self.stages = stages
+        self.fitness_quantile = fitness_quantile
+        self.patience = patience
+        self.stage_index = 0
+        self.generations_at_milestone = 0
+
+        # Configs are built once, so a config is the same object for as long as its stage lasts.
+        self.stage_configs = [self.get_stage_config(stage) for stage in stages]
+
+        input_nodes = {self.get_input_nodes(config.game_arguments) for config in self.stage_configs}
+        if len(input_nodes) > 1:
+            raise ValueError('Curriculum stages need {} different numbers of inputs'.format(len(input_nodes)))
+
+    @staticmethod
+    def get_input_nodes(game_arguments):
+        return get_input_nodes(game_arguments['game_representation_strategy'], game_arguments['width'],
+                               game_arguments['height'])
+
+    def get_stage_config(self, stage):
+        game_arguments = dict(self.evaluation_config.game_arguments)
+        game_arguments.update(stage.game_arguments)
+        episodes_per_phenotype = stage.episodes_per_phenotype or self.evaluation_config.episodes_per_phenotype
+
+        return EvaluationConfig(game_arguments, episodes_per_phenotype, self.evaluation_config.same_environment,
+                                self.evaluation_config.seed)
+
+    @property
+    def stage(self):
+        return self.stages[self.stage_index]
+
+    def get_evaluation_config(self):
+        return self.stage_configs[self.stage_index]
+
+    def update(self, phenotype_values):
+        """Records fitness of a generation, returns whether the next generation is played on a new stage."""
+        milestone = self.stage.milestone
+        if milestone is None or self.stage_index == len(self.stages) - 1:
+            return False
+
+        if float(quantile(phenotype_values, self.fitness_quantile)) >= milestone:
+            self.generations_at_milestone += 1
+        else:
+            self.generations_at_milestone = 0
+
+        if self.generations_at_milestone < self.patience:
+            return False
+
+        self.stage_index += 1
+        self.generations_at_milestone = 0
+        return True
+
+    def getstate(self):
+        return self.stage_index, self.generations_at_milestone
+
+    def setstate(self, state):
+        self.stage_index, self.generations_at_milestone = state
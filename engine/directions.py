@@ -0,0 +1,34 @@
+from numpy import array
+
+# Directions as small integer codes, equal to the values of the Direction enum. Code 0 is unused.
+LEFT = 1
+RIGHT = 2
+UP = 3
+DOWN = 4
+
+# Actions in the order of network outputs, the first best output is taken.
+ROTATE_RIGHT = 0
+ROTATE_LEFT = 1
+KEEP_DIRECTION = 2
+
+# New direction code by direction code and action.
+TURNS = (
+    (0, 0, 0),
+    (UP, DOWN, LEFT),
+    (DOWN, UP, RIGHT),
+    (RIGHT, LEFT, UP),
+    # Rotating right while moving down keeps moving down, as it always did.
+    (DOWN, RIGHT, DOWN),
+)
+
+# Head movement by direction code.
+DELTAS = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Axis by direction code, 0 for horizontal and 1 for vertical directions.
+AXES = (0, 0, 0, 1, 1)
+
+# Same tables as arrays for vectorized and compiled engines.
+TURN_TABLE = array(TURNS)
+DELTA_X_TABLE = array([delta_x for delta_x, delta_y in DELTAS])
+DELTA_Y_TABLE = array([delta_y for delta_x, delta_y in DELTAS])
+AXIS_TABLE = array(AXES)
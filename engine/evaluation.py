@@ -0,0 +1,317 @@
+from abc import ABC, abstractmethod
+from math import ceil
+from multiprocessing import Pool, cpu_count, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from os import getpid
+from time import time
+
+from femos.phenotypes import Phenotype
+from numpy import concatenate, float64, ndarray
+
+from engine.batch import BatchGame, BATCH_GAME_REPRESENTATION_STRATEGIES
+from engine.cache import FitnessCache, get_configuration_digest
+from engine.game import Game, GameResult
+from engine.kernel import get_solved_game_result
+from engine.stats import GameStats
+
+# State of an evaluation worker process, set up once by initialize_worker.
+worker_state = {}
+
+
+def initialize_worker(game_arguments, batch_evaluation, kernel_evaluation=False, collect_stats=False):
+    worker_state['game_arguments'] = game_arguments
+    worker_state['batch_evaluation'] = batch_evaluation
+    worker_state['kernel_evaluation'] = kernel_evaluation
+    worker_state['collect_stats'] = collect_stats
+    worker_state['shared_memory'] = None
+
+
+def get_worker_weights(weights_name, weights_shape):
+    shared_memory = worker_state['shared_memory']
+
+    # Population weights moved to a new block, e.g. because the population grew.
+    if shared_memory is None or shared_memory.name != weights_name:
+        if shared_memory is not None:
+            shared_memory.close()
+
+        shared_memory = SharedMemory(name=weights_name)
+        worker_state['shared_memory'] = shared_memory
+
+    return ndarray(weights_shape, dtype=float64, buffer=shared_memory.buf)
+
+
+def get_phenotype_weights(phenotype):
+    # Layers followed by bias layers, the order femos reads weights of a genotype in.
+    return concatenate([layer.ravel() for layer in phenotype.layers + phenotype.bias_layers])
+
+
+def get_phenotype(weights, topology):
+    input_nodes, hidden_layers_nodes, output_nodes, use_bias = topology
+    return Phenotype(weights, input_nodes, list(hidden_layers_nodes), output_nodes, use_bias)
+
+
+def evaluate_games(task, stats=None):
+    weights_name, weights_shape, topology, start, seeds = task
+    game_arguments = worker_state['game_arguments']
+
+    # Phenotype copies its layers out of shared memory, so the block can be reused by the next generation.
+    weights = get_worker_weights(weights_name, weights_shape)
+    phenotypes = [get_phenotype(weights[start + index], topology) for index in range(len(seeds))]
+    del weights
+
+    return solve_phenotype_games(phenotypes, seeds, game_arguments, worker_state['batch_evaluation'],
+                                 worker_state['kernel_evaluation'], stats)
+
+
+def solve_phenotype_games(phenotypes, seeds, game_arguments, batch_evaluation, kernel_evaluation, stats=None):
+    # Kernel games fall back to scalar games without numba or for games the kernel does not support.
+    if kernel_evaluation:
+        return [get_solved_game_result(phenotype, seed, game_arguments, stats) for phenotype, seed in
+                zip(phenotypes, seeds)]
+
+    # Cycle detection, fast snack placement and sensor based representations are only available in scalar games.
+    # Batch games always place snacks like compatible placement and take neither of the arguments.
+    if batch_evaluation and BatchGame.is_game_supported(game_arguments):
+        batch_game_arguments = {name: value for name, value in game_arguments.items() if
+                                name not in ('detect_cycles', 'snack_placement')}
+        batch_game_arguments['game_representation_strategy'] = BATCH_GAME_REPRESENTATION_STRATEGIES[
+            game_arguments['game_representation_strategy']]
+        if stats is not None:
+            stats.start()
+
+        batch_game = BatchGame(phenotypes=phenotypes, seeds=seeds, **batch_game_arguments)
+        BatchGame.get_solved_batch_game(batch_game)
+
+        results = [GameResult(*result) for result in
+                   zip(batch_game.scores.tolist(), batch_game.steps.tolist(), batch_game.lengths.tolist(),
+                       batch_game.end_reasons.tolist(), seeds)]
+
+        # Batch games are timed as a whole.
+        if stats is not None:
+            stats.lap('batch_games')
+            for result in results:
+                stats.add_game_result(result, game_arguments.get('snake_length', 5))
+
+        return results
+
+    results = []
+    for phenotype, seed in zip(phenotypes, seeds):
+        game = Game(phenotype=phenotype, seed=seed, stats=stats, **game_arguments)
+        results.append(Game.get_solved_game_result(game))
+
+    return results
+
+
+def evaluate_scheduled_games(task):
+    stats = GameStats() if worker_state['collect_stats'] else None
+
+    start_time = time()
+    results = evaluate_games(task, stats)
+    end_time = time()
+
+    start = task[3]
+    return start, results, getpid(), start_time, end_time, stats
+
+
+class LoadBalance:
+    """How evenly one generation kept the workers busy.
+
+    Utilization is the share of worker time spent solving games, imbalance is the busiest worker time over the mean
+    worker time and tail time is how long the generation ran after the first worker ran out of work.
+    """
+
+    def __init__(self, processes, chunk_sizes, worker_busy_times, worker_end_times, start_time, end_time):
+        self.processes = processes
+        self.chunk_sizes = chunk_sizes
+        self.worker_busy_times = worker_busy_times
+        self.duration = end_time - start_time
+
+        busy_times = list(worker_busy_times.values()) + [0] * (processes - len(worker_busy_times))
+        mean_busy_time = sum(busy_times) / processes
+        self.utilization = sum(busy_times) / (processes * self.duration) if self.duration > 0 else 1
+        self.imbalance = max(busy_times) / mean_busy_time if mean_busy_time > 0 else 1
+
+        # Workers without any task were idle for the whole generation.
+        first_idle_time = min(worker_end_times.values()) if len(worker_end_times) == processes else start_time
+        self.tail_time = max(worker_end_times.values()) - first_idle_time
+
+    def get_summary(self):
+        return 'tasks: {}, duration: {:.3f}s, utilization: {:.1%}, imbalance: {:.2f}, tail: {:.3f}s'.format(
+            len(self.chunk_sizes), self.duration, self.utilization, self.imbalance, self.tail_time)
+
+
+class GameExecutor(ABC):
+    """Solves games of phenotypes sharing one topology, evolution does not care where.
+
+    evaluate(phenotypes, seeds) returns a GameResult for every phenotype and seed, in their order. Results only
+    depend on the weights, the seed and the game arguments, so executors can replace each other. Executors which
+    collect worker stats or load balance reports append them to stats and load_balances.
+    """
+
+    def __init__(self):
+        self.stats = []
+        self.load_balances = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+    @abstractmethod
+    def evaluate(self, phenotypes, seeds):
+        pass
+
+
+class EvaluationService(GameExecutor):
+    """Worker processes started once and reused by every generation of an evolution run.
+
+    Game arguments (Game keyword arguments except phenotype and seed) are sent once when workers start. Every
+    generation only writes the population weights to a shared memory block and sends index ranges with their seeds.
+    Workers send back a GameResult per game. All phenotypes must share one topology.
+
+    Games are handed out in chunks of decreasing size (guided self-scheduling): early chunks are big to keep
+    overhead low, late chunks are small so workers that finish early pick up the remaining games instead of idling
+    behind one long episode. A LoadBalance report of every generation is kept in load_balances.
+
+    With a FitnessCache, games already solved for the same weights and seed are not dispatched again and identical
+    games within a generation are solved once. Kernel evaluation plays every game with the compiled KernelGame and
+    takes precedence over batch evaluation.
+
+    With collect_stats, every call of solve_games appends GameStats merged from all workers to stats. Game phases are
+    summed over workers, share_weights and dispatch are wall times of this process.
+    """
+
+    def __init__(self, game_arguments, batch_evaluation=False, processes=None, minimum_chunk_size=1,
+                 fitness_cache=None, kernel_evaluation=False, collect_stats=False):
+        super().__init__()
+        self.processes = processes or cpu_count()
+        self.minimum_chunk_size = minimum_chunk_size
+        self.collect_stats = collect_stats
+        self.fitness_cache = fitness_cache
+        self.configuration_digest = get_configuration_digest(game_arguments)
+
+        # Workers have to share the resource tracker of this process, otherwise each of them starts its own one and
+        # reports attached weights blocks as leaked when it exits.
+        resource_tracker.ensure_running()
+        self.pool = Pool(self.processes, initialize_worker,
+                         (game_arguments, batch_evaluation, kernel_evaluation, collect_stats))
+        self.shared_memory = None
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.release_shared_memory()
+
+    def release_shared_memory(self):
+        if self.shared_memory is not None:
+            self.shared_memory.close()
+            self.shared_memory.unlink()
+            self.shared_memory = None
+
+    def share_weights(self, phenotypes):
+        number_of_weights = sum(layer.size for layer in phenotypes[0].layers + phenotypes[0].bias_layers)
+        weights_shape = (len(phenotypes), number_of_weights)
+        size = len(phenotypes) * number_of_weights * float64().itemsize
+
+        if self.shared_memory is None or self.shared_memory.size < size:
+            self.release_shared_memory()
+            self.shared_memory = SharedMemory(create=True, size=size)
+
+        weights = ndarray(weights_shape, dtype=float64, buffer=self.shared_memory.buf)
+        for index, phenotype in enumerate(phenotypes):
+            weights[index] = get_phenotype_weights(phenotype)
+        del weights
+
+        return self.shared_memory.name, weights_shape
+
+    @staticmethod
+    def get_chunk_sizes(number_of_games, processes, minimum_chunk_size=1):
+        chunk_sizes = []
+        remaining_games = number_of_games
+
+        while remaining_games > 0:
+            chunk_size = max(minimum_chunk_size, ceil(remaining_games / (2 * processes)))
+            chunk_size = min(chunk_size, remaining_games)
+            chunk_sizes.append(chunk_size)
+            remaining_games -= chunk_size
+
+        return chunk_sizes
+
+    @staticmethod
+    def get_topology(phenotype):
+        return phenotype.input_nodes, tuple(phenotype.hidden_layers_nodes), phenotype.output_nodes, phenotype.use_bias
+
+    def get_tasks(self, phenotypes, seeds, chunk_sizes):
+        weights_name, weights_shape = self.share_weights(phenotypes)
+        topology = self.get_topology(phenotypes[0])
+
+        tasks = []
+        start = 0
+        for chunk_size in chunk_sizes:
+            tasks.append((weights_name, weights_shape, topology, start, list(seeds[start:start + chunk_size])))
+            start += chunk_size
+
+        return tasks
+
+    def evaluate(self, phenotypes, seeds):
+        if self.fitness_cache is None:
+            return self.solve_games(phenotypes, seeds)
+
+        topology = self.get_topology(phenotypes[0])
+        keys = [FitnessCache.get_key(self.configuration_digest, topology, get_phenotype_weights(phenotype), seed) for
+                phenotype, seed in zip(phenotypes, seeds)]
+        results = [self.fitness_cache.get(key) for key in keys]
+
+        missing_indices = {}
+        for index, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                missing_indices.setdefault(key, []).append(index)
+
+        if len(missing_indices) == 0:
+            return results
+
+        solved_indices = [indices[0] for indices in missing_indices.values()]
+        solved_results = self.solve_games([phenotypes[index] for index in solved_indices],
+                                          [seeds[index] for index in solved_indices])
+
+        for (key, indices), result in zip(missing_indices.items(), solved_results):
+            self.fitness_cache.put(key, result)
+            for index in indices:
+                results[index] = result
+
+        return results
+
+    def solve_games(self, phenotypes, seeds):
+        start_time = time()
+        chunk_sizes = self.get_chunk_sizes(len(phenotypes), self.processes, self.minimum_chunk_size)
+        tasks = self.get_tasks(phenotypes, seeds, chunk_sizes)
+        dispatch_time = time()
+
+        results = [None] * len(phenotypes)
+        worker_busy_times = {}
+        worker_end_times = {}
+        stats = GameStats() if self.collect_stats else None
+
+        for start, chunk_results, worker, task_start_time, task_end_time, task_stats in self.pool.imap_unordered(
+                evaluate_scheduled_games, tasks):
+            results[start:start + len(chunk_results)] = chunk_results
+            worker_busy_times[worker] = worker_busy_times.get(worker, 0) + task_end_time - task_start_time
+            worker_end_times[worker] = max(worker_end_times.get(worker, 0), task_end_time)
+
+            if stats is not None:
+                stats.merge(task_stats)
+
+        end_time = time()
+        self.load_balances.append(LoadBalance(self.processes, chunk_sizes, worker_busy_times, worker_end_times,
+                                              start_time, end_time))
+
+        if stats is not None:
+            stats.add_time('share_weights', dispatch_time - start_time)
+            stats.add_time('dispatch', end_time - dispatch_time)
+            self.stats.append(stats)
+
+        return results
@@ -0,0 +1,347 @@
+from collections import deque
+from multiprocessing import Pool, Process, cpu_count
+from socket import SHUT_RDWR, create_connection, create_server
+from threading import Condition, Event, Lock, Thread
+from time import monotonic
+
+from numpy import float64, frombuffer
+
+from engine.evaluation import EvaluationService, GameExecutor, get_phenotype_weights
+from engine.game import GameResult
+from engine.server import decode_game_arguments, encode_game_arguments, evaluate_request_games, get_message, \
+    read_file_message
+
+# Message types of the coordinator and worker protocol, messages are framed like those of engine.server.
+HELLO = 'hello'
+CONFIGURE = 'configure'
+TASK = 'task'
+RESULT = 'result'
+HEARTBEAT = 'heartbeat'
+
+
+class RemoteWorker:
+    """Connection of the coordinator to one worker node and the tasks the node is solving."""
+
+    def __init__(self, connection, address, slots, processes):
+        self.connection = connection
+        self.address = address
+        self.slots = slots
+        self.processes = processes
+        self.send_lock = Lock()
+        self.last_seen = monotonic()
+        # Keys of the tasks sent to the worker and not answered yet
+        self.tasks = set()
+        self.lost = False
+
+    def send(self, message):
+        with self.send_lock:
+            self.connection.sendall(message)
+
+    def close(self):
+        try:
+            self.connection.shutdown(SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+
+
+class Coordinator(GameExecutor):
+    """GameExecutor handing games out to worker nodes connected over plain sockets, see run_worker.
+
+    Every evaluate() splits the games into tasks of decreasing size, like EvaluationService, and keeps each worker
+    busy with up to as many tasks as it has slots. Workers send a heartbeat every heartbeat_interval seconds, a worker
+    not heard of for heartbeat_timeout seconds or whose connection broke is dropped and its tasks are handed out
+    again. Seeds travel with the tasks, so results do not depend on which worker solved a task, and the first result
+    of a task sent twice is kept.
+
+    Workers can join at any time, also while games are being evaluated. Evaluation fails with a RuntimeError when
+    a worker could not solve a task, e.g. because the phenotypes do not fit the game, or when no worker was connected
+    for worker_timeout seconds.
+    """
+
+    def __init__(self, game_arguments, host='127.0.0.1', port=0, minimum_chunk_size=16, heartbeat_interval=1.0,
+                 heartbeat_timeout=5.0, worker_timeout=60.0):
+        super().__init__()
+        self.encoded_game_arguments = encode_game_arguments(game_arguments)
+        self.minimum_chunk_size = minimum_chunk_size
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.worker_timeout = worker_timeout
+
+        self.condition = Condition()
+        self.workers = []
+        self.results = {}
+        # Errors of tasks which workers failed to solve, by the same keys as results
+        self.errors = {}
+        self.evaluation = 0
+        self.redispatched_tasks = 0
+        self.closed = False
+
+        self.listener = create_server((host, port))
+        self.address = self.listener.getsockname()[:2]
+        self.accepting = Thread(target=self.accept_workers, daemon=True)
+        self.accepting.start()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            workers = list(self.workers)
+            self.condition.notify_all()
+
+        self.listener.close()
+        for worker in workers:
+            worker.close()
+
+    def accept_workers(self):
+        while True:
+            try:
+                connection, address = self.listener.accept()
+            except OSError:
+                return
+
+            Thread(target=self.serve_worker, args=(connection, address), daemon=True).start()
+
+    def serve_worker(self, connection, address):
+        file = connection.makefile('rb')
+        try:
+            message = read_file_message(file)
+            if message is None or message[0].get('type') != HELLO:
+                return
+
+            worker = RemoteWorker(connection, address, message[0]['slots'], message[0]['processes'])
+            worker.send(get_message({'type': CONFIGURE, 'game_arguments': self.encoded_game_arguments,
+                                     'heartbeat_interval': self.heartbeat_interval}))
+            with self.condition:
+                self.workers.append(worker)
+                self.condition.notify_all()
+
+            while True:
+                message = read_file_message(file)
+                if message is None:
+                    break
+
+                header, body = message
+                with self.condition:
+                    worker.last_seen = monotonic()
+                    if header['type'] == RESULT:
+                        key = (header['evaluation'], header['task'])
+                        worker.tasks.discard(key)
+                        # Errors of earlier evaluations do not concern the current one.
+                        if 'error' in header:
+                            if key[0] == self.evaluation:
+                                self.errors.setdefault(key, header['error'])
+                        else:
+                            self.results.setdefault(key, header['results'])
+                        self.condition.notify_all()
+        except OSError:
+            pass
+        finally:
+            file.close()
+            connection.close()
+            with self.condition:
+                for worker in self.workers:
+                    if worker.connection is connection:
+                        worker.lost = True
+                self.condition.notify_all()
+
+    def drop_lost_workers(self, evaluation, queued_tasks):
+        # Tasks of lost workers go to the front of the queue, they are the oldest ones.
+        now = monotonic()
+        for worker in list(self.workers):
+            if worker.lost or now - worker.last_seen > self.heartbeat_timeout:
+                self.workers.remove(worker)
+                for key in sorted(worker.tasks, reverse=True):
+                    if key[0] == evaluation and key not in self.results:
+                        queued_tasks.appendleft(key[1])
+                        self.redispatched_tasks += 1
+                worker.close()
+
+    def assign_tasks(self, evaluation, queued_tasks):
+        # Tasks up to the free slots of every worker, sent by the caller once the condition is released.
+        assigned_tasks = []
+        for worker in self.workers:
+            while len(queued_tasks) > 0 and len(worker.tasks) < worker.slots:
+                task = queued_tasks.popleft()
+                if (evaluation, task) in self.results:
+                    continue
+
+                worker.tasks.add((evaluation, task))
+                assigned_tasks.append((worker, task))
+
+        return assigned_tasks
+
+    def evaluate(self, phenotypes, seeds):
+        topology = EvaluationService.get_topology(phenotypes[0])
+
+        with self.condition:
+            self.evaluation += 1
+            evaluation = self.evaluation
+            self.results = {}
+            self.errors = {}
+            processes = max(1, sum(worker.processes for worker in self.workers))
+
+        chunk_sizes = EvaluationService.get_chunk_sizes(len(phenotypes), processes, self.minimum_chunk_size)
+        messages = []
+        start = 0
+        for task, chunk_size in enumerate(chunk_sizes):
+            weights = [get_phenotype_weights(phenotype) for phenotype in phenotypes[start:start + chunk_size]]
+            header = {'type': TASK, 'evaluation': evaluation, 'task': task, 'topology': topology,
+                      'seeds': [int(seed) for seed in seeds[start:start + chunk_size]]}
+            messages.append(get_message(header, b''.join(row.astype('<f8').tobytes() for row in weights)))
+            start += chunk_size
+
+        queued_tasks = deque(range(len(chunk_sizes)))
+        last_worker_time = monotonic()
+        with self.condition:
+            try:
+                while any((evaluation, task) not in self.results for task in range(len(chunk_sizes))):
+                    if self.closed:
+                        raise RuntimeError('Coordinator was closed during evaluation')
+
+                    if len(self.errors) > 0:
+                        raise RuntimeError('Worker failed to solve games: {}'.format(next(iter(self.errors.values()))))
+
+                    self.drop_lost_workers(evaluation, queued_tasks)
+                    if len(self.workers) > 0:
+                        last_worker_time = monotonic()
+                    elif monotonic() - last_worker_time > self.worker_timeout:
+                        raise RuntimeError('No worker connected for {} seconds'.format(self.worker_timeout))
+
+                    # Tasks are sent without holding the condition, so heartbeats are not held up by big tasks.
+                    assigned_tasks = self.assign_tasks(evaluation, queued_tasks)
+                    if len(assigned_tasks) > 0:
+                        self.condition.release()
+                        try:
+                            self.send_tasks(assigned_tasks, messages)
+                        finally:
+                            self.condition.acquire()
+
+                        # Results may have arrived while sending.
+                        continue
+
+                    self.condition.wait(self.heartbeat_interval)
+
+                return [GameResult(*result) for task in range(len(chunk_sizes))
+                        for result in self.results[(evaluation, task)]]
+            finally:
+                self.results = {}
+                self.errors = {}
+
+                # Copies of redispatched tasks may still be solved, their slots are not waited for.
+                for worker in self.workers:
+                    worker.tasks.clear()
+
+    @staticmethod
+    def send_tasks(assigned_tasks, messages):
+        for worker, task in assigned_tasks:
+            if worker.lost:
+                continue
+
+            try:
+                worker.send(messages[task])
+            except OSError:
+                worker.lost = True
+
+
+def send_heartbeats(connection, send_lock, heartbeat_interval, stopped):
+    while not stopped.wait(heartbeat_interval):
+        try:
+            with send_lock:
+                connection.sendall(get_message({'type': HEARTBEAT}))
+        except OSError:
+            return
+
+
+def run_worker(address, processes=None, batch_evaluation=True, kernel_evaluation=False):
+    """Solves tasks of the coordinator at address until it closes the connection.
+
+    Tasks are solved by a pool of processes, or in this process when there is only one of them.
+    """
+    processes = processes or cpu_count()
+    connection = create_connection(address)
+    file = connection.makefile('rb')
+    send_lock = Lock()
+    stopped = Event()
+    pool = Pool(processes) if processes > 1 else None
+
+    def send_result(header, results=None, error=None):
+        result_header = {'type': RESULT, 'evaluation': header['evaluation'], 'task': header['task']}
+        if error is not None:
+            result_header['error'] = '{}: {}'.format(type(error).__name__, error)
+        else:
+            result_header['results'] = [tuple(result) for result in results]
+
+        message = get_message(result_header)
+        try:
+            with send_lock:
+                connection.sendall(message)
+        except OSError:
+            pass
+
+    try:
+        connection.sendall(get_message({'type': HELLO, 'processes': processes, 'slots': 2 * processes}))
+        message = read_file_message(file)
+        if message is None:
+            return
+
+        game_arguments = decode_game_arguments(message[0]['game_arguments'])
+        Thread(target=send_heartbeats, args=(connection, send_lock, message[0]['heartbeat_interval'], stopped),
+               daemon=True).start()
+
+        while True:
+            message = read_file_message(file)
+            if message is None:
+                break
+
+            header, body = message
+            seeds = header['seeds']
+            weights = frombuffer(body, dtype='<f8').astype(float64).reshape(len(seeds), -1)
+            arguments = (game_arguments, header['topology'], weights, seeds, batch_evaluation, kernel_evaluation)
+
+            # Failed tasks are answered with their error, the coordinator would wait for them otherwise.
+            if pool is None:
+                try:
+                    results = evaluate_request_games(*arguments)
+                except Exception as error:
+                    send_result(header, error=error)
+                else:
+                    send_result(header, results)
+            else:
+                pool.apply_async(evaluate_request_games, arguments,
+                                 callback=lambda results, header=header: send_result(header, results),
+                                 error_callback=lambda error, header=header: send_result(header, error=error))
+    except OSError:
+        pass
+    finally:
+        stopped.set()
+        if pool is not None:
+            pool.terminate()
+        file.close()
+        connection.close()
+
+
+class LocalCluster(Coordinator):
+    """Coordinator with worker nodes started as local processes, stands in for a cluster on one machine."""
+
+    def __init__(self, game_arguments, workers=2, processes_per_worker=1, batch_evaluation=True,
+                 kernel_evaluation=False, **coordinator_arguments):
+        super().__init__(game_arguments, **coordinator_arguments)
+        self.worker_processes = []
+        for index in range(workers):
+            self.start_worker(processes_per_worker, batch_evaluation, kernel_evaluation)
+
+    def start_worker(self, processes=1, batch_evaluation=True, kernel_evaluation=False):
+        # Worker nodes start pools of their own, so they can not be daemon processes.
+        worker_process = Process(target=run_worker, args=(self.address, processes, batch_evaluation,
+                                                          kernel_evaluation))
+        worker_process.start()
+        self.worker_processes.append(worker_process)
+        return worker_process
+
+    def close(self):
+        super().close()
+        for worker_process in self.worker_processes:
+            worker_process.join(5)
+            if worker_process.is_alive():
+                worker_process.terminate()
+                worker_process.join()
@@ -0,0 +1,225 @@
+from collections import deque, namedtuple
+
+from numpy import arange, argmax, array, clip, frombuffer, int8, uint8, where, zeros
+
+from engine.directions import AXES, DELTAS, TURNS
+from engine.game import Game
+
+# Cells of the padded obstacle grid
+FREE = 0
+BODY = 1
+WALL = 2
+
+# Ray directions: left, right, up, down, then up-left, up-right, down-left and down-right.
+RAY_DELTAS_X = array([-1, 1, 0, 0, -1, 1, -1, 1])
+RAY_DELTAS_Y = array([0, 0, -1, 1, -1, -1, 1, 1])
+
+# Cell offsets along the rays by board size, shared by games of the same board size.
+ray_offsets = {}
+
+
+def get_ray_offsets(width, height):
+    if (width, height) not in ray_offsets:
+        # Any ray hits the wall after at most max(width, height) steps.
+        steps = arange(1, max(width, height) + 1)
+        ray_offsets[(width, height)] = (RAY_DELTAS_X[:, None] * steps, RAY_DELTAS_Y[:, None] * steps)
+
+    return ray_offsets[(width, height)]
+
+
+class GameSensors:
+    """Values of one game step shared by feature groups, each computed on first use."""
+
+    def __init__(self, game):
+        self.game = game
+        self.head = game.get_snake_head_position()
+        self.direction_code = game.direction_code
+        self.cache = {}
+
+    def get_cached(self, name, compute):
+        if name not in self.cache:
+            self.cache[name] = compute()
+
+        return self.cache[name]
+
+    def get_obstacles(self):
+        return self.get_cached('obstacles', self.compute_obstacles)
+
+    def compute_obstacles(self):
+        # Board cells surrounded by walls, indexed by x + 1 and y + 1.
+        game = self.game
+        obstacles = zeros((game.width + 2, game.height + 2), dtype=int8)
+        obstacles[0, :] = obstacles[-1, :] = obstacles[:, 0] = obstacles[:, -1] = WALL
+
+        occupancy = frombuffer(game.occupancy, dtype=uint8).reshape(game.width, game.height)
+        obstacles[1:-1, 1:-1] = occupancy > 0
+
+        # Tail block moves away with the next step, unless another block covers it.
+        tail_x, tail_y = game.snake_blocks[-1]
+        if game.is_position_on_board((tail_x, tail_y)) and occupancy[tail_x, tail_y] == 1:
+            obstacles[tail_x + 1, tail_y + 1] = FREE
+
+        return obstacles
+
+    def get_action_targets(self):
+        return self.get_cached('action_targets', self.compute_action_targets)
+
+    def compute_action_targets(self):
+        # Cells the head moves to for every action, in the order of network outputs.
+        targets = []
+        for new_direction_code in TURNS[self.direction_code]:
+            moving_direction_code = new_direction_code
+            if AXES[self.direction_code] == AXES[new_direction_code]:
+                moving_direction_code = self.direction_code
+
+            delta_x, delta_y = DELTAS[moving_direction_code]
+            targets.append((self.head[0] + delta_x, self.head[1] + delta_y))
+
+        return targets
+
+    def get_reachable_cells(self, position):
+        labels, region_sizes = self.get_cached('regions', self.compute_regions)
+        return region_sizes[labels[(position[0] + 1) * (self.game.height + 2) + position[1] + 1]]
+
+    def compute_regions(self):
+        # Label of every padded cell by one search over the free cells, 0 for obstacles, with the size of each region.
+        free = (self.get_obstacles() == FREE).ravel().tolist()
+        row_length = self.game.height + 2
+        neighbour_offsets = (-row_length, row_length, -1, 1)
+        labels = [0] * len(free)
+        region_sizes = [0]
+
+        for start_cell, is_free in enumerate(free):
+            if not is_free or labels[start_cell]:
+                continue
+
+            # Walls around the board keep neighbours of free cells inside the grid.
+            label = len(region_sizes)
+            labels[start_cell] = label
+            queue = deque([start_cell])
+            number_of_cells = 0
+            while queue:
+                cell = queue.popleft()
+                number_of_cells += 1
+                for offset in neighbour_offsets:
+                    neighbour = cell + offset
+                    if free[neighbour] and not labels[neighbour]:
+                        labels[neighbour] = label
+                        queue.append(neighbour)
+
+            region_sizes.append(number_of_cells)
+
+        return labels, region_sizes
+
+
+def get_snack_direction_features(sensors):
+    # Snack on the left, right, top or bottom side, checked in this order like the feature based strategy.
+    head_x, head_y = sensors.head
+    snack_x, snack_y = sensors.game.snack
+
+    features = [0] * 4
+    if snack_x < head_x:
+        features[0] = 1
+    elif snack_x > head_x:
+        features[1] = 1
+    elif snack_y < head_y:
+        features[2] = 1
+    elif snack_y > head_y:
+        features[3] = 1
+
+    return features
+
+
+def get_direction_features(sensors):
+    features = [0] * 4
+    features[sensors.direction_code - 1] = 1
+    return features
+
+
+def get_danger_features(sensors):
+    # 1 when the action moves the head into a wall or the body, in the order of network outputs.
+    obstacles = sensors.get_obstacles()
+    return [int(obstacles[x + 1, y + 1] != FREE) for x, y in sensors.get_action_targets()]
+
+
+def get_ray_features(sensors):
+    # Inverse distances to the wall and to the body (0 if not visible) along 8 rays from the head.
+    obstacles = sensors.get_obstacles()
+    width, height = sensors.game.width, sensors.game.height
+    offsets_x, offsets_y = get_ray_offsets(width, height)
+
+    # Rays leaving the board are clipped to the surrounding wall.
+    xs = clip(sensors.head[0] + 1 + offsets_x, 0, width + 1)
+    ys = clip(sensors.head[1] + 1 + offsets_y, 0, height + 1)
+    cells = obstacles[xs, ys]
+
+    walls = cells == WALL
+    bodies = cells == BODY
+    wall_features = 1 / (argmax(walls, axis=1) + 1)
+    body_features = where(bodies.any(axis=1), 1 / (argmax(bodies, axis=1) + 1), 0)
+
+    return list(wall_features) + list(body_features)
+
+
+def get_flood_fill_features(sensors):
+    # Share of the board reachable after each action, 0 if the action ends the game.
+    number_of_cells = sensors.game.width * sensors.game.height
+    return [sensors.get_reachable_cells(target) / number_of_cells for target in sensors.get_action_targets()]
+
+
+# Feature group is a number of features and a function computing them from GameSensors.
+FeatureGroup = namedtuple('FeatureGroup', ['width', 'extractor'])
+
+FEATURE_GROUPS = {}
+
+
+def register_feature_group(name, width, extractor):
+    FEATURE_GROUPS[name] = FeatureGroup(width, extractor)
+
+
+register_feature_group('snack_direction', 4, get_snack_direction_features)
+register_feature_group('direction', 4, get_direction_features)
+register_feature_group('danger', 3, get_danger_features)
+register_feature_group('rays', 16, get_ray_features)
+# Slowest group, a region is grown one cell per pass, so it is not used by default.
+register_feature_group('flood_fill', 3, get_flood_fill_features)
+
+DEFAULT_FEATURE_GROUPS = ('snack_direction', 'danger', 'direction')
+
+
+class FeatureBasedRepresentation:
+    """Game representation strategy concatenating features of registered groups in the given order.
+
+    Groups of one step share a GameSensors instance, so values used by several of them (obstacle grid, cells the
+    actions lead to, reachable regions) are computed once. Number of features is available as input_nodes.
+    """
+
+    def __init__(self, group_names=DEFAULT_FEATURE_GROUPS):
+        self.group_names = tuple(group_names)
+        self.groups = [FEATURE_GROUPS[name] for name in self.group_names]
+        self.input_nodes = sum(group.width for group in self.groups)
+
+    def __repr__(self):
+        # Stable between processes, fitness cache keys depend on it.
+        return 'FeatureBasedRepresentation({!r})'.format(self.group_names)
+
+    def __call__(self, game):
+        sensors = GameSensors(game)
+        features = zeros(self.input_nodes)
+
+        offset = 0
+        for group in self.groups:
+            features[offset:offset + group.width] = group.extractor(sensors)
+            offset += group.width
+
+        return features
+
+
+def get_input_nodes(game_representation_strategy, width, height):
+    if game_representation_strategy == Game.get_full_game_representation_strategy:
+        return width * height + 4
+
+    if game_representation_strategy == Game.get_feature_based_game_representation_strategy:
+        return 8
+
+    return game_representation_strategy.input_nodes
@@ -1,11 +1,14 @@
+from collections import deque, namedtuple
 from copy import deepcopy
 from enum import Enum
-from itertools import product
 from math import ceil, sqrt, pow
 from random import Random
 
 from femos.phenotypes import Phenotype
-from numpy import argmax
+from numpy import argmax, int8, zeros
+
+from engine.cells import FreeCellPool, SnackPlacement
+from engine.directions import AXES, DELTAS, LEFT, TURNS
 
 
 class GameStatus(Enum):
@@ -14,6 +17,16 @@ class GameStatus(Enum):
     ENDED = 3
 
 
+class GameEndReason(Enum):
+    MAX_POINTS_THRESHOLD = 1
+    MIN_POINTS_THRESHOLD = 2
+    COLLISION = 3
+    BOARD_FILLED = 4
+    STEP_LIMIT = 5
+    STAGNATION = 6
+    CYCLE = 7
+
+
 class Direction(Enum):
     LEFT = 1
     RIGHT = 2
@@ -27,11 +40,45 @@ class Prediction(Enum):
     KEEP_DIRECTION = 3
 
 
+# Direction enums by direction code, the game itself works on codes.
+DIRECTIONS = (None, Direction.LEFT, Direction.RIGHT, Direction.UP, Direction.DOWN)
+
+# Compact outcome of a solved game, end_reason is a GameEndReason value.
+GameResult = namedtuple('GameResult', ['score', 'steps', 'length', 'end_reason', 'seed'])
+
+# Step of a game as seen by iter_episode(), positions are tuples shared with the game and never copied. Reward is the
+# change of the score by the step, the last event of an episode has ended set, no action and no reward.
+StepEvent = namedtuple('StepEvent', ['step', 'action', 'head', 'snack', 'reward', 'ended', 'end_reason'])
+
+# Random keys of board cells used to hash snake bodies (Zobrist hashing), shared by games of the same board size. Every
+# cell has a key per link code, so the hash depends on the order of the blocks and not only on the occupied cells.
+cell_keys = {}
+
+# Link code of a snake block by the offset of the block ahead of it, 0 for the head and for non adjacent blocks.
+LINK_CODES = {delta: code for code, delta in enumerate(DELTAS)}
+
+
+def get_cell_keys(number_of_cells):
+    if number_of_cells not in cell_keys:
+        random_generator = Random(number_of_cells)
+        cell_keys[number_of_cells] = [random_generator.getrandbits(64) for key in range(number_of_cells * len(DELTAS))]
+
+    return cell_keys[number_of_cells]
+
+
 class Game:
+    __slots__ = ['width', 'height', 'phenotype', 'seed', 'random_generator', 'game_representation_strategy',
+                 'snack_perspective', 'snack_eaten_points', 'moved_toward_snack_points', 'moved_away_from_snack_points',
+                 'max_points_threshold', 'min_points_threshold', 'snack_placement', 'status', 'end_reason', 'steps',
+                 'snake_blocks', 'occupancy', 'free_cells', 'board', 'snack_position', 'direction_code', 'score',
+                 'last_snack_distance', 'max_steps', 'max_steps_without_snack', 'detect_cycles', 'steps_since_snack',
+                 'cell_keys', 'body_hash', 'visited_states', 'stats', 'last_action']
 
     def __init__(self, width, height, phenotype, seed, game_representation_strategy,
                  snake_length=5, snack_eaten_points=1, moved_toward_snack_points=0.1,
-                 moved_away_from_snack_points=-0.2, max_points_threshold=200, min_points_threshold=-10):
+                 moved_away_from_snack_points=-0.2, max_points_threshold=200, min_points_threshold=-10,
+                 snack_placement=SnackPlacement.COMPATIBLE, max_steps=None, max_steps_without_snack=None,
+                 detect_cycles=False, stats=None):
         self.width = width
         self.height = height
         self.phenotype = phenotype
@@ -44,234 +91,330 @@ class Game:
         self.moved_away_from_snack_points = moved_away_from_snack_points
         self.max_points_threshold = max_points_threshold
         self.min_points_threshold = min_points_threshold
+        self.snack_placement = snack_placement
+        self.max_steps = max_steps
+        self.max_steps_without_snack = max_steps_without_snack
+        self.detect_cycles = detect_cycles
+        # Optional GameStats, games without them skip all instrumentation.
+        self.stats = stats
 
         self.status = GameStatus.INITIALIZED
-        self.snack = None
-        self.snake = []
+        self.end_reason = None
+        # Action code of the last step, see engine.directions.
+        self.last_action = None
+        self.steps = 0
+        self.steps_since_snack = 0
+        # States seen since the last snack, repeating one of them means the snake is looping forever.
+        self.cell_keys = get_cell_keys(width * height) if detect_cycles else None
+        self.body_hash = 0
+        self.visited_states = set()
+        self.snake_blocks = deque()
+        # Number of snake blocks covering each cell, cells are ordered like product(range(width), range(height)).
+        self.occupancy = bytearray(width * height)
+        self.free_cells = FreeCellPool(width * height, snack_placement == SnackPlacement.COMPATIBLE)
+        # Full game representation kept up to date by every move, see get_full_game_representation_strategy.
+        self.board = zeros(width * height + 4, dtype=int8)
+        self.snack_position = None
+        self.direction_code = None
         self.score = 0
-        self.direction = Direction.LEFT
+        self.set_direction_code(LEFT)
         self.last_snack_distance = 0
 
         self.initialize_snake(snake_length)
         self.initialize_snack()
         self.initialize_last_snack_distance()
 
+    @property
+    def snake(self):
+        return list(self.snake_blocks)
+
+    @snake.setter
+    def snake(self, snake_blocks):
+        self.snake_blocks = deque()
+        self.occupancy = bytearray(self.width * self.height)
+        self.free_cells = FreeCellPool(self.width * self.height, self.snack_placement == SnackPlacement.COMPATIBLE)
+        self.board[:self.width * self.height] = 0
+        self.body_hash = 0
+
+        for snake_block in snake_blocks:
+            self.append_snake_block(snake_block)
+
+        self.snack = self.snack_position
+
+    @property
+    def snack(self):
+        return self.snack_position
+
+    @snack.setter
+    def snack(self, snack_position):
+        if self.snack_position is not None and self.is_position_on_board(self.snack_position):
+            cell = self.get_cell(self.snack_position)
+            self.board[cell] = 1 if self.occupancy[cell] > 0 else 0
+
+        self.snack_position = snack_position
+
+        if snack_position is not None and self.is_position_on_board(snack_position):
+            cell = self.get_cell(snack_position)
+            self.board[cell] = 1 if self.occupancy[cell] > 0 else -1
+
+    @property
+    def direction(self):
+        return DIRECTIONS[self.direction_code]
+
+    @direction.setter
+    def direction(self, direction):
+        self.set_direction_code(direction.value)
+
+    def set_direction_code(self, direction_code):
+        direction_offset = self.width * self.height
+        if self.direction_code is not None:
+            self.board[direction_offset + self.direction_code - 1] = 0
+
+        self.direction_code = direction_code
+        self.board[direction_offset + direction_code - 1] = 1
+
     def initialize_snake(self, snake_length=5):
         middle_x = ceil(self.width / 2)
         middle_y = ceil(self.height / 2)
 
         for index in range(snake_length):
-            self.snake.append((middle_x + index, middle_y))
+            self.append_snake_block((middle_x + index, middle_y))
 
         self.snack_perspective = (middle_x + snake_length, middle_y)
 
     def initialize_snack(self):
-        x_range = range(self.width)
-        y_range = range(self.height)
+        # Board is full, there is no place left for a snack.
+        if len(self.free_cells) == 0:
+            return False
 
-        positions = product(x_range, y_range)
-        available_positions = list(
-            filter(lambda position: position not in self.snake, positions))
-        self.snack = self.random_generator.choice(available_positions)
+        snack_cell = self.free_cells.get_random_cell(self.random_generator)
+        self.snack = divmod(snack_cell, self.height)
+        return True
 
     def initialize_last_snack_distance(self):
         snake_head_position = self.get_snake_head_position()
         self.last_snack_distance = self.get_snake_snacks_distances(snake_head_position, self.snack)
 
-    def get_snake_head_position(self):
-        return self.snake[0]
+    def snapshot(self):
+        # Phenotype and cell keys are never mutated by the game and stats are collected across games, so snapshots
+        # share them instead of copying.
+        memo = {id(self.phenotype): self.phenotype, id(self.cell_keys): self.cell_keys, id(self.stats): self.stats}
+        return deepcopy(self, memo)
 
-    @staticmethod
-    def get_snake_snacks_distances(snake_head_position, snack_position):
-        coefficient1 = pow(snake_head_position[0] - snack_position[0], 2)
-        coefficient2 = pow(snake_head_position[1] - snack_position[1], 2)
-        return sqrt(coefficient1 + coefficient2)
+    def is_position_on_board(self, position):
+        return 0 <= position[0] < self.width and 0 <= position[1] < self.height
 
-    def move_forward(self, new_direction):
-        head_position = self.get_snake_head_position()
+    def get_cell(self, position):
+        return position[0] * self.height + position[1]
 
-        new_head_position = None
-        new_tail = self.snake[:-1]
-        new_snack_perspective_position = self.snake[-1]
+    def is_position_occupied(self, position):
+        return self.is_position_on_board(position) and self.occupancy[self.get_cell(position)] > 0
 
-        # Handle inadequate move. As result snake is moving in the same direction.
-        if self.direction == Direction.LEFT and (new_direction == Direction.LEFT or new_direction == Direction.RIGHT):
-            new_head_position = (head_position[0] - 1, head_position[1])
+    def occupy_position(self, position):
+        if self.is_position_on_board(position):
+            cell = self.get_cell(position)
+            if self.occupancy[cell] == 0:
+                self.free_cells.remove(cell)
+                self.board[cell] = 1
 
-        if self.direction == Direction.RIGHT and (new_direction == Direction.LEFT or new_direction == Direction.RIGHT):
-            new_head_position = (head_position[0] + 1, head_position[1])
+            self.occupancy[cell] += 1
 
-        if self.direction == Direction.UP and (new_direction == Direction.UP or new_direction == Direction.DOWN):
-            new_head_position = (head_position[0], head_position[1] - 1)
+    def release_position(self, position):
+        if self.is_position_on_board(position):
+            cell = self.get_cell(position)
+            self.occupancy[cell] -= 1
 
-        if self.direction == Direction.DOWN and (new_direction == Direction.UP or new_direction == Direction.DOWN):
-            new_head_position = (head_position[0], head_position[1] + 1)
+            if self.occupancy[cell] == 0:
+                self.free_cells.add(cell)
+                self.board[cell] = -1 if position == self.snack_position else 0
 
-        # Handle real direction changes.
-        if (self.direction == Direction.LEFT or self.direction == Direction.RIGHT) and new_direction == Direction.UP:
-            new_head_position = (head_position[0], head_position[1] - 1)
+    def hash_snake_block(self, snake_block, next_snake_block):
+        if self.cell_keys is not None and self.is_position_on_board(snake_block):
+            link_code = 0
+            if next_snake_block is not None:
+                delta = (next_snake_block[0] - snake_block[0], next_snake_block[1] - snake_block[1])
+                link_code = LINK_CODES.get(delta, 0)
 
-        if (self.direction == Direction.LEFT or self.direction == Direction.RIGHT) and new_direction == Direction.DOWN:
-            new_head_position = (head_position[0], head_position[1] + 1)
+            self.body_hash ^= self.cell_keys[self.get_cell(snake_block) * len(DELTAS) + link_code]
 
-        if (self.direction == Direction.UP or self.direction == Direction.DOWN) and new_direction == Direction.LEFT:
-            new_head_position = (head_position[0] - 1, head_position[1])
+    def push_snake_head(self, snake_block):
+        if self.snake_blocks:
+            # Former head gets linked to the new head.
+            self.hash_snake_block(self.snake_blocks[0], None)
+            self.hash_snake_block(self.snake_blocks[0], snake_block)
 
-        if (self.direction == Direction.UP or self.direction == Direction.DOWN) and new_direction == Direction.RIGHT:
-            new_head_position = (head_position[0] + 1, head_position[1])
+        self.snake_blocks.appendleft(snake_block)
+        self.occupy_position(snake_block)
+        self.hash_snake_block(snake_block, None)
 
-        self.snake = [new_head_position] + new_tail
-        self.snack_perspective = new_snack_perspective_position
+    def append_snake_block(self, snake_block):
+        self.hash_snake_block(snake_block, self.snake_blocks[-1] if self.snake_blocks else None)
+        self.snake_blocks.append(snake_block)
+        self.occupy_position(snake_block)
+
+    def pop_snake_tail(self):
+        snake_block = self.snake_blocks.pop()
+        self.release_position(snake_block)
+        self.hash_snake_block(snake_block, self.snake_blocks[-1] if self.snake_blocks else None)
+
+        return snake_block
+
+    def get_snake_head_position(self):
+        return self.snake_blocks[0]
 
     @staticmethod
-    def get_full_game_representation_strategy(game):
-        range_x = range(game.width)
-        range_y = range(game.height)
+    def get_snake_snacks_distances(snake_head_position, snack_position):
+        coefficient1 = pow(snake_head_position[0] - snack_position[0], 2)
+        coefficient2 = pow(snake_head_position[1] - snack_position[1], 2)
+        return sqrt(coefficient1 + coefficient2)
 
-        positions = list(product(range_x, range_y))
+    def move_forward(self, new_direction):
+        self.move_forward_by_code(new_direction.value)
 
-        game_representation = []
+    def move_forward_by_code(self, new_direction_code):
+        head_x, head_y = self.get_snake_head_position()
 
-        # Encode game board
-        for selected_position in positions:
+        # Handle inadequate move. As result snake is moving in the same direction.
+        moving_direction_code = new_direction_code
+        if AXES[self.direction_code] == AXES[new_direction_code]:
+            moving_direction_code = self.direction_code
 
-            if selected_position in game.snake:
-                game_representation.append(1)
-            elif selected_position == game.snack:
-                game_representation.append(-1)
-            else:
-                game_representation.append(0)
+        delta_x, delta_y = DELTAS[moving_direction_code]
 
-        # Encode current direction
-        if game.direction == Direction.LEFT:
-            game_representation += [1, 0, 0, 0]
-        elif game.direction == Direction.RIGHT:
-            game_representation += [0, 1, 0, 0]
-        elif game.direction == Direction.UP:
-            game_representation += [0, 0, 1, 0]
-        else:
-            game_representation += [0, 0, 0, 1]
+        self.snack_perspective = self.pop_snake_tail()
+        self.push_snake_head((head_x + delta_x, head_y + delta_y))
 
-        return game_representation
+    @staticmethod
+    def get_full_game_representation_strategy(game):
+        # Board cells are 1 for snake, -1 for snack and 0 otherwise, followed by one-hot encoded direction
+        # (LEFT, RIGHT, UP, DOWN). Returned array is the game's own buffer and changes with the next move.
+        return game.board
 
     @staticmethod
     def get_feature_based_game_representation_strategy(game):
         snake_head_position = game.get_snake_head_position()
-        snack_position = game.snack
+        snack = game.snack
 
         snack_position = [0] * 4
         # Snack is on left side of the game board
-        if snack_position[0] < snake_head_position[0]:
+        if snack[0] < snake_head_position[0]:
             snack_position[0] = 1
 
         # Snack is on right side of the game board
-        elif snack_position[0] > snake_head_position[0]:
+        elif snack[0] > snake_head_position[0]:
             snack_position[1] = 1
 
         # Snack is on top side of the game board
-        elif snack_position[1] < snake_head_position[1]:
+        elif snack[1] < snake_head_position[1]:
             snack_position[2] = 1
 
         # Snack is on bottom side of the game board
-        elif snack_position[1] > snake_head_position[1]:
+        elif snack[1] > snake_head_position[1]:
             snack_position[3] = 1
 
-        # Encode collision with walls
+        # Collisions and free space are encoded by the sensor groups of engine.features.
 
         # Encode current direction
-        current_direction = []
-        if game.direction == Direction.LEFT:
-            current_direction = [1, 0, 0, 0]
-        elif game.direction == Direction.RIGHT:
-            current_direction = [0, 1, 0, 0]
-        elif game.direction == Direction.UP:
-            current_direction = [0, 0, 1, 0]
-        else:
-            current_direction = [0, 0, 0, 1]
+        current_direction = [0] * 4
+        current_direction[game.direction_code - 1] = 1
 
         return snack_position + current_direction
 
     @staticmethod
     def get_new_direction_from_prediction(prediction, current_direction):
-        best_decision = argmax(prediction)
+        return DIRECTIONS[Game.get_new_direction_code_from_prediction(prediction, current_direction.value)]
 
-        if best_decision == 0:
-            parsed_prediction = Prediction.ROTATE_RIGHT
-        elif best_decision == 1:
-            parsed_prediction = Prediction.ROTATE_LEFT
-        else:
-            parsed_prediction = Prediction.KEEP_DIRECTION
-
-        # Handle new direction while parsed_prediction is "KEEP DIRECTION".
-        if parsed_prediction == Prediction.KEEP_DIRECTION and current_direction == Direction.LEFT:
-            return Direction.LEFT
-
-        if parsed_prediction == Prediction.KEEP_DIRECTION and current_direction == Direction.RIGHT:
-            return Direction.RIGHT
-
-        if parsed_prediction == Prediction.KEEP_DIRECTION and current_direction == Direction.UP:
-            return Direction.UP
+    @staticmethod
+    def get_new_direction_code_from_prediction(prediction, direction_code):
+        return TURNS[direction_code][Game.get_action_from_prediction(prediction)]
 
-        if parsed_prediction == Prediction.KEEP_DIRECTION and current_direction == Direction.DOWN:
-            return Direction.DOWN
+    @staticmethod
+    def get_action_from_prediction(prediction):
+        # Network outputs are ordered like the actions: rotate right, rotate left and keep direction.
+        return int(argmax(prediction))
 
-        # Handle new direction while parsed_prediction is "ROTATE LEFT"
-        if parsed_prediction == Prediction.ROTATE_LEFT and current_direction == Direction.LEFT:
-            return Direction.DOWN
+    def is_snake_head_in_wall(self, snake_head_position):
+        if not self.is_position_on_board(snake_head_position):
+            return True
 
-        if parsed_prediction == Prediction.ROTATE_LEFT and current_direction == Direction.RIGHT:
-            return Direction.UP
+        # Head block itself is not a collision, any other block on the same cell is.
+        number_of_blocks = self.occupancy[self.get_cell(snake_head_position)]
+        if snake_head_position == self.get_snake_head_position():
+            number_of_blocks -= 1
 
-        if parsed_prediction == Prediction.ROTATE_LEFT and current_direction == Direction.UP:
-            return Direction.LEFT
+        return number_of_blocks > 0
 
-        if parsed_prediction == Prediction.ROTATE_LEFT and current_direction == Direction.DOWN:
-            return Direction.RIGHT
+    def is_state_repeated(self):
+        state = (self.get_snake_head_position(), self.direction_code, self.snack_position, self.body_hash,
+                 len(self.snake_blocks))
 
-        # Handle new direction while parsed_prediction is "ROTATE RIGHT"
-        if parsed_prediction == Prediction.ROTATE_RIGHT and current_direction == Direction.LEFT:
-            return Direction.UP
+        if state in self.visited_states:
+            return True
 
-        if parsed_prediction == Prediction.ROTATE_RIGHT and current_direction == Direction.RIGHT:
-            return Direction.DOWN
+        self.visited_states.add(state)
+        return False
 
-        if parsed_prediction == Prediction.ROTATE_RIGHT and current_direction == Direction.UP:
-            return Direction.RIGHT
+    def end(self, end_reason):
+        self.status = GameStatus.ENDED
+        self.end_reason = end_reason
 
-        if parsed_prediction == Prediction.ROTATE_RIGHT and current_direction == Direction.DOWN:
-            return Direction.DOWN
+        if self.stats is not None:
+            self.stats.lap('rules')
+            self.stats.add_episode(self.steps, end_reason)
 
-    def is_snake_head_in_wall(self, snake_head_position):
-        if snake_head_position[0] < 0 or snake_head_position[0] >= self.width or snake_head_position[1] < 0 or \
-                snake_head_position[1] >= self.height:
-            return True
-        elif snake_head_position in self.snake[1:]:
-            return True
-        else:
-            return False
+        return self
 
     def is_snake_eating_snack(self, snake_head_position):
         return snake_head_position == self.snack
 
+    # Game is advanced in place, take a snapshot() of it to keep the previous state. Given action code is taken instead
+    # of asking the phenotype, e.g. to replay a recorded game.
     @staticmethod
-    def get_next_game(game):
+    def get_next_game(game, action=None):
+        stats = game.stats
+        if stats is not None:
+            stats.start()
+
         snake_head_position = game.get_snake_head_position()
 
-        if game.score >= game.max_points_threshold or game.score <= game.min_points_threshold:
-            game.status = GameStatus.ENDED
-            return game
+        if game.score >= game.max_points_threshold:
+            return game.end(GameEndReason.MAX_POINTS_THRESHOLD)
+
+        if game.score <= game.min_points_threshold:
+            return game.end(GameEndReason.MIN_POINTS_THRESHOLD)
 
         if game.is_snake_head_in_wall(snake_head_position):
-            game.status = GameStatus.ENDED
-            return game
+            return game.end(GameEndReason.COLLISION)
+
+        # Handle runaway games
+        if game.max_steps is not None and game.steps >= game.max_steps:
+            return game.end(GameEndReason.STEP_LIMIT)
+
+        if game.max_steps_without_snack is not None and game.steps_since_snack >= game.max_steps_without_snack:
+            return game.end(GameEndReason.STAGNATION)
+
+        if game.detect_cycles and game.is_state_repeated():
+            return game.end(GameEndReason.CYCLE)
 
         # Handle snake eating snack points
         new_snack_distance = Game.get_snake_snacks_distances(snake_head_position, game.snack)
         if game.is_snake_eating_snack(snake_head_position):
             game.score += game.snack_eaten_points
-            game.initialize_snack()
 
-            game.snake.append(game.snack_perspective)
+            if stats is not None:
+                stats.lap('rules')
+                stats.count('snacks')
+
+            # Snake filling the whole board has nowhere left to grow.
+            if not game.initialize_snack():
+                return game.end(GameEndReason.BOARD_FILLED)
+
+            if stats is not None:
+                stats.lap('snack')
+            game.steps_since_snack = 0
+            game.visited_states.clear()
+
+            game.append_snake_block(game.snack_perspective)
         else:
             # Handle snake approach nearest snack
             if new_snack_distance < game.last_snack_distance:
@@ -281,23 +424,66 @@ class Game:
 
         game.last_snack_distance = new_snack_distance
 
+        if stats is not None:
+            stats.lap('rules')
+
         # Make decision
-        game_state_representation = game.game_representation_strategy(game)
-        prediction = Phenotype.get_prediction(game.phenotype, game_state_representation)
-        new_direction = game.get_new_direction_from_prediction(prediction, game.direction)
+        if action is None:
+            game_state_representation = game.game_representation_strategy(game)
+
+            if stats is not None:
+                stats.lap('representation')
+
+            prediction = Phenotype.get_prediction(game.phenotype, game_state_representation)
+
+            if stats is not None:
+                stats.lap('prediction')
+
+            action = Game.get_action_from_prediction(prediction)
+
+        new_direction_code = TURNS[game.direction_code][action]
+        game.last_action = action
 
         # Move forward
-        game.move_forward(new_direction)
+        game.move_forward_by_code(new_direction_code)
 
         # Update current direction
-        game.direction = new_direction
+        game.set_direction_code(new_direction_code)
+        game.steps += 1
+        game.steps_since_snack += 1
+
+        if stats is not None:
+            stats.lap('move')
+            stats.count('steps')
+
+        return game
+
+    # Plays the game in place and yields a StepEvent after every step, given actions replace the phenotype while left.
+    def iter_episode(self, actions=None):
+        actions = iter(actions) if actions is not None else None
+
+        while self.status != GameStatus.ENDED:
+            score = self.score
+            Game.get_next_game(self, next(actions, None) if actions is not None else None)
 
-        return deepcopy(game)
+            if self.status == GameStatus.ENDED:
+                yield StepEvent(self.steps, None, self.snake_blocks[0], self.snack_position, 0, True, self.end_reason)
+            else:
+                yield StepEvent(self.steps, self.last_action, self.snake_blocks[0], self.snack_position,
+                                self.score - score, False, None)
 
     @staticmethod
     def get_solved_game(game):
-        tmp_game = game
-        while tmp_game.status != GameStatus.ENDED:
-            tmp_game = Game.get_next_game(tmp_game)
+        while game.status != GameStatus.ENDED:
+            Game.get_next_game(game)
+
+        return game
 
-        return tmp_game
+    @staticmethod
+    def get_game_result(game):
+        end_reason = game.end_reason.value if game.end_reason is not None else None
+        return GameResult(game.score, game.steps, len(game.snake_blocks), end_reason, game.seed)
+
+    @staticmethod
+    def get_solved_game_result(game):
+        return Game.get_game_result(Game.get_solved_game(game))
@@ -0,0 +1,82 @@
+from numpy import arange, full, matmul, stack, tanh, zeros
+
+
+class PhenotypeStack:
+    """Weights of phenotypes sharing one topology, stacked into (phenotypes, inputs, outputs) tensors.
+
+    Row `rows[index]` of every layer tensor holds the weights of the phenotype at position `index` of the list
+    the stack was built from. Bias layers of phenotypes using bias are stacked into (phenotypes, 1, outputs) tensors
+    the same way. Rows of finished games are dropped by compact().
+    """
+
+    def __init__(self, phenotypes):
+        self.input_nodes = phenotypes[0].input_nodes
+        self.hidden_layers_nodes = phenotypes[0].hidden_layers_nodes
+        self.output_nodes = phenotypes[0].output_nodes
+        self.use_bias = phenotypes[0].use_bias
+
+        number_of_layers = len(self.hidden_layers_nodes) + 1
+        self.layers = [stack([phenotype.layers[index] for phenotype in phenotypes]) for index in
+                       range(number_of_layers)]
+        self.bias_layers = [stack([phenotype.bias_layers[index] for phenotype in phenotypes]) for index in
+                            range(number_of_layers)] if self.use_bias else []
+
+        self.rows = arange(len(phenotypes))
+
+    def compact(self, indices):
+        selected_rows = self.rows[indices]
+        self.layers = [layer[selected_rows] for layer in self.layers]
+        self.bias_layers = [bias_layer[selected_rows] for bias_layer in self.bias_layers]
+
+        self.rows = full(len(self.rows), -1)
+        self.rows[indices] = arange(len(indices))
+
+    @staticmethod
+    def get_topology(phenotype):
+        return phenotype.input_nodes, tuple(phenotype.hidden_layers_nodes), phenotype.output_nodes, phenotype.use_bias
+
+    @staticmethod
+    def get_phenotype_stacks(phenotypes):
+        grouped_indices = {}
+        for index, phenotype in enumerate(phenotypes):
+            topology = PhenotypeStack.get_topology(phenotype)
+            grouped_indices.setdefault(topology, []).append(index)
+
+        phenotype_stacks = []
+        for indices in grouped_indices.values():
+            phenotype_stack = PhenotypeStack([phenotypes[index] for index in indices])
+            phenotype_stacks.append((arange(len(phenotypes))[indices], phenotype_stack))
+
+        return phenotype_stacks
+
+    @staticmethod
+    def get_stacked_predictions(phenotype_stack, input_values, activation_function=tanh):
+        result = input_values[:, None, :]
+        if phenotype_stack.use_bias:
+            for layer, bias_layer in zip(phenotype_stack.layers, phenotype_stack.bias_layers):
+                result = activation_function(matmul(result, layer) + bias_layer)
+        else:
+            for layer in phenotype_stack.layers:
+                result = activation_function(matmul(result, layer))
+
+        return result[:, 0, :]
+
+    @staticmethod
+    def get_predictions(phenotype_stack, indices, input_values, activation_function=tanh):
+        """Evaluates phenotypes at `indices` (positions in the list the stack was built from) in one pass.
+
+        While at least half of the stacked rows are requested, all of them are evaluated and idle rows get zero
+        input, so weights are never copied. Below that the stack is compacted to the requested rows.
+        """
+        number_of_rows = phenotype_stack.layers[0].shape[0]
+        if len(indices) * 2 < number_of_rows:
+            phenotype_stack.compact(indices)
+            number_of_rows = len(indices)
+
+        rows = phenotype_stack.rows[indices]
+        stacked_input_values = zeros((number_of_rows, input_values.shape[1]))
+        stacked_input_values[rows] = input_values
+
+        predictions = PhenotypeStack.get_stacked_predictions(phenotype_stack, stacked_input_values,
+                                                             activation_function)
+        return predictions[rows]
@@ -0,0 +1,357 @@
+from math import ceil, sqrt, tanh
+from random import Random
+
+from numpy import concatenate, flatnonzero, float64, int64, zeros
+
+from engine.cells import SnackPlacement
+from engine.directions import AXIS_TABLE, DELTA_X_TABLE, DELTA_Y_TABLE, LEFT, TURN_TABLE
+from engine.game import Game, GameEndReason, GameResult
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Episodes are only worth running through the kernel when it is compiled, see get_solved_game_result.
+JIT_AVAILABLE = njit is not None
+
+# Slots of the integer state array of a kernel game.
+HEAD_INDEX = 0
+LENGTH = 1
+DIRECTION = 2
+SNACK_X = 3
+SNACK_Y = 4
+SNACK_PERSPECTIVE_X = 5
+SNACK_PERSPECTIVE_Y = 6
+STEPS = 7
+STEPS_SINCE_SNACK = 8
+# GameEndReason value of an ended game, 0 while the game is running.
+END_REASON = 9
+NUMBER_OF_STATE_SLOTS = 10
+
+# Slots of the float state array of a kernel game.
+SCORE = 0
+LAST_SNACK_DISTANCE = 1
+
+# Game representations supported by the kernel.
+FULL_REPRESENTATION = 1
+FEATURE_BASED_REPRESENTATION = 2
+
+KERNEL_GAME_REPRESENTATION_STRATEGIES = {
+    Game.get_full_game_representation_strategy: FULL_REPRESENTATION,
+    Game.get_feature_based_game_representation_strategy: FEATURE_BASED_REPRESENTATION,
+}
+
+# GameEndReason values, the compiled kernel works on plain integers.
+MAX_POINTS_THRESHOLD = GameEndReason.MAX_POINTS_THRESHOLD.value
+MIN_POINTS_THRESHOLD = GameEndReason.MIN_POINTS_THRESHOLD.value
+COLLISION = GameEndReason.COLLISION.value
+STEP_LIMIT = GameEndReason.STEP_LIMIT.value
+STAGNATION = GameEndReason.STAGNATION.value
+
+# Reasons for the kernel to return control.
+GAME_ENDED = 0
+SNACK_EATEN = 1
+
+
+def jit(function):
+    if njit is None:
+        return function
+
+    return njit(cache=True, nogil=True)(function)
+
+
+def advance_episode(state, points, snake_x, snake_y, occupancy, weights, biases, layer_nodes, activations, width,
+                    height, representation, snack_eaten_points, moved_toward_snack_points,
+                    moved_away_from_snack_points, max_points_threshold, min_points_threshold, max_steps,
+                    max_steps_without_snack, snack_eaten):
+    """Plays the game of Game.get_next_game until it ends or the snake eats a snack.
+
+    A new snack is drawn from the game's random generator outside of the kernel, the kernel is then called again
+    with snack_eaten set to finish the interrupted step. Negative step limits are disabled.
+    """
+    capacity = snake_x.shape[0]
+    number_of_cells = width * height
+
+    while True:
+        if snack_eaten:
+            # Grow the snake by the block released with the last move, the head is at the eaten snack.
+            tail_index = (state[HEAD_INDEX] + state[LENGTH]) % capacity
+            x = state[SNACK_PERSPECTIVE_X]
+            y = state[SNACK_PERSPECTIVE_Y]
+            snake_x[tail_index] = x
+            snake_y[tail_index] = y
+            state[LENGTH] += 1
+            if 0 <= x < width and 0 <= y < height:
+                occupancy[x * height + y] += 1
+
+            points[LAST_SNACK_DISTANCE] = 0.0
+            snack_eaten = False
+        else:
+            head_x = snake_x[state[HEAD_INDEX]]
+            head_y = snake_y[state[HEAD_INDEX]]
+
+            if points[SCORE] >= max_points_threshold:
+                state[END_REASON] = MAX_POINTS_THRESHOLD
+                return GAME_ENDED
+
+            if points[SCORE] <= min_points_threshold:
+                state[END_REASON] = MIN_POINTS_THRESHOLD
+                return GAME_ENDED
+
+            # Head block itself is counted in occupancy, any other block on the same cell is a collision.
+            if not (0 <= head_x < width and 0 <= head_y < height) or occupancy[head_x * height + head_y] > 1:
+                state[END_REASON] = COLLISION
+                return GAME_ENDED
+
+            if 0 <= max_steps <= state[STEPS]:
+                state[END_REASON] = STEP_LIMIT
+                return GAME_ENDED
+
+            if 0 <= max_steps_without_snack <= state[STEPS_SINCE_SNACK]:
+                state[END_REASON] = STAGNATION
+                return GAME_ENDED
+
+            if head_x == state[SNACK_X] and head_y == state[SNACK_Y]:
+                points[SCORE] += snack_eaten_points
+                state[STEPS_SINCE_SNACK] = 0
+                return SNACK_EATEN
+
+            distance_x = float(head_x - state[SNACK_X])
+            distance_y = float(head_y - state[SNACK_Y])
+            new_snack_distance = sqrt(distance_x * distance_x + distance_y * distance_y)
+            if new_snack_distance < points[LAST_SNACK_DISTANCE]:
+                points[SCORE] += moved_toward_snack_points
+            else:
+                points[SCORE] += moved_away_from_snack_points
+
+            points[LAST_SNACK_DISTANCE] = new_snack_distance
+
+        direction = state[DIRECTION]
+        head_x = snake_x[state[HEAD_INDEX]]
+        head_y = snake_y[state[HEAD_INDEX]]
+
+        # Encode game representation into the first activations row
+        number_of_inputs = layer_nodes[0]
+        for index in range(number_of_inputs):
+            activations[0, index] = 0.0
+
+        if representation == FULL_REPRESENTATION:
+            for cell in range(number_of_cells):
+                if occupancy[cell] > 0:
+                    activations[0, cell] = 1.0
+
+            snack_cell = state[SNACK_X] * height + state[SNACK_Y]
+            if occupancy[snack_cell] == 0:
+                activations[0, snack_cell] = -1.0
+
+            activations[0, number_of_cells + direction - 1] = 1.0
+        else:
+            # Snack on the left, right, top or bottom side, checked in this order.
+            if state[SNACK_X] < head_x:
+                activations[0, 0] = 1.0
+            elif state[SNACK_X] > head_x:
+                activations[0, 1] = 1.0
+            elif state[SNACK_Y] < head_y:
+                activations[0, 2] = 1.0
+            elif state[SNACK_Y] > head_y:
+                activations[0, 3] = 1.0
+
+            activations[0, 4 + direction - 1] = 1.0
+
+        # Dense forward pass with tanh activations, layer matrices are stored row-major one after another and so
+        # are bias vectors, which are zeros for phenotypes without bias.
+        offset = 0
+        bias_offset = 0
+        row = 0
+        for layer in range(layer_nodes.shape[0] - 1):
+            input_nodes = layer_nodes[layer]
+            output_nodes = layer_nodes[layer + 1]
+            for output_node in range(output_nodes):
+                total = 0.0
+                for input_node in range(input_nodes):
+                    total += activations[row, input_node] * weights[offset + input_node * output_nodes + output_node]
+                activations[1 - row, output_node] = tanh(total + biases[bias_offset + output_node])
+
+            offset += input_nodes * output_nodes
+            bias_offset += output_nodes
+            row = 1 - row
+
+        # First best decision like argmax
+        decision = 0
+        for output_node in range(1, layer_nodes[layer_nodes.shape[0] - 1]):
+            if activations[row, output_node] > activations[row, decision]:
+                decision = output_node
+
+        new_direction = TURN_TABLE[direction, decision]
+
+        # Handle inadequate move. As result snake is moving in the same direction.
+        moving_direction = new_direction
+        if AXIS_TABLE[direction] == AXIS_TABLE[new_direction]:
+            moving_direction = direction
+
+        # Release the tail block, it becomes the snack perspective.
+        tail_index = (state[HEAD_INDEX] + state[LENGTH] - 1) % capacity
+        x = snake_x[tail_index]
+        y = snake_y[tail_index]
+        if 0 <= x < width and 0 <= y < height:
+            occupancy[x * height + y] -= 1
+        state[SNACK_PERSPECTIVE_X] = x
+        state[SNACK_PERSPECTIVE_Y] = y
+
+        # Push the new head block.
+        head_index = (state[HEAD_INDEX] - 1) % capacity
+        x = head_x + DELTA_X_TABLE[moving_direction]
+        y = head_y + DELTA_Y_TABLE[moving_direction]
+        snake_x[head_index] = x
+        snake_y[head_index] = y
+        state[HEAD_INDEX] = head_index
+        if 0 <= x < width and 0 <= y < height:
+            occupancy[x * height + y] += 1
+
+        state[DIRECTION] = new_direction
+        state[STEPS] += 1
+        state[STEPS_SINCE_SNACK] += 1
+
+
+compiled_advance_episode = jit(advance_episode)
+
+
+class KernelGame:
+    """Headless Game on integer encoded state, played by a single kernel call per eaten snack.
+
+    Follows exactly the rules of Game.get_next_game, so for the same phenotype and seed it ends with the same result
+    as a scalar Game. Only compatible snack placement and the built-in game representations are supported, cycle
+    detection is not. Without numba the kernel runs as plain Python, which is slower than Game.
+    """
+
+    def __init__(self, width, height, phenotype, seed, game_representation_strategy,
+                 snake_length=5, snack_eaten_points=1, moved_toward_snack_points=0.1,
+                 moved_away_from_snack_points=-0.2, max_points_threshold=200, min_points_threshold=-10,
+                 snack_placement=SnackPlacement.COMPATIBLE, max_steps=None, max_steps_without_snack=None,
+                 detect_cycles=False, compiled=True):
+        if snack_placement != SnackPlacement.COMPATIBLE or detect_cycles:
+            raise ValueError('Kernel games support only compatible snack placement without cycle detection')
+
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.random_generator = Random(seed)
+        self.representation = KERNEL_GAME_REPRESENTATION_STRATEGIES[game_representation_strategy]
+        self.snack_eaten_points = float(snack_eaten_points)
+        self.moved_toward_snack_points = float(moved_toward_snack_points)
+        self.moved_away_from_snack_points = float(moved_away_from_snack_points)
+        self.max_points_threshold = float(max_points_threshold)
+        self.min_points_threshold = float(min_points_threshold)
+        self.max_steps = -1 if max_steps is None else max_steps
+        self.max_steps_without_snack = -1 if max_steps_without_snack is None else max_steps_without_snack
+        self.advance_episode = compiled_advance_episode if compiled else advance_episode
+
+        self.weights = concatenate([layer.ravel() for layer in phenotype.layers]).astype(float64)
+        self.layer_nodes = zeros(len(phenotype.layers) + 1, dtype=int64)
+        self.layer_nodes[:] = [phenotype.input_nodes] + list(phenotype.hidden_layers_nodes) + [phenotype.output_nodes]
+        self.biases = zeros(int(self.layer_nodes[1:].sum()))
+        if phenotype.use_bias:
+            self.biases[:] = concatenate([bias_layer.ravel() for bias_layer in phenotype.bias_layers])
+        self.activations = zeros((2, int(self.layer_nodes.max())))
+
+        self.state = zeros(NUMBER_OF_STATE_SLOTS, dtype=int64)
+        self.points = zeros(2)
+        # Snake can not be longer than the board plus the block appended after eating the last snack.
+        capacity = max(width * height, snake_length) + 2
+        self.snake_x = zeros(capacity, dtype=int64)
+        self.snake_y = zeros(capacity, dtype=int64)
+        # Number of snake blocks covering each cell, cells are ordered like product(range(width), range(height)).
+        self.occupancy = zeros(width * height, dtype=int64)
+
+        self.state[DIRECTION] = LEFT
+        self.initialize_snake(snake_length)
+        self.initialize_snack()
+
+        head_x, head_y = self.get_snake()[0]
+        self.points[LAST_SNACK_DISTANCE] = Game.get_snake_snacks_distances((head_x, head_y), self.get_snack())
+
+    def initialize_snake(self, snake_length=5):
+        middle_x = ceil(self.width / 2)
+        middle_y = ceil(self.height / 2)
+
+        for index in range(snake_length):
+            self.snake_x[index] = middle_x + index
+            self.snake_y[index] = middle_y
+
+            if 0 <= middle_x + index < self.width:
+                self.occupancy[(middle_x + index) * self.height + middle_y] += 1
+
+        self.state[LENGTH] = snake_length
+        self.state[SNACK_PERSPECTIVE_X] = middle_x + snake_length
+        self.state[SNACK_PERSPECTIVE_Y] = middle_y
+
+    def initialize_snack(self):
+        available_cells = flatnonzero(self.occupancy == 0)
+
+        # Board is full, there is no place left for a snack.
+        if len(available_cells) == 0:
+            return False
+
+        snack_cell = self.random_generator.choice(available_cells)
+        self.state[SNACK_X], self.state[SNACK_Y] = divmod(int(snack_cell), self.height)
+        return True
+
+    def get_snake(self):
+        blocks = [(self.state[HEAD_INDEX] + index) % len(self.snake_x) for index in range(self.state[LENGTH])]
+        return [(int(self.snake_x[block]), int(self.snake_y[block])) for block in blocks]
+
+    def get_snack(self):
+        return int(self.state[SNACK_X]), int(self.state[SNACK_Y])
+
+    @staticmethod
+    def is_game_supported(game_arguments):
+        return (game_arguments.get('game_representation_strategy') in KERNEL_GAME_REPRESENTATION_STRATEGIES and
+                game_arguments.get('snack_placement', SnackPlacement.COMPATIBLE) == SnackPlacement.COMPATIBLE and
+                not game_arguments.get('detect_cycles', False))
+
+    @staticmethod
+    def get_solved_kernel_game(kernel_game):
+        snack_eaten = False
+
+        while kernel_game.state[END_REASON] == 0:
+            reason = kernel_game.advance_episode(
+                kernel_game.state, kernel_game.points, kernel_game.snake_x, kernel_game.snake_y,
+                kernel_game.occupancy, kernel_game.weights, kernel_game.biases, kernel_game.layer_nodes,
+                kernel_game.activations, kernel_game.width, kernel_game.height, kernel_game.representation,
+                kernel_game.snack_eaten_points, kernel_game.moved_toward_snack_points,
+                kernel_game.moved_away_from_snack_points,
+                kernel_game.max_points_threshold, kernel_game.min_points_threshold, kernel_game.max_steps,
+                kernel_game.max_steps_without_snack, snack_eaten)
+
+            snack_eaten = reason == SNACK_EATEN
+            if snack_eaten and not kernel_game.initialize_snack():
+                kernel_game.state[END_REASON] = GameEndReason.BOARD_FILLED.value
+
+        return kernel_game
+
+    @staticmethod
+    def get_game_result(kernel_game):
+        end_reason = int(kernel_game.state[END_REASON]) or None
+        return GameResult(float(kernel_game.points[SCORE]), int(kernel_game.state[STEPS]),
+                          int(kernel_game.state[LENGTH]), end_reason, kernel_game.seed)
+
+
+def get_solved_game_result(phenotype, seed, game_arguments, stats=None):
+    # Compiled kernel when numba is installed and supports the game, the scalar Game otherwise.
+    if JIT_AVAILABLE and KernelGame.is_game_supported(game_arguments):
+        if stats is not None:
+            stats.start()
+
+        kernel_game = KernelGame(phenotype=phenotype, seed=seed, **game_arguments)
+        game_result = KernelGame.get_game_result(KernelGame.get_solved_kernel_game(kernel_game))
+
+        # Kernel games are timed as a whole.
+        if stats is not None:
+            stats.lap('kernel_games')
+            stats.add_game_result(game_result, game_arguments.get('snake_length', 5))
+
+        return game_result
+
+    game = Game(phenotype=phenotype, seed=seed, stats=stats, **game_arguments)
+    return Game.get_solved_game_result(game)
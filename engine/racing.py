@@ -0,0 +1,75 @@
+from enum import Enum
+from inspect import signature
+
+from numpy import quantile
+
+from engine.game import Game
+
+
+class FitnessAggregation(Enum):
+    MEAN = 1
+    MIN = 2
+    QUANTILE = 3
+
+
+def get_aggregated_fitness(scores, aggregation=FitnessAggregation.MEAN, fitness_quantile=0.25):
+    if aggregation == FitnessAggregation.MEAN:
+        return sum(scores) / len(scores)
+
+    if aggregation == FitnessAggregation.MIN:
+        return min(scores)
+
+    return float(quantile(scores, fitness_quantile))
+
+
+def get_score_bounds(game_arguments):
+    # Game checks thresholds before every step, so a score can only overshoot them by the points of one step.
+    parameters = signature(Game.__init__).parameters
+    arguments = {name: parameter.default for name, parameter in parameters.items()}
+    arguments.update(game_arguments)
+
+    points = [arguments['snack_eaten_points'], arguments['moved_toward_snack_points'],
+              arguments['moved_away_from_snack_points']]
+    return arguments['min_points_threshold'] + min(points + [0]), arguments['max_points_threshold'] + max(points + [0])
+
+
+def get_raced_fitness(evaluate_episodes, episode_seeds, score_bounds, survivors,
+                      aggregation=FitnessAggregation.MEAN, fitness_quantile=0.25):
+    """Plays len(episode_seeds) episodes per candidate and aggregates their scores into fitness.
+
+    Episodes are played in rounds, evaluate_episodes(candidate_indices, seeds) returns the scores of one round.
+    After each round the cutoff is the survivors-th best fitness candidates are guaranteed to reach (remaining
+    episodes counted at the lowest possible score). Candidates which can not reach it even with the highest possible
+    score in all remaining episodes stop racing, their fitness is aggregated from the episodes they played.
+    Survivors has to be at least one.
+
+    Returns fitness and number of played episodes per candidate.
+    """
+    number_of_episodes = len(episode_seeds)
+    number_of_candidates = len(episode_seeds[0])
+    lowest_score, highest_score = score_bounds
+
+    scores = [[] for index in range(number_of_candidates)]
+    racing_candidates = list(range(number_of_candidates))
+
+    for episode in range(number_of_episodes):
+        seeds = [episode_seeds[episode][index] for index in racing_candidates]
+        for index, score in zip(racing_candidates, evaluate_episodes(racing_candidates, seeds)):
+            scores[index].append(score)
+
+        remaining_episodes = number_of_episodes - episode - 1
+        if remaining_episodes == 0 or survivors >= len(racing_candidates):
+            continue
+
+        lower_bounds = sorted([get_aggregated_fitness(scores[index] + [lowest_score] * remaining_episodes,
+                                                      aggregation, fitness_quantile) for index in racing_candidates],
+                              reverse=True)
+        cutoff = lower_bounds[survivors - 1]
+
+        racing_candidates = [index for index in racing_candidates if get_aggregated_fitness(
+            scores[index] + [highest_score] * remaining_episodes, aggregation, fitness_quantile) >= cutoff]
+
+    fitness = [get_aggregated_fitness(candidate_scores, aggregation, fitness_quantile) for candidate_scores in scores]
+    played_episodes = [len(candidate_scores) for candidate_scores in scores]
+
+    return fitness, played_episodes
@@ -0,0 +1,204 @@
+from math import ceil, sqrt
+
+import pygame
+
+from engine.game import Game, GameStatus
+
+BACKGROUND_COLOR = (255, 255, 255)
+SNAKE_COLOR = (0, 255, 0)
+SNACK_COLOR = (255, 0, 0)
+# Color between the game boards of a grid
+BORDER_COLOR = (200, 200, 200)
+
+
+def get_snake_block_color(index, snake_color=SNAKE_COLOR, background_color=BACKGROUND_COLOR):
+    # Color of a block of alpha 255 / (index + 1) blitted on the background, the gradient of first-snake-on-screen.py.
+    alpha = int(255 / (index + 1))
+    return tuple(background + (snake - background) * alpha // 255
+                 for snake, background in zip(snake_color, background_color))
+
+
+class BlockSurfaces:
+    """Opaque block surfaces built once per color and shared by every board.
+
+    Blending the gradient with the background up front makes every block a plain blit.
+    """
+
+    def __init__(self, scale, snake_color=SNAKE_COLOR, snack_color=SNACK_COLOR, background_color=BACKGROUND_COLOR):
+        self.scale = scale
+        self.snake_color = snake_color
+        self.snack_color = snack_color
+        self.background_color = background_color
+        self.snake_block_colors = []
+        self.surfaces = {}
+
+    def get_snake_block_color(self, index):
+        while len(self.snake_block_colors) <= index:
+            self.snake_block_colors.append(get_snake_block_color(len(self.snake_block_colors), self.snake_color,
+                                                                 self.background_color))
+
+        return self.snake_block_colors[index]
+
+    def get_surface(self, color):
+        surface = self.surfaces.get(color)
+        if surface is None:
+            surface = pygame.Surface((self.scale, self.scale))
+            surface.fill(color)
+            self.surfaces[color] = surface
+
+        return surface
+
+
+class BoardView:
+    """Draws one game at an offset of the screen, only cells whose color changed since the last draw are blitted.
+
+    Cells are drawn with the colors of the blocks covering them, the snake head wins over its body and the body over
+    the snack.
+    """
+
+    def __init__(self, game, left, top, block_surfaces):
+        self.game = game
+        self.left = left
+        self.top = top
+        self.block_surfaces = block_surfaces
+        # Colors of the cells which are not background on the screen, by position
+        self.drawn_colors = {}
+        self.drawn_steps = None
+
+    def get_rect(self):
+        scale = self.block_surfaces.scale
+        return pygame.Rect(self.left, self.top, self.game.width * scale, self.game.height * scale)
+
+    def get_cell_rect(self, position):
+        scale = self.block_surfaces.scale
+        return pygame.Rect(self.left + position[0] * scale, self.top + position[1] * scale, scale, scale)
+
+    def get_colors(self):
+        game = self.game
+        colors = {}
+        if game.snack is not None and game.is_position_on_board(game.snack):
+            colors[game.snack] = self.block_surfaces.snack_color
+
+        # Tail first, so blocks closer to the head overwrite it where the snake crossed itself.
+        snake_blocks = game.snake_blocks
+        for index in range(len(snake_blocks) - 1, -1, -1):
+            position = snake_blocks[index]
+            if game.is_position_on_board(position):
+                colors[position] = self.block_surfaces.get_snake_block_color(index)
+
+        return colors
+
+    def draw(self, screen, full=False):
+        """Blits changed cells and returns their rectangles, nothing is drawn when the game did not step."""
+        if not full and self.drawn_steps == self.game.steps:
+            return []
+
+        colors = self.get_colors()
+        block_surfaces = self.block_surfaces
+        dirty_rects = []
+
+        if full:
+            board_rect = self.get_rect()
+            screen.fill(block_surfaces.background_color, board_rect)
+            dirty_rects.append(board_rect)
+            self.drawn_colors = {}
+
+        for position in self.drawn_colors:
+            if position not in colors:
+                cell_rect = self.get_cell_rect(position)
+                screen.fill(block_surfaces.background_color, cell_rect)
+                dirty_rects.append(cell_rect)
+
+        for position, color in colors.items():
+            if self.drawn_colors.get(position) != color:
+                cell_rect = self.get_cell_rect(position)
+                screen.blit(block_surfaces.get_surface(color), cell_rect)
+                if not full:
+                    dirty_rects.append(cell_rect)
+
+        self.drawn_colors = colors
+        self.drawn_steps = self.game.steps
+        return dirty_rects
+
+
+class Renderer:
+    """Grid of games, e.g. a whole population, drawn on one screen with dirty rectangle updates.
+
+    Games are simulated with a fixed number of steps per second, independent of the frame rate, see run().
+    """
+
+    def __init__(self, games, scale=24, columns=None, border=1, snake_color=SNAKE_COLOR, snack_color=SNACK_COLOR,
+                 background_color=BACKGROUND_COLOR, border_color=BORDER_COLOR):
+        self.scale = scale
+        self.columns = columns
+        self.border = border
+        self.border_color = border_color
+        self.block_surfaces = BlockSurfaces(scale, snake_color, snack_color, background_color)
+        self.games = []
+        self.views = []
+        self.size = (0, 0)
+        self.set_games(games)
+
+    def set_games(self, games):
+        """Lays out the games in a grid of equally sized boards, the screen has to be drawn in full afterwards."""
+        self.games = list(games)
+        columns = self.columns if self.columns is not None else ceil(sqrt(len(self.games)))
+        rows = ceil(len(self.games) / columns) if columns > 0 else 0
+        board_width = max((game.width for game in self.games), default=0) * self.scale + self.border
+        board_height = max((game.height for game in self.games), default=0) * self.scale + self.border
+
+        self.views = [BoardView(game, self.border + (index % columns) * board_width,
+                                self.border + (index // columns) * board_height, self.block_surfaces)
+                      for index, game in enumerate(self.games)]
+        self.size = (self.border + columns * board_width, self.border + rows * board_height)
+
+    def draw(self, screen, full=False):
+        if full:
+            screen.fill(self.border_color)
+
+        dirty_rects = []
+        for view in self.views:
+            dirty_rects.extend(view.draw(screen, full))
+
+        return [screen.get_rect()] if full else dirty_rects
+
+    def step(self):
+        # Games are advanced in place, ended games keep their last state on the screen.
+        stepped = False
+        for game in self.games:
+            if game.status != GameStatus.ENDED:
+                Game.get_next_game(game)
+                stepped = True
+
+        return stepped
+
+    def run(self, steps_per_second=8, frames_per_second=60, maximum_steps_per_frame=4, until_ended=True):
+        """Opens a window and plays the games until it is closed, or until every game ended with until_ended.
+
+        Games step at steps_per_second whatever the frame rate is, a slow frame is caught up with at most
+        maximum_steps_per_frame steps so that the window stays responsive.
+        """
+        screen = pygame.display.set_mode(self.size)
+        clock = pygame.time.Clock()
+        pygame.display.update(self.draw(screen, full=True))
+
+        step_seconds = 1 / steps_per_second
+        accumulated_seconds = 0
+        running = True
+
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+
+            accumulated_seconds += clock.tick(frames_per_second) / 1000
+            steps = 0
+            while accumulated_seconds >= step_seconds and steps < maximum_steps_per_frame:
+                accumulated_seconds -= step_seconds
+                steps += 1
+                running = self.step() or not until_ended
+
+            if steps == maximum_steps_per_frame:
+                accumulated_seconds = min(accumulated_seconds, step_seconds)
+
+            pygame.display.update(self.draw(screen))
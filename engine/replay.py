@@ -0,0 +1,172 @@
+from collections import namedtuple
+from mmap import ACCESS_READ, mmap
+from os.path import getsize
+from struct import Struct
+
+from engine.cells import SnackPlacement
+from engine.directions import KEEP_DIRECTION
+from engine.game import Game, GameEndReason, GameStatus
+
+# Every episode starts with this header and is followed by its action codes, 2 bits per step.
+EPISODE_MAGIC = b'SNKE'
+EPISODE_HEADER = Struct('<4sHHHqdddddBBiiIdB')
+ACTIONS_PER_BYTE = 4
+
+# Recorded episode read from a replay file, actions are decoded on demand from actions_offset.
+Replay = namedtuple('Replay', ['game_arguments', 'seed', 'score', 'end_reason', 'number_of_steps', 'actions_offset'])
+
+
+def get_actions_size(number_of_steps):
+    return (number_of_steps + ACTIONS_PER_BYTE - 1) // ACTIONS_PER_BYTE
+
+
+def encode_actions(actions):
+    encoded_actions = bytearray(get_actions_size(len(actions)))
+    for step, action in enumerate(actions):
+        encoded_actions[step // ACTIONS_PER_BYTE] |= action << (2 * (step % ACTIONS_PER_BYTE))
+
+    return bytes(encoded_actions)
+
+
+class ReplayRecorder:
+    """Appends episodes to a replay file, the file is only ever appended to, so episodes of earlier runs are kept.
+
+    An episode is its seed, the game rules and the action of every step, which is all Game needs to play it again.
+    Phenotypes and representations are not stored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'ab')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def record_game(self, game):
+        # Game is solved by its phenotype while its actions are recorded.
+        snake_length = len(game.snake_blocks)
+        actions = [event.action for event in game.iter_episode() if not event.ended]
+
+        self.write_episode(game, snake_length, actions)
+        return game
+
+    def write_episode(self, game, snake_length, actions):
+        end_reason = game.end_reason.value if game.end_reason is not None else 0
+        max_steps = game.max_steps if game.max_steps is not None else -1
+        max_steps_without_snack = game.max_steps_without_snack if game.max_steps_without_snack is not None else -1
+
+        self.file.write(EPISODE_HEADER.pack(
+            EPISODE_MAGIC, game.width, game.height, snake_length, game.seed, game.snack_eaten_points,
+            game.moved_toward_snack_points, game.moved_away_from_snack_points, game.max_points_threshold,
+            game.min_points_threshold, game.snack_placement.value, game.detect_cycles, max_steps,
+            max_steps_without_snack, len(actions), game.score, end_reason))
+        self.file.write(encode_actions(actions))
+        self.file.flush()
+
+
+class ReplayReader:
+    """Episodes of a replay file, read from a memory map without loading the file.
+
+    Only episode headers are read to index the file, actions are decoded while an episode is played.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        # Empty file can not be mapped.
+        self.buffer = mmap(self.file.fileno(), 0, access=ACCESS_READ) if getsize(path) > 0 else b''
+        self.offsets = self.get_episode_offsets()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        return self.read_episode(self.offsets[index])
+
+    def __iter__(self):
+        for offset in self.offsets:
+            yield self.read_episode(offset)
+
+    def close(self):
+        if isinstance(self.buffer, mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def get_episode_offsets(self):
+        offsets = []
+        offset = 0
+
+        while offset + EPISODE_HEADER.size <= len(self.buffer):
+            header = EPISODE_HEADER.unpack_from(self.buffer, offset)
+            if header[0] != EPISODE_MAGIC:
+                raise ValueError('Replay file is corrupted at byte {}'.format(offset))
+
+            number_of_steps = header[14]
+            offsets.append(offset)
+            offset += EPISODE_HEADER.size + get_actions_size(number_of_steps)
+
+        return offsets
+
+    def read_episode(self, offset):
+        (magic, width, height, snake_length, seed, snack_eaten_points, moved_toward_snack_points,
+         moved_away_from_snack_points, max_points_threshold, min_points_threshold, snack_placement, detect_cycles,
+         max_steps, max_steps_without_snack, number_of_steps, score, end_reason) = EPISODE_HEADER.unpack_from(
+            self.buffer, offset)
+
+        game_arguments = {
+            'width': width,
+            'height': height,
+            'snake_length': snake_length,
+            'snack_eaten_points': snack_eaten_points,
+            'moved_toward_snack_points': moved_toward_snack_points,
+            'moved_away_from_snack_points': moved_away_from_snack_points,
+            'max_points_threshold': max_points_threshold,
+            'min_points_threshold': min_points_threshold,
+            'snack_placement': SnackPlacement(snack_placement),
+            'max_steps': max_steps if max_steps >= 0 else None,
+            'max_steps_without_snack': max_steps_without_snack if max_steps_without_snack >= 0 else None,
+            'detect_cycles': bool(detect_cycles),
+        }
+
+        return Replay(game_arguments, seed, score, GameEndReason(end_reason) if end_reason else None,
+                      number_of_steps, offset + EPISODE_HEADER.size)
+
+    def get_action(self, replay, step):
+        encoded_actions = self.buffer[replay.actions_offset + step // ACTIONS_PER_BYTE]
+        return (encoded_actions >> (2 * (step % ACTIONS_PER_BYTE))) & 3
+
+    def get_replayed_games(self, replay):
+        """Plays the episode again, yields its single Game after the start and after every step.
+
+        Game is advanced in place, take a snapshot() of it to keep a state.
+        """
+        game = Game(phenotype=None, seed=replay.seed, game_representation_strategy=None, **replay.game_arguments)
+        yield game
+
+        for step in range(replay.number_of_steps):
+            Game.get_next_game(game, self.get_action(replay, step))
+            yield game
+
+        # Recorded game ended with its last step, any action would do.
+        Game.get_next_game(game, KEEP_DIRECTION)
+        if game.status != GameStatus.ENDED or game.end_reason != replay.end_reason:
+            raise ValueError('Replay does not match the game rules')
+
+        yield game
+
+    def get_replayed_game(self, replay):
+        for game in self.get_replayed_games(replay):
+            pass
+
+        return game
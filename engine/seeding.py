@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+from numpy import uint32
+from numpy.random import SeedSequence
+
+# Settings every generation is evaluated with, built once and shared by reference. Game arguments are the keyword
+# arguments of Game except phenotype and seed.
+EvaluationConfig = namedtuple('EvaluationConfig', ['game_arguments', 'episodes_per_phenotype', 'same_environment',
+                                                   'seed'])
+
+
+class SeedStream:
+    """Game seeds of consecutive generations, each generation is a child spawned from SeedSequence(seed).
+
+    Seeds of a generation are drawn as one block per episode, so they only depend on the root seed and on the
+    number of generations before, not on how games are split between workers. State is the number of spawned
+    generations, see getstate() and setstate().
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.seed_sequence = SeedSequence(seed)
+
+    def getstate(self):
+        return self.seed_sequence.n_children_spawned
+
+    def setstate(self, state):
+        self.seed_sequence = SeedSequence(self.seed, n_children_spawned=state)
+
+    def get_generation_seeds(self, population_size, episodes_per_phenotype=1, same_environment=False):
+        """Seeds of the next generation as a list for every episode, with one seed for every phenotype."""
+        generation_sequence = self.seed_sequence.spawn(1)[0]
+        seeds_per_episode = 1 if same_environment else population_size
+        seeds = generation_sequence.generate_state(episodes_per_phenotype * seeds_per_episode, dtype=uint32).reshape(
+            episodes_per_phenotype, seeds_per_episode)
+
+        if same_environment:
+            seeds = seeds.repeat(population_size, axis=1)
+
+        # Games seed their Random with Python ints.
+        return seeds.tolist()
+
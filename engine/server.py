@@ -0,0 +1,343 @@
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from json import dumps, loads
+from multiprocessing import cpu_count
+from socket import AF_UNIX, SOCK_STREAM, create_connection, socket
+from struct import Struct
+
+from femos.core import get_number_of_nn_weights
+from numpy import concatenate, float64, frombuffer
+
+from engine.cells import SnackPlacement
+from engine.evaluation import EvaluationService, GameExecutor, get_phenotype, get_phenotype_weights, \
+    solve_phenotype_games
+from engine.features import FeatureBasedRepresentation
+from engine.game import Game, GameResult
+
+# Every message is a JSON header and a body of raw bytes, preceded by both of their sizes.
+MESSAGE_HEADER = Struct('<II')
+
+REPRESENTATION_STRATEGY_NAMES = {
+    Game.get_full_game_representation_strategy: 'full',
+    Game.get_feature_based_game_representation_strategy: 'features',
+}
+REPRESENTATION_STRATEGIES = {name: strategy for strategy, name in REPRESENTATION_STRATEGY_NAMES.items()}
+
+# Request waiting for its games to be solved, results are set on its future in the order of its seeds.
+EvaluationRequest = namedtuple('EvaluationRequest', ['configuration', 'topology', 'weights', 'seeds', 'future'])
+
+
+def encode_game_arguments(game_arguments):
+    """Game arguments as JSON values, representation strategies are sent by name or by their feature groups."""
+    encoded_game_arguments = {}
+    for name, value in game_arguments.items():
+        if name == 'game_representation_strategy':
+            if isinstance(value, FeatureBasedRepresentation):
+                value = list(value.group_names)
+            elif value in REPRESENTATION_STRATEGY_NAMES:
+                value = REPRESENTATION_STRATEGY_NAMES[value]
+            else:
+                raise ValueError('Game representation strategy {!r} can not be sent'.format(value))
+        elif isinstance(value, Enum):
+            value = value.value
+
+        encoded_game_arguments[name] = value
+
+    return encoded_game_arguments
+
+
+def decode_game_arguments(encoded_game_arguments):
+    game_arguments = dict(encoded_game_arguments)
+
+    strategy = game_arguments['game_representation_strategy']
+    if isinstance(strategy, list):
+        game_arguments['game_representation_strategy'] = FeatureBasedRepresentation(strategy)
+    elif strategy in REPRESENTATION_STRATEGIES:
+        game_arguments['game_representation_strategy'] = REPRESENTATION_STRATEGIES[strategy]
+    else:
+        raise ValueError('Unknown game representation strategy {!r}'.format(strategy))
+
+    if 'snack_placement' in game_arguments:
+        game_arguments['snack_placement'] = SnackPlacement(game_arguments['snack_placement'])
+
+    return game_arguments
+
+
+def get_message(header, body=b''):
+    encoded_header = dumps(header).encode()
+    return MESSAGE_HEADER.pack(len(encoded_header), len(body)) + encoded_header + body
+
+
+async def read_message(reader):
+    try:
+        header_size, body_size = MESSAGE_HEADER.unpack(await reader.readexactly(MESSAGE_HEADER.size))
+        header = loads((await reader.readexactly(header_size)).decode())
+        body = await reader.readexactly(body_size)
+    except asyncio.IncompleteReadError:
+        return None
+
+    return header, body
+
+
+def read_file_message(file):
+    # Blocking counterpart of read_message, None once the other side closed the connection.
+    header_bytes = file.read(MESSAGE_HEADER.size)
+    if len(header_bytes) < MESSAGE_HEADER.size:
+        return None
+
+    header_size, body_size = MESSAGE_HEADER.unpack(header_bytes)
+    header = loads(file.read(header_size).decode())
+    body = file.read(body_size)
+    return header, body
+
+
+def evaluate_request_games(game_arguments, topology, weights, seeds, batch_evaluation, kernel_evaluation):
+    phenotypes = [get_phenotype(row, topology) for row in weights]
+
+    return [tuple(result) for result in solve_phenotype_games(phenotypes, seeds, game_arguments, batch_evaluation,
+                                                               kernel_evaluation)]
+
+
+class EvaluationServer:
+    """Solves games for clients connected over TCP or a Unix socket, with one pool of worker processes for all.
+
+    Requests arriving within batch_delay seconds of each other are merged by game arguments and topology and
+    dispatched in chunks like EvaluationService. Once max_pending_games games are waiting, connections are not read
+    until results are sent, so fast clients are slowed down by TCP flow control instead of queueing without bound.
+    A request bigger than the limit is admitted alone.
+    """
+
+    def __init__(self, processes=None, batch_evaluation=True, kernel_evaluation=False, minimum_chunk_size=16,
+                 max_pending_games=20000, max_batch_games=4096, batch_delay=0.005):
+        self.processes = processes or cpu_count()
+        self.batch_evaluation = batch_evaluation
+        self.kernel_evaluation = kernel_evaluation
+        self.minimum_chunk_size = minimum_chunk_size
+        self.max_pending_games = max_pending_games
+        self.max_batch_games = max_batch_games
+        self.batch_delay = batch_delay
+
+        self.executor = None
+        self.server = None
+        self.queue = None
+        self.capacity = None
+        self.dispatcher = None
+        self.connections = set()
+        # Tasks solving batches, kept until they are done so they are neither collected nor left behind by close().
+        self.evaluations = set()
+        self.pending_games = 0
+        # Decoded game arguments by their JSON encoding
+        self.game_arguments = {}
+        self.batches = 0
+        self.solved_games = 0
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """Starts listening on the Unix socket path, or on host and port, and returns the bound address."""
+        self.executor = ProcessPoolExecutor(self.processes)
+        self.queue = asyncio.Queue()
+        self.capacity = asyncio.Condition()
+        self.dispatcher = asyncio.ensure_future(self.dispatch_requests())
+
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path=path)
+            return path
+
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+        # Connections are served by their own tasks, which outlive the listening socket.
+        tasks = list(self.connections) + list(self.evaluations) + [self.dispatcher]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.executor.shutdown()
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def reserve(self, number_of_games):
+        async with self.capacity:
+            await self.capacity.wait_for(lambda: self.pending_games == 0 or
+                                         self.pending_games + number_of_games <= self.max_pending_games)
+            self.pending_games += number_of_games
+
+    async def release(self, number_of_games):
+        async with self.capacity:
+            self.pending_games -= number_of_games
+            self.capacity.notify_all()
+
+    def get_request(self, header, body):
+        configuration = dumps(header['game_arguments'], sort_keys=True)
+        if configuration not in self.game_arguments:
+            self.game_arguments[configuration] = decode_game_arguments(header['game_arguments'])
+
+        # Topology is sent like EvaluationService.get_topology, bias weights follow the layers of a phenotype.
+        input_nodes, hidden_layers_nodes, output_nodes, use_bias = header['topology']
+        topology = (input_nodes, tuple(hidden_layers_nodes), output_nodes, bool(use_bias))
+        number_of_weights = get_number_of_nn_weights(input_nodes, list(hidden_layers_nodes), output_nodes, use_bias)
+
+        seeds = header['seeds']
+        if len(body) != len(seeds) * number_of_weights * float64().itemsize:
+            raise ValueError('Expected {} weights for each of {} seeds'.format(number_of_weights, len(seeds)))
+
+        weights = frombuffer(body, dtype='<f8').reshape(len(seeds), number_of_weights)
+        return EvaluationRequest(configuration, topology, weights, seeds, asyncio.get_running_loop().create_future())
+
+    async def handle_connection(self, reader, writer):
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        responses = []
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+
+                header, body = message
+                try:
+                    request = self.get_request(header, body)
+                except (KeyError, TypeError, ValueError) as error:
+                    writer.write(get_message({'id': header.get('id'), 'error': str(error)}))
+                    continue
+
+                # Next request is not read before this one fits, see max_pending_games.
+                await self.reserve(len(request.seeds))
+                self.queue.put_nowait(request)
+                responses.append(asyncio.ensure_future(self.respond(writer, header.get('id'), request)))
+
+            await asyncio.gather(*responses)
+        finally:
+            for response in responses:
+                response.cancel()
+            writer.close()
+            self.connections.discard(connection)
+
+    async def respond(self, writer, request_id, request):
+        try:
+            results = await request.future
+            response = {'id': request_id, 'results': results}
+        except Exception as error:
+            response = {'id': request_id, 'error': '{}: {}'.format(type(error).__name__, error)}
+        finally:
+            await self.release(len(request.seeds))
+
+        # Responses of pipelined requests may be sent out of order, clients match them by id.
+        if not writer.is_closing():
+            writer.write(get_message(response))
+            await writer.drain()
+
+    async def dispatch_requests(self):
+        while True:
+            requests = [await self.queue.get()]
+            number_of_games = len(requests[0].seeds)
+
+            # Requests of other clients arriving shortly after are solved in the same batch.
+            await asyncio.sleep(self.batch_delay)
+            while number_of_games < self.max_batch_games and not self.queue.empty():
+                request = self.queue.get_nowait()
+                requests.append(request)
+                number_of_games += len(request.seeds)
+
+            grouped_requests = {}
+            for request in requests:
+                grouped_requests.setdefault((request.configuration, request.topology), []).append(request)
+
+            for (configuration, topology), group in grouped_requests.items():
+                evaluation = asyncio.ensure_future(self.evaluate_requests(self.game_arguments[configuration],
+                                                                          topology, group))
+                self.evaluations.add(evaluation)
+                evaluation.add_done_callback(self.evaluations.discard)
+
+    async def evaluate_requests(self, game_arguments, topology, requests):
+        # Any failure is passed on to the waiting requests, nobody else would notice it.
+        try:
+            results = await self.solve_requests(game_arguments, topology, requests)
+        except Exception as error:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(error)
+            return
+
+        self.solved_games += len(results)
+        start = 0
+        for request in requests:
+            request.future.set_result(results[start:start + len(request.seeds)])
+            start += len(request.seeds)
+
+    async def solve_requests(self, game_arguments, topology, requests):
+        loop = asyncio.get_running_loop()
+        weights = concatenate([request.weights for request in requests])
+        seeds = [seed for request in requests for seed in request.seeds]
+        self.batches += 1
+
+        futures = []
+        start = 0
+        for chunk_size in EvaluationService.get_chunk_sizes(len(seeds), self.processes, self.minimum_chunk_size):
+            futures.append(loop.run_in_executor(self.executor, evaluate_request_games, game_arguments, topology,
+                                                weights[start:start + chunk_size], seeds[start:start + chunk_size],
+                                                self.batch_evaluation, self.kernel_evaluation))
+            start += chunk_size
+
+        return [result for chunk_results in await asyncio.gather(*futures) for result in chunk_results]
+
+
+def run_evaluation_server(host='127.0.0.1', port=0, path=None, **server_arguments):
+    async def serve():
+        server = EvaluationServer(**server_arguments)
+        print('Evaluation server listening on {}'.format(await server.start(host, port, path)))
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    asyncio.run(serve())
+
+
+class EvaluationClient(GameExecutor):
+    """GameExecutor sending its games to an EvaluationServer, evaluate() blocks until the results arrive.
+
+    Address is a Unix socket path or a (host, port) pair. Game arguments are sent with every request, so clients of
+    different experiments can share one server.
+    """
+
+    def __init__(self, game_arguments, address):
+        super().__init__()
+        if isinstance(address, str):
+            self.socket = socket(AF_UNIX, SOCK_STREAM)
+            self.socket.connect(address)
+        else:
+            self.socket = create_connection(address)
+
+        self.file = self.socket.makefile('rb')
+        self.encoded_game_arguments = encode_game_arguments(game_arguments)
+        self.next_request_id = 0
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def evaluate(self, phenotypes, seeds):
+        request_id = self.next_request_id
+        self.next_request_id += 1
+
+        phenotype = phenotypes[0]
+        weights = concatenate([get_phenotype_weights(phenotype) for phenotype in phenotypes]).astype('<f8')
+        header = {
+            'id': request_id,
+            'game_arguments': self.encoded_game_arguments,
+            'topology': EvaluationService.get_topology(phenotype),
+            'seeds': [int(seed) for seed in seeds],
+        }
+        self.socket.sendall(get_message(header, weights.tobytes()))
+
+        response, body = read_file_message(self.file)
+        if 'error' in response:
+            raise RuntimeError('Evaluation server failed: {}'.format(response['error']))
+
+        return [GameResult(*result) for result in response['results']]
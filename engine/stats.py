@@ -0,0 +1,80 @@
+from time import perf_counter
+
+from engine.game import GameEndReason
+
+
+class GameStats:
+    """Phase timers, counters and a histogram of episode lengths, collected by games which are given one.
+
+    Phases are timed with laps: start() marks the beginning of a step and lap(phase) adds the time since the last mark
+    to the phase, so phases of a step never overlap. Stats of games solved in different processes are combined with
+    merge().
+    """
+
+    def __init__(self, histogram_bin_size=25):
+        self.histogram_bin_size = histogram_bin_size
+        self.phase_times = {}
+        self.counters = {}
+        # Number of episodes by the first length of their bin
+        self.episode_lengths = {}
+        self.last_time = None
+
+    def start(self):
+        self.last_time = perf_counter()
+
+    def lap(self, phase):
+        time = perf_counter()
+        self.phase_times[phase] = self.phase_times.get(phase, 0) + time - self.last_time
+        self.last_time = time
+
+    def add_time(self, phase, seconds):
+        self.phase_times[phase] = self.phase_times.get(phase, 0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_episode(self, steps, end_reason):
+        self.count('episodes')
+        if end_reason is not None:
+            self.count('end_reason/' + end_reason.name)
+
+        bin_start = steps - steps % self.histogram_bin_size
+        self.episode_lengths[bin_start] = self.episode_lengths.get(bin_start, 0) + 1
+
+    def add_game_result(self, game_result, snake_length):
+        # Games which do not report their steps, e.g. batch games, are counted from their results.
+        self.count('steps', game_result.steps)
+        self.count('snacks', game_result.length - snake_length)
+        end_reason = GameEndReason(game_result.end_reason) if game_result.end_reason is not None else None
+        self.add_episode(game_result.steps, end_reason)
+
+    def merge(self, other):
+        for phase, seconds in other.phase_times.items():
+            self.add_time(phase, seconds)
+
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+
+        for length, episodes in other.episode_lengths.items():
+            bin_start = length - length % self.histogram_bin_size
+            self.episode_lengths[bin_start] = self.episode_lengths.get(bin_start, 0) + episodes
+
+        return self
+
+    @staticmethod
+    def get_merged(stats):
+        merged_stats = GameStats(stats[0].histogram_bin_size if len(stats) > 0 else 25)
+        for game_stats in stats:
+            merged_stats.merge(game_stats)
+
+        return merged_stats
+
+    def get_summary(self):
+        total_time = sum(self.phase_times.values())
+        phases = ', '.join('{}: {:.3f}s ({:.0%})'.format(phase, seconds, seconds / total_time if total_time else 0)
+                           for phase, seconds in sorted(self.phase_times.items(), key=lambda item: -item[1]))
+        counters = ', '.join('{}: {}'.format(name, amount) for name, amount in sorted(self.counters.items()))
+        histogram = ', '.join('{}-{}: {}'.format(length, length + self.histogram_bin_size - 1, episodes)
+                              for length, episodes in sorted(self.episode_lengths.items()))
+
+        return 'phases: [{}]\ncounters: [{}]\nepisode lengths: [{}]'.format(phases, counters, histogram)
@@ -0,0 +1,21 @@
+from engine.kernel import JIT_AVAILABLE
+from engine.server import run_evaluation_server
+
+# Server arguments, clients connect with EvaluationClient, e.g. by EVALUATION_SERVER_ADDRESS of evolution.py.
+HOST = '127.0.0.1'
+PORT = 7777
+# Unix socket path, used instead of HOST and PORT when set.
+SOCKET_PATH = None
+PROCESSES = None
+BATCH_EVALUATION = True
+KERNEL_EVALUATION = JIT_AVAILABLE
+MINIMUM_CHUNK_SIZE = 16
+# Games waiting for results before connections stop being read
+MAX_PENDING_GAMES = 20000
+# Seconds requests of different clients are collected for one batch
+BATCH_DELAY = 0.005
+
+if __name__ == '__main__':
+    run_evaluation_server(HOST, PORT, SOCKET_PATH, processes=PROCESSES, batch_evaluation=BATCH_EVALUATION,
+                          kernel_evaluation=KERNEL_EVALUATION, minimum_chunk_size=MINIMUM_CHUNK_SIZE,
+                          max_pending_games=MAX_PENDING_GAMES, batch_delay=BATCH_DELAY)
@@ -0,0 +1,11 @@
+from engine.executors import run_worker
+from engine.kernel import JIT_AVAILABLE
+
+# Worker node arguments, COORDINATOR_ADDRESS is the (host, port) the coordinator of evolution.py listens on.
+COORDINATOR_ADDRESS = ('127.0.0.1', 7778)
+PROCESSES = None
+BATCH_EVALUATION = True
+KERNEL_EVALUATION = JIT_AVAILABLE
+
+if __name__ == '__main__':
+    run_worker(COORDINATOR_ADDRESS, PROCESSES, BATCH_EVALUATION, KERNEL_EVALUATION)
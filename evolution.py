@@ -1,9 +1,28 @@
-from multiprocessing import Pool
-from random import Random
+from random import seed
+from sys import exit
+from time import time
 
-from femos.parser import handle_evolution_run
+from femos.core import get_number_of_nn_weights, handle_epoch_summary
+from femos.genotypes import SimpleGenotype, UncorrelatedNStepSizeGenotype, UncorrelatedOneStepSizeGenotype
+from femos.parser import get_core_argument_parser, get_evolution_summary, simple_genotype_choice, summary_lookup, \
+    uncorrelated_n_step_size_genotype_choice, uncorrelated_one_step_size_genotype_choice
+from femos.phenotypes import Phenotype
+from femos.selections import get_age_based_offspring_selection, get_n_size_tournament_parent_selection, \
+    get_two_size_tournament_parent_selection
 
+from engine.cache import FitnessCache
+from engine.checkpoint import get_checkpointed_population
+from engine.curriculum import CurriculumScheduler, CurriculumStage
+from engine.evaluation import EvaluationService
+from engine.executors import Coordinator
+from engine.features import get_input_nodes
 from engine.game import Game
+from engine.kernel import JIT_AVAILABLE
+from engine.racing import FitnessAggregation, get_raced_fitness, get_score_bounds
+from engine.replay import ReplayRecorder
+from engine.seeding import EvaluationConfig, SeedStream
+from engine.server import EvaluationClient
+from engine.stats import GameStats
 
 # Game arguments
 GAME_BOARD_WIDTH = 18
@@ -11,47 +30,253 @@ GAME_BOARD_HEIGHT = 18
 SEED = 777
 INITIAL_SNAKE_LENGTH = 5
 SAME_ENVIRONMENT = False
+BATCH_EVALUATION = True
+# Compiled kernel games replace batch evaluation when numba is installed.
+KERNEL_EVALUATION = JIT_AVAILABLE
+LOAD_BALANCE_SUMMARY = False
+# Per-phase timers, counters and episode lengths of every generation, kept in generation_stats.
+COLLECT_STATS = False
+STATS_SUMMARY = False
+# Batch evaluation vectorizes across a chunk and kernel games are fast enough for task overhead to dominate, so both
+# benefit from bigger chunks than one game at a time.
+MINIMUM_CHUNK_SIZE = 16 if BATCH_EVALUATION or KERNEL_EVALUATION else 1
 
 SNACK_EATEN_POINTS = 4
 MOVING_TOWARD_SNACK_POINTS = 0.1
 MOVING_AWAY_SNACK_POINTS = -0.2
 MAX_POINTS_THRESHOLD = 10
 MIN_POINTS_THRESHOLD = -10
-INPUT_NODES = 8
+# Sensor based representations, e.g. FeatureBasedRepresentation(['snack_direction', 'danger', 'rays', 'direction']),
+# are only played by scalar games.
+GAME_REPRESENTATION_STRATEGY = Game.get_feature_based_game_representation_strategy
+INPUT_NODES = get_input_nodes(GAME_REPRESENTATION_STRATEGY, GAME_BOARD_WIDTH, GAME_BOARD_HEIGHT)
 OUTPUT_NODES = 3
 
-random_generator = Random(SEED)
+# Fitness arguments
+EPISODES_PER_PHENOTYPE = 1
+FITNESS_AGGREGATION = FitnessAggregation.MEAN
+FITNESS_QUANTILE = 0.25
+# Share of the population evaluated on all episodes, the rest stops once it can not beat them.
+RACING_SURVIVORS = 0.2
+
+# Fitness cache arguments, path of an on-disk store lets cached results survive restarts.
+FITNESS_CACHE_SIZE = 100000
+FITNESS_CACHE_PATH = None
+
+# Best phenotype of every generation is played again on its first seed and appended to this replay file, watch the
+# episodes with replay-snake-on-screen.py. None disables recording.
+CHAMPIONS_REPLAY_PATH = None
+
+# Games are sent to a shared evaluation-server.py at this (host, port) or Unix socket path instead of local worker
+# processes, the fitness cache and worker stats are then not used. None evaluates locally.
+EVALUATION_SERVER_ADDRESS = None
+# Games are handed out to worker nodes, started with evaluation-worker.py, which connect to this (host, port) of the
+# coordinator. Takes precedence over the evaluation server.
+COORDINATOR_ADDRESS = None
+
+# Population, random states and the best phenotype are written every CHECKPOINT_INTERVAL generations. With RESUME the
+# run continues from the latest checkpoint of CHECKPOINT_DIRECTORY, delete the directory to start over.
+CHECKPOINT_DIRECTORY = 'checkpoints'
+CHECKPOINT_INTERVAL = 5
+CHECKPOINTS_TO_KEEP = 3
+RESUME = True
+
+GAME_ARGUMENTS = {
+    'width': GAME_BOARD_WIDTH,
+    'height': GAME_BOARD_HEIGHT,
+    'game_representation_strategy': GAME_REPRESENTATION_STRATEGY,
+    'snake_length': INITIAL_SNAKE_LENGTH,
+    'snack_eaten_points': SNACK_EATEN_POINTS,
+    'moved_toward_snack_points': MOVING_TOWARD_SNACK_POINTS,
+    'moved_away_from_snack_points': MOVING_AWAY_SNACK_POINTS,
+    'max_points_threshold': MAX_POINTS_THRESHOLD,
+    'min_points_threshold': MIN_POINTS_THRESHOLD,
+}
+
+EVALUATION_CONFIG = EvaluationConfig(GAME_ARGUMENTS, EPISODES_PER_PHENOTYPE, SAME_ENVIRONMENT, SEED)
+
+# Curriculum mode starts on small boards with tight step budgets and moves to the next stage once the top of the
+# population reaches the milestone of a stage, given in points of that stage. Stages change game arguments above, so
+# the last stage plays GAME_ARGUMENTS. Board sizes only change with feature based representations.
+CURRICULUM = False
+CURRICULUM_STAGES = [
+    CurriculumStage({'width': 8, 'height': 8, 'snake_length': 3, 'max_points_threshold': 4,
+                     'max_steps_without_snack': 64}, None, 3),
+    CurriculumStage({'width': 12, 'height': 12, 'snake_length': 4, 'max_points_threshold': 8,
+                     'max_steps_without_snack': 144}, None, 7),
+    CurriculumStage({}, None, None),
+]
+# Quantile of population fitness compared with milestones and number of generations it has to stay above them
+CURRICULUM_FITNESS_QUANTILE = 0.9
+CURRICULUM_PATIENCE = 3
+
+seed_stream = SeedStream(EVALUATION_CONFIG.seed)
+curriculum = CurriculumScheduler(EVALUATION_CONFIG, CURRICULUM_STAGES, CURRICULUM_FITNESS_QUANTILE,
+                                 CURRICULUM_PATIENCE) if CURRICULUM else None
+fitness_cache = None
+evaluation_service = None
+# Game arguments evaluation_service was started with, it is replaced when the curriculum changes them.
+evaluation_game_arguments = None
+champion_recorder = None
+generation_stats = []
+# Called with GameStats of every generation when stats are collected.
+stats_callback = None
+
+
+def get_evaluation_config():
+    return curriculum.get_evaluation_config() if curriculum is not None else EVALUATION_CONFIG
+
+
+def use_game_arguments(game_arguments):
+    global evaluation_service, evaluation_game_arguments
+
+    if evaluation_service is not None:
+        evaluation_service.close()
+
+    evaluation_service = get_game_executor(game_arguments)
+    evaluation_game_arguments = game_arguments
+
 
 def evaluation_strategy(phenotypes):
+    start_time = time()
+    evaluation_config = get_evaluation_config()
+    if curriculum is not None and evaluation_game_arguments is not evaluation_config.game_arguments:
+        use_game_arguments(evaluation_config.game_arguments)
+
+    first_stats_index = len(evaluation_service.stats)
     population_size = len(phenotypes)
-    game_board_widths = [GAME_BOARD_WIDTH] * population_size
-    game_board_heights = [GAME_BOARD_HEIGHT] * population_size
+    episode_seeds = seed_stream.get_generation_seeds(population_size, evaluation_config.episodes_per_phenotype,
+                                                     evaluation_config.same_environment)
 
-    if SAME_ENVIRONMENT:
-        evaluation_random_seed = random_generator.randint(1, 1000000)
-        seeds = [evaluation_random_seed] * population_size
-    else:
-        seeds = list(map(lambda index: random_generator.randint(1, 1000000), range(population_size)))
+    def evaluate_episodes(indices, seeds):
+        first_load_balance_index = len(evaluation_service.load_balances)
+        results = evaluation_service.evaluate([phenotypes[index] for index in indices], seeds)
+        # Only executors solving games locally report load balance, cached results solve no games at all.
+        if LOAD_BALANCE_SUMMARY:
+            for load_balance in evaluation_service.load_balances[first_load_balance_index:]:
+                print(load_balance.get_summary())
 
-    game_representation_strategies = [Game.get_feature_based_game_representation_strategy] * population_size 
-    initial_snake_lengths = [INITIAL_SNAKE_LENGTH] * population_size
-    snack_eaten_points = [SNACK_EATEN_POINTS] * population_size
-    moving_toward_snack_points = [MOVING_TOWARD_SNACK_POINTS] * population_size
-    moving_away_snack_points = [MOVING_AWAY_SNACK_POINTS] * population_size
-    max_points_thresholds = [MAX_POINTS_THRESHOLD] * population_size
-    min_points_thresholds = [MIN_POINTS_THRESHOLD] * population_size
-    arguments = list(zip(game_board_widths, game_board_heights, phenotypes, seeds, game_representation_strategies,
-                         initial_snake_lengths, snack_eaten_points, moving_toward_snack_points,
-                         moving_away_snack_points, max_points_thresholds, min_points_thresholds))
+        return list(map(lambda result: result.score, results))
 
-    initialized_games = list(map(lambda game_arguments: Game(*game_arguments), arguments))
+    survivors = max(1, round(RACING_SURVIVORS * population_size))
+    phenotype_values, played_episodes = get_raced_fitness(evaluate_episodes, episode_seeds,
+                                                          get_score_bounds(evaluation_config.game_arguments), survivors,
+                                                          FITNESS_AGGREGATION, FITNESS_QUANTILE)
 
-    with Pool() as p:
-        solved_games = p.map(Game.get_solved_game, initialized_games)
+    if champion_recorder is not None:
+        champion_index = max(range(population_size), key=lambda index: phenotype_values[index])
+        champion_recorder.record_game(Game(phenotype=phenotypes[champion_index], seed=episode_seeds[0][champion_index],
+                                           **evaluation_config.game_arguments))
 
-    phenotype_values = list(map(lambda solved_game: solved_game.score, solved_games))
+    if curriculum is not None and curriculum.update(phenotype_values):
+        print('Curriculum stage {} of {}'.format(curriculum.stage_index + 1, len(curriculum.stages)))
+
+    if COLLECT_STATS:
+        stats = GameStats.get_merged(evaluation_service.stats[first_stats_index:])
+        stats.add_time('generation', time() - start_time)
+        stats.count('played_episodes', sum(played_episodes))
+        generation_stats.append(stats)
+
+        if STATS_SUMMARY:
+            print(stats.get_summary())
+
+        if stats_callback is not None:
+            stats_callback(stats)
 
     return phenotype_values
 
 
-evolved_population = handle_evolution_run(INPUT_NODES, OUTPUT_NODES, evaluation_strategy)
+def get_initial_population(arguments):
+    number_of_nn_weights = get_number_of_nn_weights(INPUT_NODES, arguments.hidden_layer_nodes, OUTPUT_NODES,
+                                                    arguments.bias)
+
+    if arguments.genotype == simple_genotype_choice:
+        return SimpleGenotype.get_random_genotypes(arguments.population_size, number_of_nn_weights,
+                                                   arguments.weight_lower_threshold, arguments.weight_upper_threshold)
+
+    genotype_class = UncorrelatedOneStepSizeGenotype
+    if arguments.genotype == uncorrelated_n_step_size_genotype_choice:
+        genotype_class = UncorrelatedNStepSizeGenotype
+
+    return genotype_class.get_random_genotypes(arguments.population_size, number_of_nn_weights,
+                                               arguments.weight_lower_threshold, arguments.weight_upper_threshold,
+                                               arguments.mutation_step_size_lower_threshold,
+                                               arguments.mutation_step_size_upper_threshold)
+
+
+def get_game_executor(game_arguments):
+    if COORDINATOR_ADDRESS is not None:
+        host, port = COORDINATOR_ADDRESS
+        return Coordinator(game_arguments, host, port, minimum_chunk_size=MINIMUM_CHUNK_SIZE)
+
+    if EVALUATION_SERVER_ADDRESS is not None:
+        return EvaluationClient(game_arguments, EVALUATION_SERVER_ADDRESS)
+
+    return EvaluationService(game_arguments, BATCH_EVALUATION, minimum_chunk_size=MINIMUM_CHUNK_SIZE,
+                             fitness_cache=fitness_cache, kernel_evaluation=KERNEL_EVALUATION,
+                             collect_stats=COLLECT_STATS)
+
+
+def run_evolution(arguments):
+    # Same strategies as femos.parser.handle_evolution_run, the generation loop is checkpointed.
+    def phenotype_strategy(genotype):
+        return Phenotype.get_phenotype_from_genotype(genotype, INPUT_NODES, arguments.hidden_layer_nodes,
+                                                     OUTPUT_NODES, arguments.bias)
+
+    def parent_selection_strategy(phenotype_values):
+        if arguments.tournament_size == 2:
+            return get_two_size_tournament_parent_selection(phenotype_values, arguments.population_size)
+
+        return get_n_size_tournament_parent_selection(phenotype_values, arguments.tournament_size,
+                                                      arguments.population_size)
+
+    def mutation_strategy(genotype):
+        if arguments.genotype == simple_genotype_choice:
+            return SimpleGenotype.get_mutated_genotype(genotype, arguments.mutation_mean,
+                                                       arguments.mutation_standard_deviation)
+
+        if arguments.genotype == uncorrelated_one_step_size_genotype_choice:
+            return UncorrelatedOneStepSizeGenotype.get_mutated_genotype(genotype, arguments.tau1)
+
+        return UncorrelatedNStepSizeGenotype.get_mutated_genotype(genotype, arguments.tau1, arguments.tau2)
+
+    epoch_summary_strategy = None
+    if arguments.epoch_summary:
+        summary_features = list(map(lambda summary_choice: summary_lookup[summary_choice],
+                                    arguments.epoch_summary_features))
+        epoch_summary_strategy = [summary_features, arguments.epoch_summary_interval]
+
+    def epoch_callback(generation, phenotype_values, start_time, end_time):
+        handle_epoch_summary(epoch_summary_strategy, generation, phenotype_values, start_time, end_time)
+
+    # Random module mutates and selects, a fixed seed makes the whole run repeatable.
+    seed(SEED)
+    return get_checkpointed_population(get_initial_population(arguments), phenotype_strategy, evaluation_strategy,
+                                       parent_selection_strategy, mutation_strategy,
+                                       get_age_based_offspring_selection, seed_stream, CHECKPOINT_DIRECTORY,
+                                       CHECKPOINT_INTERVAL, CHECKPOINTS_TO_KEEP, RESUME, arguments.duration,
+                                       epoch_callback=epoch_callback, curriculum=curriculum)
+
+
+if __name__ == '__main__':
+    arguments = get_core_argument_parser().parse_args()
+    print(get_evolution_summary(arguments, INPUT_NODES, OUTPUT_NODES))
+    if arguments.dry_run:
+        exit(0)
+
+    fitness_cache = FitnessCache(FITNESS_CACHE_SIZE, FITNESS_CACHE_PATH)
+    if CHAMPIONS_REPLAY_PATH is not None:
+        champion_recorder = ReplayRecorder(CHAMPIONS_REPLAY_PATH)
+
+    # Curriculum replaces the executor when a stage changes game arguments, the current one is closed at the end.
+    use_game_arguments(get_evaluation_config().game_arguments)
+    try:
+        last_checkpoint = run_evolution(arguments)
+    finally:
+        evaluation_service.close()
+
+    print('Generation {}, best fitness: {}'.format(last_checkpoint.generation, last_checkpoint.best_fitness))
+
+    fitness_cache.close()
+    if champion_recorder is not None:
+        champion_recorder.close()
@@ -1,11 +1,10 @@
-from sys import exit
-
 import pygame
 from femos.core import get_number_of_nn_weights
 from femos.genotypes import UncorrelatedNStepSizeGenotype
 from femos.phenotypes import Phenotype
 
 from engine.game import Game
+from engine.renderer import Renderer
 
 game_board_width = 6
 game_board_height = 6
@@ -33,40 +32,7 @@ game = Game(game_board_width, game_board_height, phenotype, seed, Game.get_full_
 pygame.init()
 
 scale = 24
-game_screen_width = game_board_width * scale
-game_screen_height = game_board_height * scale
-background_color = (255, 255, 255)
-snake_color = (0, 255, 0)
-snack_color = (255, 0, 0)
 delay = 150
 
-screen = pygame.display.set_mode((game_screen_width, game_screen_height))
-
-while 1:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            exit()
-
-    # Print game
-    screen.fill(background_color)
-
-    for index, selected_snake_block in enumerate(game.snake):
-        block_alpha = 255 / (index + 1)
-
-        snake_block = pygame.Surface((1 * scale, 1 * scale))
-        snake_block.set_alpha(block_alpha)
-        snake_block.fill(snake_color)
-        top_x = selected_snake_block[0] * scale
-        top_y = selected_snake_block[1] * scale
-        screen.blit(snake_block, (top_x, top_y))
-
-    snack_block = pygame.Surface((1 * scale, 1 * scale))
-    snack_block.fill(snack_color)
-    top_x = game.snack[0] * scale
-    top_y = game.snack[1] * scale
-    screen.blit(snack_block, (top_x, top_y))
-
-    pygame.display.update()
-    pygame.time.wait(delay)
-
-    game = Game.get_next_game(game)
+# Game keeps being stepped after it ended, like an endless loop of get_next_game.
+Renderer([game], scale).run(steps_per_second=1000 / delay, until_ended=False)
@@ -0,0 +1,34 @@
+from sys import exit
+
+import pygame
+from femos.phenotypes import Phenotype
+
+import evolution
+from engine.checkpoint import load_latest_checkpoint
+from engine.game import Game
+from engine.renderer import Renderer
+
+# Hidden layer nodes and bias the checkpointed run was started with, see --hidden_layer_nodes and --bias of
+# evolution.py.
+hidden_layer_nodes = [16]
+use_bias = False
+seed = 777
+
+checkpoint = load_latest_checkpoint(evolution.CHECKPOINT_DIRECTORY)
+if checkpoint is None:
+    print('No checkpoint in {}'.format(evolution.CHECKPOINT_DIRECTORY))
+    exit(1)
+
+print('Generation {}, best fitness: {}'.format(checkpoint.generation, checkpoint.best_fitness))
+
+# Whole population plays the same game side by side.
+games = [Game(phenotype=Phenotype.get_phenotype_from_genotype(genotype, evolution.INPUT_NODES, hidden_layer_nodes,
+                                                              evolution.OUTPUT_NODES, use_bias),
+              seed=seed, **evolution.GAME_ARGUMENTS) for genotype in checkpoint.population]
+
+pygame.init()
+
+scale = 6
+steps_per_second = 10
+
+Renderer(games, scale).run(steps_per_second)
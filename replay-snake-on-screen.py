@@ -0,0 +1,51 @@
+from sys import exit
+
+import pygame
+
+from engine.renderer import BlockSurfaces, BoardView
+from engine.replay import ReplayReader
+
+replay_path = 'champions.replay'
+# Episodes to play, in the order of the replay file. Negative indices count from the last recorded episode.
+episode_indices = [-1]
+
+reader = ReplayReader(replay_path)
+
+pygame.init()
+
+scale = 24
+delay = 150
+frames_per_second = 60
+
+block_surfaces = BlockSurfaces(scale)
+clock = pygame.time.Clock()
+
+for episode_index in episode_indices:
+    replay = reader[episode_index]
+    print('Episode {}: seed {}, score {:.2f}, {} steps, {}'.format(episode_index, replay.seed, replay.score,
+                                                                 replay.number_of_steps, replay.end_reason))
+
+    game_screen_width = replay.game_arguments['width'] * scale
+    game_screen_height = replay.game_arguments['height'] * scale
+    screen = pygame.display.set_mode((game_screen_width, game_screen_height))
+
+    # Game is replayed step by step from the memory mapped file, only changed cells are drawn.
+    replayed_games = reader.get_replayed_games(replay)
+    view = BoardView(next(replayed_games), 0, 0, block_surfaces)
+    pygame.display.update(view.draw(screen, full=True))
+    next_step_time = pygame.time.get_ticks() + delay
+
+    for game in replayed_games:
+        # Frames are drawn at their own rate while waiting for the next step.
+        while pygame.time.get_ticks() < next_step_time:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    reader.close()
+                    exit()
+
+            clock.tick(frames_per_second)
+
+        next_step_time += delay
+        pygame.display.update(view.draw(screen))
+
+reader.close()
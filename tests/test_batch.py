@@ -0,0 +1,109 @@
+from femos.core import get_number_of_nn_weights
+from femos.genotypes import SimpleGenotype
+from femos.phenotypes import Phenotype
+
+from engine.batch import BatchGame
+from engine.game import Game, GameStatus
+
+
+def get_sample_phenotypes(number_of_phenotypes, input_nodes, hidden_layer_nodes, output_nodes, use_bias=False):
+    number_of_nn_weights = get_number_of_nn_weights(input_nodes, hidden_layer_nodes, output_nodes, use_bias)
+    weight_lower_threshold = -1
+    weight_upper_threshold = 1
+
+    sample_genotypes = SimpleGenotype.get_random_genotypes(number_of_phenotypes, number_of_nn_weights,
+                                                           weight_lower_threshold, weight_upper_threshold)
+    return [Phenotype(genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, use_bias) for genotype in
+            sample_genotypes]
+
+
+def test_batch_game_initialization():
+    snake_length = 5
+    width = 32
+    height = 18
+    seeds = [777, 778, 779]
+
+    phenotypes = get_sample_phenotypes(len(seeds), width * height + 4, [64], 3)
+    batch_game = BatchGame(width, height, phenotypes, seeds, BatchGame.get_full_game_representation_strategy,
+                           snake_length)
+
+    for index, seed in enumerate(seeds):
+        game = Game(width, height, phenotypes[index], seed, Game.get_full_game_representation_strategy,
+                    snake_length)
+        assert batch_game.get_snake(index) == game.snake
+        assert batch_game.get_snack(index) == game.snack
+        assert batch_game.last_snack_distances[index] == game.last_snack_distance
+
+    assert batch_game.occupancy.sum() == len(seeds) * snake_length
+
+
+def test_batch_game_full_representation():
+    snake_length = 3
+    width = 8
+    height = 8
+
+    phenotypes = get_sample_phenotypes(2, width * height + 4, [64], 3)
+    batch_game = BatchGame(width, height, phenotypes, [777, 778], BatchGame.get_full_game_representation_strategy,
+                           snake_length)
+    game = Game(width, height, phenotypes[0], 777, Game.get_full_game_representation_strategy, snake_length)
+
+    game_representations = BatchGame.get_full_game_representation_strategy(batch_game, [0, 1])
+    assert game_representations.shape == (2, width * height + 4)
+    assert game_representations[0].tolist() == Game.get_full_game_representation_strategy(game).tolist()
+
+
+def test_batch_game_solved_games_match_scalar_games():
+    width = 10
+    height = 10
+    snake_length = 4
+    seeds = list(range(1, 21))
+    strategies = [
+        (BatchGame.get_full_game_representation_strategy, Game.get_full_game_representation_strategy,
+         width * height + 4),
+        (BatchGame.get_feature_based_game_representation_strategy,
+         Game.get_feature_based_game_representation_strategy, 8),
+    ]
+
+    for batch_strategy, game_strategy, input_nodes in strategies:
+        # Phenotypes with and without bias are stacked separately.
+        phenotypes = get_sample_phenotypes(len(seeds) // 2, input_nodes, [16], 3) + \
+            get_sample_phenotypes(len(seeds) - len(seeds) // 2, input_nodes, [16], 3, True)
+        batch_game = BatchGame(width, height, phenotypes, seeds, batch_strategy, snake_length,
+                               snack_eaten_points=4, max_points_threshold=20)
+        BatchGame.get_solved_batch_game(batch_game)
+
+        assert len(batch_game.get_live_indices()) == 0
+        for index, seed in enumerate(seeds):
+            game = Game(width, height, phenotypes[index], seed, game_strategy, snake_length,
+                        snack_eaten_points=4, max_points_threshold=20)
+            solved_game = Game.get_solved_game(game)
+
+            assert solved_game.status == GameStatus.ENDED
+            assert batch_game.scores[index] == solved_game.score
+            assert batch_game.get_snake(index) == solved_game.snake
+            assert batch_game.get_snack(index) == solved_game.snack
+            assert batch_game.steps[index] == solved_game.steps
+            assert batch_game.end_reasons[index] == solved_game.end_reason.value
+
+
+def test_batch_game_step_budgets_match_scalar_games():
+    width = 10
+    height = 10
+    snake_length = 4
+    seeds = list(range(1, 21))
+    game_arguments = {'snack_eaten_points': 4, 'max_points_threshold': 20, 'min_points_threshold': -1000,
+                      'max_steps': 60, 'max_steps_without_snack': 25}
+
+    phenotypes = get_sample_phenotypes(len(seeds), 8, [16], 3)
+    batch_game = BatchGame(width, height, phenotypes, seeds, BatchGame.get_feature_based_game_representation_strategy,
+                           snake_length, **game_arguments)
+    BatchGame.get_solved_batch_game(batch_game)
+
+    for index, seed in enumerate(seeds):
+        game = Game(width, height, phenotypes[index], seed, Game.get_feature_based_game_representation_strategy,
+                    snake_length, **game_arguments)
+        game_result = Game.get_solved_game_result(game)
+
+        assert batch_game.scores[index] == game_result.score
+        assert batch_game.steps[index] == game_result.steps
+        assert batch_game.end_reasons[index] == game_result.end_reason
@@ -0,0 +1,45 @@
+from engine.benchmark import get_benchmark_phenotypes, get_regressions, get_result, load_results, \
+    measure_episodes_per_second, measure_steps_per_second, save_results
+
+
+def test_benchmark_phenotypes_are_reproducible():
+    phenotypes = get_benchmark_phenotypes(2, 8, [4], 3)
+    same_phenotypes = get_benchmark_phenotypes(2, 8, [4], 3)
+
+    assert phenotypes[0].layers[0].tolist() == same_phenotypes[0].layers[0].tolist()
+    assert phenotypes[0].layers[0].tolist() != phenotypes[1].layers[0].tolist()
+
+    phenotype = get_benchmark_phenotypes(1, 8, [4], 3, use_bias=True)[0]
+    assert phenotype.use_bias
+    assert [bias_layer.shape for bias_layer in phenotype.bias_layers] == [(1, 4), (1, 3)]
+
+
+def test_game_benchmarks():
+    assert measure_steps_per_second(6, 6, 'features', number_of_games=2, minimum_duration=0) > 0
+    assert measure_episodes_per_second(6, 6, 'full', number_of_games=2, minimum_duration=0) > 0
+
+
+def test_get_regressions(tmp_path):
+    baseline = {
+        'steps_per_second': get_result(1000, 'steps/s', True),
+        'episodes_per_second': get_result(100, 'episodes/s', True),
+        'generation_seconds': get_result(2.0, 's', False),
+        'removed': get_result(1, 's', False),
+    }
+    results = {
+        'steps_per_second': get_result(850, 'steps/s', True),
+        'episodes_per_second': get_result(95, 'episodes/s', True),
+        'generation_seconds': get_result(2.5, 's', False),
+        'added': get_result(1, 's', False),
+    }
+
+    path = str(tmp_path / 'baseline.json')
+    save_results(baseline, path)
+    assert load_results(path) == baseline
+
+    regressions = get_regressions(results, load_results(path), tolerance=0.1)
+    assert [regression[0] for regression in regressions] == ['generation_seconds', 'steps_per_second']
+    assert regressions[0][3] == -0.25
+    assert regressions[1][3] == -0.15
+
+    assert get_regressions(results, baseline, tolerance=0.3) == []
@@ -0,0 +1,101 @@
+from os import path
+
+from femos.phenotypes import Phenotype
+from numpy import array, concatenate
+
+from engine.cache import FitnessCache, get_configuration_digest
+from engine.evaluation import EvaluationService, get_phenotype_weights
+from engine.game import Game
+from tests.test_batch import get_sample_phenotypes
+from tests.test_evaluation import get_game_arguments
+
+
+def test_get_configuration_digest():
+    game_arguments = get_game_arguments()
+    assert get_configuration_digest(game_arguments) == get_configuration_digest(dict(game_arguments))
+
+    game_arguments['game_representation_strategy'] = Game.get_feature_based_game_representation_strategy
+    assert get_configuration_digest(game_arguments) != get_configuration_digest(get_game_arguments())
+
+    game_arguments = get_game_arguments()
+    game_arguments['max_points_threshold'] = 21
+    assert get_configuration_digest(game_arguments) != get_configuration_digest(get_game_arguments())
+
+
+def test_fitness_cache_keys_and_eviction():
+    configuration_digest = get_configuration_digest(get_game_arguments())
+    topology = (2, (2,), 1)
+    weights = array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
+
+    key = FitnessCache.get_key(configuration_digest, topology, weights, 7)
+    assert key == FitnessCache.get_key(configuration_digest, topology, weights.copy(), 7)
+    assert key != FitnessCache.get_key(configuration_digest, topology, weights, 8)
+    assert key != FitnessCache.get_key(configuration_digest, topology, weights * 2, 7)
+    assert key != FitnessCache.get_key(configuration_digest, (2, (1,), 2), weights, 7)
+
+    fitness_cache = FitnessCache(maximum_size=2)
+    fitness_cache.put('a', (1, 10, 3))
+    fitness_cache.put('b', (2, 20, 3))
+    assert fitness_cache.get('a') == (1, 10, 3)
+
+    # Least recently used entry is evicted
+    fitness_cache.put('c', (3, 30, 3))
+    assert len(fitness_cache) == 2
+    assert fitness_cache.get('b') is None
+    assert fitness_cache.get('a') == (1, 10, 3)
+    assert fitness_cache.hits == 2
+    assert fitness_cache.misses == 1
+
+
+def test_fitness_cache_store(tmp_path):
+    store_path = path.join(str(tmp_path), 'fitness')
+
+    fitness_cache = FitnessCache(maximum_size=1, path=store_path)
+    fitness_cache.put('a', (1, 10, 3))
+    fitness_cache.put('b', (2, 20, 3))
+    assert fitness_cache.get('a') == (1, 10, 3)
+    fitness_cache.close()
+
+    fitness_cache = FitnessCache(path=store_path)
+    assert fitness_cache.get('b') == (2, 20, 3)
+    assert fitness_cache.get('c') is None
+    fitness_cache.close()
+
+
+def test_evaluation_service_with_fitness_cache():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(8, 10 * 10 + 4, [16], 3)
+    phenotypes = phenotypes + phenotypes[:4]
+    seeds = [1] * 12
+
+    fitness_cache = FitnessCache()
+    with EvaluationService(game_arguments, processes=2, fitness_cache=fitness_cache) as evaluation_service:
+        results = evaluation_service.evaluate(phenotypes, seeds)
+
+        # Repeated phenotypes are solved only once
+        assert sum(evaluation_service.load_balances[-1].chunk_sizes) == 8
+        assert results[8:] == results[:4]
+
+        assert evaluation_service.evaluate(phenotypes, seeds) == results
+        assert len(evaluation_service.load_balances) == 1
+        assert fitness_cache.hits == 12
+
+
+def test_evaluation_service_with_fitness_cache_tells_bias_apart():
+    game_arguments = get_game_arguments()
+    phenotype = get_sample_phenotypes(1, 10 * 10 + 4, [16], 3)[0]
+    weights = get_phenotype_weights(phenotype)
+    bias_phenotype = Phenotype(concatenate([weights, [1.0] * 16 + [-1.0, 1.0, -1.0]]), 10 * 10 + 4, [16], 3, True)
+
+    configuration_digest = get_configuration_digest(game_arguments)
+    assert FitnessCache.get_key(configuration_digest, EvaluationService.get_topology(phenotype), weights, 1) != \
+        FitnessCache.get_key(configuration_digest, EvaluationService.get_topology(bias_phenotype),
+                             get_phenotype_weights(bias_phenotype), 1)
+
+    fitness_cache = FitnessCache()
+    with EvaluationService(game_arguments, processes=1, fitness_cache=fitness_cache) as evaluation_service:
+        evaluation_service.evaluate([phenotype], [1])
+        results = evaluation_service.evaluate([bias_phenotype], [1])
+
+        assert fitness_cache.hits == 0
+        assert results == [Game.get_solved_game_result(Game(phenotype=bias_phenotype, seed=1, **game_arguments))]
@@ -0,0 +1,45 @@
+from random import Random
+
+from engine.cells import FreeCellPool
+
+
+def test_free_cell_pool_swap_remove():
+    pool = FreeCellPool(10)
+    pool.remove(3)
+    pool.remove(9)
+    pool.remove(0)
+
+    assert len(pool) == 7
+    assert sorted(pool.cells) == [1, 2, 4, 5, 6, 7, 8]
+    assert 3 not in pool
+    assert 4 in pool
+
+    pool.add(3)
+    assert len(pool) == 8
+    assert 3 in pool
+
+    random_generator = Random(777)
+    for index in range(100):
+        assert pool.get_random_cell(random_generator) in [1, 2, 3, 4, 5, 6, 7, 8]
+
+
+def test_ordered_free_cell_pool_matches_random_choice():
+    number_of_cells = 18 * 18
+    pool = FreeCellPool(number_of_cells, ordered=True)
+    free_cells = set(range(number_of_cells))
+
+    pool_random_generator = Random(777)
+    choice_random_generator = Random(777)
+    changes_random_generator = Random(1)
+
+    for index in range(500):
+        cell = changes_random_generator.randrange(number_of_cells)
+        if cell in free_cells:
+            free_cells.remove(cell)
+            pool.remove(cell)
+        else:
+            free_cells.add(cell)
+            pool.add(cell)
+
+        expected_cell = choice_random_generator.choice(sorted(free_cells))
+        assert pool.get_random_cell(pool_random_generator) == expected_cell
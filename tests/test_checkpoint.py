@@ -0,0 +1,93 @@
+from random import Random, gauss, getstate, random, seed
+
+from femos.genotypes import SimpleGenotype, UncorrelatedNStepSizeGenotype, UncorrelatedOneStepSizeGenotype
+from femos.phenotypes import Phenotype
+from femos.selections import get_age_based_offspring_selection, get_two_size_tournament_parent_selection
+
+from engine.checkpoint import Checkpoint, get_checkpoint_paths, get_checkpointed_population, load_checkpoint, \
+    load_latest_checkpoint, save_checkpoint
+
+
+def get_evolution_strategies(random_generator):
+    def phenotype_strategy(genotype):
+        return Phenotype.get_phenotype_from_genotype(genotype, 2, [2], 1)
+
+    def evaluation_strategy(phenotypes):
+        # Noisy fitness, so that evaluation depends on the state of the generator.
+        return [float(phenotype.layers[0].sum()) + random_generator.random() for phenotype in phenotypes]
+
+    def parent_selection_strategy(phenotype_values):
+        return get_two_size_tournament_parent_selection(phenotype_values, len(phenotype_values))
+
+    def mutation_strategy(genotype):
+        return UncorrelatedOneStepSizeGenotype.get_mutated_genotype(genotype, 0.1)
+
+    return phenotype_strategy, evaluation_strategy, parent_selection_strategy, mutation_strategy, \
+        get_age_based_offspring_selection
+
+
+def run_evolution(directory, epochs, resume=True, checkpoint_interval=2):
+    seed(3)
+    random_generator = Random(5)
+    initial_population = UncorrelatedOneStepSizeGenotype.get_random_genotypes(6, 6, -1, 1, 0.05, 0.2)
+
+    return get_checkpointed_population(initial_population, *get_evolution_strategies(random_generator),
+                                       random_generator, directory, checkpoint_interval, resume=resume,
+                                       epochs=epochs)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    directory = str(tmp_path)
+    populations = [
+        [SimpleGenotype([0.1, -0.2, 0.3]), SimpleGenotype([1 / 3, 2 / 3, 1.0])],
+        [UncorrelatedOneStepSizeGenotype([0.1, -0.2, 0.3], 0.05), UncorrelatedOneStepSizeGenotype([0, 1, 2], 1 / 7)],
+        [UncorrelatedNStepSizeGenotype([0.1, -0.2], [0.01, 0.02]), UncorrelatedNStepSizeGenotype([1, 2], [3, 4])],
+    ]
+
+    # Gaussian of the pair which is not returned yet is part of the state.
+    seed(11)
+    gauss(0, 1)
+    generator = Random(13)
+
+    for generation, population in enumerate(populations):
+        checkpoint = Checkpoint(generation, population, getstate(), generator.getstate(), [0.5, 0.25], 2.5)
+        loaded_checkpoint = load_checkpoint(save_checkpoint(directory, checkpoint))
+
+        assert loaded_checkpoint.generation == generation
+        assert type(loaded_checkpoint.population[0]) is type(population[0])
+        assert loaded_checkpoint.population == population
+        assert loaded_checkpoint.random_state == getstate()
+        assert loaded_checkpoint.generator_state == generator.getstate()
+        assert loaded_checkpoint.best_weights == [0.5, 0.25]
+        assert loaded_checkpoint.best_fitness == 2.5
+
+    assert load_latest_checkpoint(directory).generation == 2
+
+    # SeedStream state is a number of generations.
+    save_checkpoint(directory, Checkpoint(3, populations[0], getstate(), 42, None, None), 2)
+    assert len(get_checkpoint_paths(directory)) == 2
+    assert load_latest_checkpoint(directory).best_fitness is None
+    assert load_latest_checkpoint(directory).generator_state == 42
+    assert load_latest_checkpoint(str(tmp_path.joinpath('missing'))) is None
+
+
+def test_resumed_evolution_matches_uninterrupted_run(tmp_path):
+    uninterrupted_checkpoint = run_evolution(str(tmp_path.joinpath('uninterrupted')), 7)
+    uninterrupted_next_random = random()
+
+    # Last generation is written when a run stops, also when it is not on the checkpoint interval.
+    interrupted_directory = str(tmp_path.joinpath('interrupted'))
+    assert run_evolution(interrupted_directory, 3, checkpoint_interval=2).generation == 3
+    checkpoint_paths = get_checkpoint_paths(interrupted_directory)
+    assert len(checkpoint_paths) == 2
+    resumed_checkpoint = run_evolution(interrupted_directory, 7)
+
+    assert resumed_checkpoint.generation == 7
+    assert resumed_checkpoint.population == uninterrupted_checkpoint.population
+    assert resumed_checkpoint.generator_state == uninterrupted_checkpoint.generator_state
+    assert resumed_checkpoint.best_weights == uninterrupted_checkpoint.best_weights
+    assert resumed_checkpoint.best_fitness == uninterrupted_checkpoint.best_fitness
+    assert random() == uninterrupted_next_random
+
+    # Without resume the checkpoints are ignored and the run starts over.
+    assert run_evolution(interrupted_directory, 1, resume=False).generation == 1
@@ -0,0 +1,85 @@
+from random import Random, getstate
+
+from femos.genotypes import SimpleGenotype
+from pytest import raises
+
+from engine.checkpoint import Checkpoint, load_checkpoint, save_checkpoint
+from engine.curriculum import CurriculumScheduler, CurriculumStage
+from engine.features import FeatureBasedRepresentation
+from engine.game import Game
+from engine.seeding import EvaluationConfig
+from tests.test_evaluation import get_game_arguments
+
+
+def get_curriculum_stages():
+    return [CurriculumStage({'width': 6, 'height': 6, 'snake_length': 3, 'max_points_threshold': 4}, 3, 3),
+            CurriculumStage({'width': 8, 'height': 8, 'max_steps_without_snack': 64}, None, 8),
+            CurriculumStage({}, None, None)]
+
+
+def get_evaluation_config(game_representation_strategy=Game.get_feature_based_game_representation_strategy):
+    game_arguments = get_game_arguments()
+    game_arguments['game_representation_strategy'] = game_representation_strategy
+    return EvaluationConfig(game_arguments, 1, False, 777)
+
+
+def test_curriculum_stages():
+    evaluation_config = get_evaluation_config()
+    curriculum = CurriculumScheduler(evaluation_config, get_curriculum_stages(), fitness_quantile=0.5, patience=2)
+
+    first_config = curriculum.get_evaluation_config()
+    assert first_config.game_arguments['width'] == 6
+    assert first_config.game_arguments['snake_length'] == 3
+    assert first_config.game_arguments['snack_eaten_points'] == 4
+    assert first_config.episodes_per_phenotype == 3
+    assert first_config.seed == 777
+
+    # Milestone has to be reached in consecutive generations.
+    assert not curriculum.update([0, 3, 4])
+    assert not curriculum.update([0, 1, 2])
+    assert not curriculum.update([3, 3, 0])
+    assert curriculum.get_evaluation_config() is first_config
+    assert curriculum.update([4, 4, 0])
+
+    second_config = curriculum.get_evaluation_config()
+    assert second_config.game_arguments['width'] == 8
+    assert second_config.game_arguments['snake_length'] == 4
+    assert second_config.game_arguments['max_steps_without_snack'] == 64
+    assert second_config.episodes_per_phenotype == 1
+
+    state = curriculum.getstate()
+    assert not curriculum.update([10, 10])
+    assert curriculum.update([10, 10])
+
+    # Last stage plays the configured game arguments for the rest of the run.
+    last_config = curriculum.get_evaluation_config()
+    assert last_config.game_arguments == evaluation_config.game_arguments
+    assert not curriculum.update([100, 100])
+    assert not curriculum.update([100, 100])
+    assert curriculum.stage_index == 2
+
+    curriculum.setstate(state)
+    assert curriculum.get_evaluation_config() is second_config
+
+
+def test_curriculum_keeps_number_of_inputs():
+    stages = get_curriculum_stages()
+    CurriculumScheduler(get_evaluation_config(FeatureBasedRepresentation(['danger', 'rays'])), stages)
+
+    with raises(ValueError):
+        CurriculumScheduler(get_evaluation_config(Game.get_full_game_representation_strategy), stages)
+
+    # Full representation works as long as the board keeps its size.
+    CurriculumScheduler(get_evaluation_config(Game.get_full_game_representation_strategy),
+                        [CurriculumStage({'max_points_threshold': 4}, None, 3), CurriculumStage({}, None, None)])
+
+
+def test_curriculum_state_is_checkpointed(tmp_path):
+    curriculum = CurriculumScheduler(get_evaluation_config(), get_curriculum_stages(), patience=1)
+    curriculum.update([5, 5, 5])
+    checkpoint = Checkpoint(1, [SimpleGenotype([0.5])], getstate(), Random(1).getstate(), None, None,
+                            curriculum.getstate())
+
+    restored_curriculum = CurriculumScheduler(get_evaluation_config(), get_curriculum_stages())
+    restored_curriculum.setstate(load_checkpoint(save_checkpoint(str(tmp_path), checkpoint)).curriculum_state)
+    assert restored_curriculum.getstate() == (1, 0)
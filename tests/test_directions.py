@@ -0,0 +1,36 @@
+from engine.directions import AXES, DELTAS, KEEP_DIRECTION, ROTATE_LEFT, ROTATE_RIGHT, TURNS, TURN_TABLE
+from engine.game import Direction, Game, Prediction
+
+
+def test_direction_codes_match_direction_enum():
+    assert [direction.value for direction in Direction] == [1, 2, 3, 4]
+    assert TURN_TABLE.tolist() == [list(turns) for turns in TURNS]
+
+    for direction in Direction:
+        delta_x, delta_y = DELTAS[direction.value]
+        assert abs(delta_x) + abs(delta_y) == 1
+        assert AXES[direction.value] == (delta_x == 0)
+
+
+def test_turns_match_predictions():
+    predictions = {ROTATE_RIGHT: Prediction.ROTATE_RIGHT, ROTATE_LEFT: Prediction.ROTATE_LEFT,
+                   KEEP_DIRECTION: Prediction.KEEP_DIRECTION}
+    expected_directions = {
+        (Direction.LEFT, Prediction.ROTATE_RIGHT): Direction.UP,
+        (Direction.LEFT, Prediction.ROTATE_LEFT): Direction.DOWN,
+        (Direction.RIGHT, Prediction.ROTATE_RIGHT): Direction.DOWN,
+        (Direction.RIGHT, Prediction.ROTATE_LEFT): Direction.UP,
+        (Direction.UP, Prediction.ROTATE_RIGHT): Direction.RIGHT,
+        (Direction.UP, Prediction.ROTATE_LEFT): Direction.LEFT,
+        (Direction.DOWN, Prediction.ROTATE_RIGHT): Direction.DOWN,
+        (Direction.DOWN, Prediction.ROTATE_LEFT): Direction.RIGHT,
+    }
+
+    for direction in Direction:
+        for action, prediction in predictions.items():
+            expected_direction = expected_directions.get((direction, prediction), direction)
+            assert TURNS[direction.value][action] == expected_direction.value
+
+            one_hot_prediction = [0, 0, 0]
+            one_hot_prediction[action] = 1
+            assert Game.get_new_direction_from_prediction(one_hot_prediction, direction) is expected_direction
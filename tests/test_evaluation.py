@@ -0,0 +1,115 @@
+from engine.cells import SnackPlacement
+from engine.evaluation import EvaluationService, get_phenotype, get_phenotype_weights, solve_phenotype_games
+from engine.game import Game, GameEndReason
+from tests.test_batch import get_sample_phenotypes
+
+
+def get_game_arguments():
+    return {'width': 10, 'height': 10, 'game_representation_strategy': Game.get_full_game_representation_strategy,
+            'snake_length': 4, 'snack_eaten_points': 4, 'max_points_threshold': 20}
+
+
+def test_get_phenotype_weights():
+    phenotype = get_sample_phenotypes(1, 8, [16], 3)[0]
+    weights = get_phenotype_weights(phenotype)
+
+    assert len(weights) == 8 * 16 + 16 * 3
+    assert weights[0] == phenotype.layers[0][0][0]
+    assert weights[-1] == phenotype.layers[1][-1][-1]
+
+
+def test_get_phenotype_weights_with_bias():
+    phenotype = get_sample_phenotypes(1, 8, [16], 3, True)[0]
+    weights = get_phenotype_weights(phenotype)
+
+    assert len(weights) == 8 * 16 + 16 * 3 + 16 + 3
+    assert weights[-1] == phenotype.bias_layers[1][-1][-1]
+
+    rebuilt_phenotype = get_phenotype(weights, EvaluationService.get_topology(phenotype))
+    assert rebuilt_phenotype.use_bias
+    assert (get_phenotype_weights(rebuilt_phenotype) == weights).all()
+
+
+def test_evaluation_service_matches_games():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(12, 10 * 10 + 4, [16], 3)
+    seeds = list(range(1, 13))
+
+    expected_results = []
+    for phenotype, seed in zip(phenotypes, seeds):
+        expected_results.append(Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **game_arguments)))
+
+    for batch_evaluation, kernel_evaluation in [(False, False), (True, False), (False, True)]:
+        with EvaluationService(game_arguments, batch_evaluation, processes=2,
+                               kernel_evaluation=kernel_evaluation) as evaluation_service:
+            assert evaluation_service.evaluate(phenotypes, seeds) == expected_results
+
+            # Weights are moved to a bigger block when population grows
+            more_phenotypes = phenotypes + get_sample_phenotypes(20, 10 * 10 + 4, [16], 3)
+            results = evaluation_service.evaluate(more_phenotypes, list(range(1, 33)))
+            assert len(results) == 32
+            assert results[:12] == expected_results
+
+            for result in results:
+                assert GameEndReason(result.end_reason) is not None
+
+
+def test_evaluation_service_matches_games_with_bias():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(8, 10 * 10 + 4, [16], 3, True)
+    seeds = list(range(1, 9))
+
+    expected_results = [Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **game_arguments)) for
+                        phenotype, seed in zip(phenotypes, seeds)]
+
+    for batch_evaluation, kernel_evaluation in [(False, False), (True, False), (False, True)]:
+        with EvaluationService(game_arguments, batch_evaluation, processes=2,
+                               kernel_evaluation=kernel_evaluation) as evaluation_service:
+            assert evaluation_service.evaluate(phenotypes, seeds) == expected_results
+
+
+def test_solve_phenotype_games_with_scalar_game_arguments():
+    phenotypes = get_sample_phenotypes(6, 10 * 10 + 4, [16], 3)
+    seeds = list(range(1, 7))
+
+    # Batch games take the defaults of these arguments, other values fall back to scalar games.
+    for extra_game_arguments in [{'detect_cycles': False}, {'snack_placement': SnackPlacement.COMPATIBLE},
+                                 {'detect_cycles': True}, {'snack_placement': SnackPlacement.FAST}]:
+        game_arguments = get_game_arguments()
+        game_arguments.update(extra_game_arguments)
+        expected_results = [Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **game_arguments)) for
+                            phenotype, seed in zip(phenotypes, seeds)]
+
+        assert solve_phenotype_games(phenotypes, seeds, game_arguments, True, False) == expected_results
+
+
+def test_get_chunk_sizes():
+    chunk_sizes = EvaluationService.get_chunk_sizes(1000, 4)
+    assert sum(chunk_sizes) == 1000
+    assert chunk_sizes[0] == 125
+    assert chunk_sizes[-1] == 1
+    assert chunk_sizes == sorted(chunk_sizes, reverse=True)
+
+    chunk_sizes = EvaluationService.get_chunk_sizes(1000, 4, minimum_chunk_size=16)
+    assert sum(chunk_sizes) == 1000
+    assert min(chunk_sizes[:-1]) == 16
+
+    assert EvaluationService.get_chunk_sizes(3, 8) == [1, 1, 1]
+    assert EvaluationService.get_chunk_sizes(0, 8) == []
+
+
+def test_evaluation_service_load_balance():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(40, 10 * 10 + 4, [16], 3)
+
+    with EvaluationService(game_arguments, processes=2) as evaluation_service:
+        evaluation_service.evaluate(phenotypes, list(range(40)))
+        evaluation_service.evaluate(phenotypes, list(range(40, 80)))
+
+        assert len(evaluation_service.load_balances) == 2
+        load_balance = evaluation_service.load_balances[-1]
+        assert sum(load_balance.chunk_sizes) == 40
+        assert 0 <= load_balance.utilization <= 1
+        assert load_balance.imbalance >= 1
+        assert load_balance.tail_time >= 0
+        assert 'utilization' in load_balance.get_summary()
@@ -0,0 +1,108 @@
+from socket import create_connection
+from threading import Thread
+from time import sleep
+
+from pytest import raises
+
+from engine.evaluation import GameExecutor
+from engine.executors import HELLO, LocalCluster
+from engine.game import Game
+from engine.server import get_message, read_file_message
+from tests.test_batch import get_sample_phenotypes
+from tests.test_evaluation import get_game_arguments
+
+
+def get_expected_results(game_arguments, phenotypes, seeds):
+    return [Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **game_arguments))
+            for phenotype, seed in zip(phenotypes, seeds)]
+
+
+def wait_for_workers(coordinator, number_of_workers):
+    while len(coordinator.workers) < number_of_workers:
+        sleep(0.01)
+
+
+def test_local_cluster_matches_games():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(20, 10 * 10 + 4, [16], 3)
+    seeds = list(range(1, 21))
+    expected_results = get_expected_results(game_arguments, phenotypes, seeds)
+
+    with LocalCluster(game_arguments, workers=2, minimum_chunk_size=2) as cluster:
+        wait_for_workers(cluster, 2)
+        assert cluster.evaluate(phenotypes, seeds) == expected_results
+        assert cluster.evaluate(phenotypes[:5], seeds[:5]) == expected_results[:5]
+        assert cluster.redispatched_tasks == 0
+
+
+def test_coordinator_redispatches_tasks_of_lost_workers():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(8, 10 * 10 + 4, [16], 3)
+    seeds = list(range(1, 9))
+    expected_results = get_expected_results(game_arguments, phenotypes, seeds)
+
+    with LocalCluster(game_arguments, workers=0, minimum_chunk_size=2, heartbeat_interval=0.05,
+                      heartbeat_timeout=0.5) as cluster:
+        # Worker which takes every task and then neither answers nor sends heartbeats
+        silent_worker = create_connection(cluster.address)
+        silent_worker.sendall(get_message({'type': HELLO, 'processes': 1, 'slots': 100}))
+        silent_worker_file = silent_worker.makefile('rb')
+        read_file_message(silent_worker_file)
+        wait_for_workers(cluster, 1)
+
+        # Worker whose connection breaks after its first task
+        broken_worker = create_connection(cluster.address)
+        broken_worker.sendall(get_message({'type': HELLO, 'processes': 1, 'slots': 100}))
+        broken_worker_file = broken_worker.makefile('rb')
+        read_file_message(broken_worker_file)
+        wait_for_workers(cluster, 2)
+
+        def break_connection():
+            read_file_message(broken_worker_file)
+            broken_worker_file.close()
+            broken_worker.close()
+
+        breaking = Thread(target=break_connection)
+        breaking.start()
+
+        cluster.start_worker()
+        wait_for_workers(cluster, 3)
+        assert cluster.evaluate(phenotypes, seeds) == expected_results
+        assert cluster.redispatched_tasks > 0
+
+        breaking.join()
+        silent_worker_file.close()
+        silent_worker.close()
+
+
+def test_coordinator_fails_with_worker_errors():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(4, 10 * 10 + 4, [16], 3)
+    seeds = list(range(1, 5))
+    expected_results = get_expected_results(game_arguments, phenotypes, seeds)
+    # Phenotypes with the wrong number of inputs fail in the workers.
+    wrong_phenotypes = get_sample_phenotypes(4, 10, [16], 3)
+
+    for processes_per_worker in [1, 2]:
+        with LocalCluster(game_arguments, workers=1, processes_per_worker=processes_per_worker,
+                          minimum_chunk_size=2) as cluster:
+            wait_for_workers(cluster, 1)
+            with raises(RuntimeError, match='Worker failed'):
+                cluster.evaluate(wrong_phenotypes, seeds)
+
+            # Worker survives the failed task.
+            assert cluster.evaluate(phenotypes, seeds) == expected_results
+
+
+def test_coordinator_fails_without_workers():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(2, 10 * 10 + 4, [16], 3)
+
+    with LocalCluster(game_arguments, workers=0, heartbeat_interval=0.05, worker_timeout=0.2) as cluster:
+        with raises(RuntimeError, match='No worker'):
+            cluster.evaluate(phenotypes, [1, 2])
+
+
+def test_game_executor_is_abstract():
+    with raises(TypeError):
+        GameExecutor()
@@ -0,0 +1,72 @@
+from pytest import approx
+
+from engine.cache import get_configuration_digest
+from engine.features import FeatureBasedRepresentation, GameSensors, get_input_nodes
+from engine.game import Direction, Game, GameStatus
+from tests.test_batch import get_sample_phenotypes
+
+
+def get_sample_game(width, height, snake, snack, direction):
+    phenotype = get_sample_phenotypes(1, 8, [4], 3)[0]
+    game = Game(width, height, phenotype, 777, Game.get_feature_based_game_representation_strategy, 3)
+    game.snake = snake
+    game.snack = snack
+    game.direction = direction
+    return game
+
+
+def test_feature_based_game_representation_strategy_uses_snack():
+    game = get_sample_game(8, 6, [(4, 3), (5, 3), (6, 3)], (1, 1), Direction.LEFT)
+    assert Game.get_feature_based_game_representation_strategy(game) == [1, 0, 0, 0, 1, 0, 0, 0]
+
+    game.snack = (4, 5)
+    game.direction = Direction.UP
+    assert Game.get_feature_based_game_representation_strategy(game) == [0, 0, 0, 1, 0, 0, 1, 0]
+
+
+def test_sensor_groups():
+    game = get_sample_game(8, 6, [(2, 2), (3, 2), (3, 3), (2, 3), (1, 3)], (5, 0), Direction.LEFT)
+
+    representation = FeatureBasedRepresentation(['snack_direction', 'danger', 'rays', 'flood_fill', 'direction'])
+    assert representation.input_nodes == 4 + 3 + 16 + 3 + 4
+
+    features = representation(game).tolist()
+    assert features[:4] == [0, 1, 0, 0]
+    # Rotating right leads up, rotating left down into the body and keeping direction left.
+    assert features[4:7] == [0, 1, 0]
+
+    # Tail block moves away with the next step, so it is not seen by the down-left ray.
+    wall_features = [1 / 3, 1 / 6, 1 / 3, 1 / 4, 1 / 3, 1 / 3, 1 / 3, 1 / 4]
+    body_features = [0, 1, 0, 1, 0, 0, 0, 1]
+    assert features[7:23] == approx(wall_features + body_features)
+
+    assert features[23:26] == approx([44 / 48, 0, 44 / 48])
+    assert features[26:] == [1, 0, 0, 0]
+
+
+def test_flood_fill_finds_enclosed_regions():
+    game = get_sample_game(5, 5, [(0, 1), (1, 1), (1, 0), (2, 0)], (4, 4), Direction.LEFT)
+
+    sensors = GameSensors(game)
+    assert sensors.get_action_targets() == [(0, 0), (0, 2), (-1, 1)]
+    assert sensors.get_reachable_cells((0, 0)) == 1
+    assert sensors.get_reachable_cells((0, 2)) == 21
+    assert sensors.get_reachable_cells((-1, 1)) == 0
+
+    representation = FeatureBasedRepresentation(['danger', 'flood_fill'])
+    assert representation(game).tolist() == approx([0, 0, 1, 1 / 25, 21 / 25, 0])
+
+
+def test_games_with_feature_based_representation():
+    representation = FeatureBasedRepresentation()
+    assert get_input_nodes(representation, 10, 10) == representation.input_nodes == 11
+    assert get_input_nodes(Game.get_full_game_representation_strategy, 10, 10) == 104
+    assert get_input_nodes(Game.get_feature_based_game_representation_strategy, 10, 10) == 8
+
+    # Representations with the same groups share fitness cache entries.
+    assert get_configuration_digest({'strategy': representation}) == get_configuration_digest(
+        {'strategy': FeatureBasedRepresentation(['snack_direction', 'danger', 'direction'])})
+
+    for phenotype in get_sample_phenotypes(5, representation.input_nodes, [4], 3):
+        game = Game(10, 10, phenotype, 777, representation)
+        assert Game.get_solved_game(game).status == GameStatus.ENDED
@@ -1,10 +1,13 @@
 from copy import deepcopy
+from itertools import product
+from pickle import dumps
 
 from femos.core import get_number_of_nn_weights
 from femos.genotypes import SimpleGenotype
 from femos.phenotypes import Phenotype
 
-from engine.game import Game, Direction, GameStatus
+from engine.cells import SnackPlacement
+from engine.game import Game, Direction, GameStatus, GameEndReason
 
 
 def test_game_initialization():
@@ -25,7 +28,7 @@ def test_game_initialization():
 
     sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
                                                          weight_upper_threshold)
-    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
 
     sample_game = Game(width, height, sample_phenotype, seed, game_representation_strategy, snake_length)
 
@@ -60,7 +63,7 @@ def test_snake_moves():
 
     sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
                                                          weight_upper_threshold)
-    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
     sample_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length)
 
     # Test snake going LEFT and changed to LEFT
@@ -252,7 +255,7 @@ def test_get_full_game_representation_strategy():
 
     sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
                                                          weight_upper_threshold)
-    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
     sample_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length)
 
     game_representation = Game.get_full_game_representation_strategy(sample_game)
@@ -280,7 +283,7 @@ def test_snake_points_assignment():
 
     sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
                                                          weight_upper_threshold)
-    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
 
     sample_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length,
                        snack_eaten_points)
@@ -319,7 +322,7 @@ def test_game_max_points_threshold():
 
     sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
                                                          weight_upper_threshold)
-    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
 
     sample_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length,
                        snack_eaten_points, max_points_threshold=max_points_threshold,
@@ -332,3 +335,286 @@ def test_game_max_points_threshold():
     next_game_state.score = -10
     next_game_state = Game.get_next_game(next_game_state)
     assert next_game_state.status == GameStatus.ENDED
+
+
+def test_game_steps_in_place_and_snapshots():
+    def game_representation_strategy(game):
+        return Game.get_full_game_representation_strategy(game)
+
+    snake_length = 5
+    width = 32
+    height = 18
+
+    input_nodes = width * height + 4
+    hidden_layer_nodes = [64]
+    output_nodes = 3
+    number_of_nn_weights = get_number_of_nn_weights(input_nodes, hidden_layer_nodes, output_nodes)
+    weight_lower_threshold = -1
+    weight_upper_threshold = 1
+
+    sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
+                                                         weight_upper_threshold)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
+    sample_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length)
+
+    game_snapshot = sample_game.snapshot()
+    assert game_snapshot is not sample_game
+    assert game_snapshot.phenotype is sample_game.phenotype
+    assert game_snapshot.snake == sample_game.snake
+
+    next_game = Game.get_next_game(sample_game)
+    assert next_game is sample_game
+    assert next_game.snake != game_snapshot.snake
+    assert game_snapshot.snake == [(16, 9), (17, 9), (18, 9), (19, 9), (20, 9)]
+
+    # Snapshot keeps its own random generator, so it replays the same game
+    Game.get_solved_game(sample_game)
+    Game.get_solved_game(game_snapshot)
+    assert game_snapshot.score == sample_game.score
+    assert game_snapshot.snake == sample_game.snake
+
+
+def test_snake_occupancy_and_collisions():
+    def game_representation_strategy(game):
+        return Game.get_full_game_representation_strategy(game)
+
+    snake_length = 5
+    width = 32
+    height = 18
+
+    input_nodes = width * height + 4
+    hidden_layer_nodes = [64]
+    output_nodes = 3
+    number_of_nn_weights = get_number_of_nn_weights(input_nodes, hidden_layer_nodes, output_nodes)
+    weight_lower_threshold = -1
+    weight_upper_threshold = 1
+
+    sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
+                                                         weight_upper_threshold)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
+    sample_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length)
+
+    assert sum(sample_game.occupancy) == snake_length
+    assert sample_game.is_position_occupied((16, 9))
+    assert not sample_game.is_position_occupied((21, 9))
+    assert not sample_game.is_snake_head_in_wall((16, 9))
+    assert sample_game.is_snake_head_in_wall((17, 9))
+    assert sample_game.is_snake_head_in_wall((-1, 9))
+    assert sample_game.is_snake_head_in_wall((16, 18))
+
+    # Moving releases the tail block and occupies the new head block
+    sample_game.move_forward(Direction.UP)
+    assert sum(sample_game.occupancy) == snake_length
+    assert sample_game.is_position_occupied((16, 8))
+    assert not sample_game.is_position_occupied((20, 9))
+    assert sample_game.snack_perspective == (20, 9)
+
+    # Snake turning into itself
+    sample_game.snake = [(16, 8), (17, 8), (17, 9), (16, 9), (15, 9)]
+    sample_game.direction = Direction.LEFT
+    sample_game.move_forward(Direction.DOWN)
+    assert sample_game.snake == [(16, 9), (16, 8), (17, 8), (17, 9), (16, 9)]
+    assert sample_game.is_snake_head_in_wall(sample_game.get_snake_head_position())
+
+
+def test_fast_snack_placement():
+    def game_representation_strategy(game):
+        return Game.get_full_game_representation_strategy(game)
+
+    snake_length = 5
+    width = 32
+    height = 18
+
+    input_nodes = width * height + 4
+    hidden_layer_nodes = [64]
+    output_nodes = 3
+    number_of_nn_weights = get_number_of_nn_weights(input_nodes, hidden_layer_nodes, output_nodes)
+    weight_lower_threshold = -1
+    weight_upper_threshold = 1
+
+    sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
+                                                         weight_upper_threshold)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
+    sample_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length,
+                       snack_placement=SnackPlacement.FAST)
+
+    assert len(sample_game.free_cells) == width * height - snake_length
+    for index in range(100):
+        sample_game.initialize_snack()
+        assert sample_game.snack not in sample_game.snake
+        assert 0 <= sample_game.snack[0] < width
+        assert 0 <= sample_game.snack[1] < height
+
+    another_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length,
+                        snack_placement=SnackPlacement.FAST)
+    third_game = Game(width, height, sample_phenotype, 777, game_representation_strategy, snake_length,
+                      snack_placement=SnackPlacement.FAST)
+    assert another_game.snack == third_game.snack
+
+
+def test_full_game_representation_is_updated_incrementally():
+    def get_rebuilt_game_representation(game):
+        game_representation = []
+        for selected_position in product(range(game.width), range(game.height)):
+            if selected_position in game.snake:
+                game_representation.append(1)
+            elif selected_position == game.snack:
+                game_representation.append(-1)
+            else:
+                game_representation.append(0)
+
+        directions = [Direction.LEFT, Direction.RIGHT, Direction.UP, Direction.DOWN]
+        return game_representation + [int(game.direction == direction) for direction in directions]
+
+    snake_length = 4
+    width = 8
+    height = 6
+    input_nodes = width * height + 4
+    hidden_layer_nodes = [16]
+    output_nodes = 3
+    number_of_nn_weights = get_number_of_nn_weights(input_nodes, hidden_layer_nodes, output_nodes)
+    weight_lower_threshold = -1
+    weight_upper_threshold = 1
+
+    for seed in range(20):
+        sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
+                                                             weight_upper_threshold)
+        sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
+        sample_game = Game(width, height, sample_phenotype, seed, Game.get_full_game_representation_strategy,
+                           snake_length, snack_eaten_points=4, max_points_threshold=40)
+
+        while sample_game.status != GameStatus.ENDED:
+            game_representation = Game.get_full_game_representation_strategy(sample_game)
+            assert game_representation is sample_game.board
+            assert game_representation.tolist() == get_rebuilt_game_representation(sample_game)
+            Game.get_next_game(sample_game)
+
+
+def test_solved_game_result():
+    snake_length = 5
+    width = 18
+    height = 18
+
+    input_nodes = width * height + 4
+    hidden_layer_nodes = [16]
+    output_nodes = 3
+    number_of_nn_weights = get_number_of_nn_weights(input_nodes, hidden_layer_nodes, output_nodes)
+    weight_lower_threshold = -1
+    weight_upper_threshold = 1
+
+    sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, weight_lower_threshold,
+                                                         weight_upper_threshold)
+    sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
+    sample_game = Game(width, height, sample_phenotype, 777, Game.get_full_game_representation_strategy,
+                       snake_length)
+
+    assert not hasattr(sample_game, '__dict__')
+
+    game_result = Game.get_solved_game_result(sample_game)
+    assert game_result.score == sample_game.score
+    assert game_result.steps == sample_game.steps
+    assert game_result.length == len(sample_game.snake)
+    assert GameEndReason(game_result.end_reason) == sample_game.end_reason
+    assert game_result.seed == 777
+
+    # Result is what workers send back instead of the whole game
+    assert len(dumps(game_result)) * 100 < len(dumps(sample_game))
+
+
+def test_game_step_budgets_and_cycle_detection():
+    snake_length = 3
+    width = 8
+    height = 8
+
+    # Network without hidden layers which always predicts ROTATE_LEFT, so the snake keeps circling.
+    input_nodes = width * height + 4
+    output_nodes = 3
+    weights = [0] * (input_nodes * output_nodes)
+    for direction_input in range(width * height, input_nodes):
+        weights[direction_input * output_nodes + 1] = 1
+    circling_phenotype = Phenotype(weights, input_nodes, [], output_nodes, False)
+
+    def get_solved_game(**game_arguments):
+        game = Game(width, height, circling_phenotype, 777, Game.get_full_game_representation_strategy,
+                    snake_length, min_points_threshold=-1000, **game_arguments)
+        return Game.get_solved_game(game)
+
+    solved_game = get_solved_game()
+    assert solved_game.end_reason == GameEndReason.MIN_POINTS_THRESHOLD
+    assert solved_game.steps > 1000
+
+    solved_game = get_solved_game(max_steps=50)
+    assert solved_game.end_reason == GameEndReason.STEP_LIMIT
+    assert solved_game.steps == 50
+
+    solved_game = get_solved_game(max_steps_without_snack=20)
+    assert solved_game.end_reason == GameEndReason.STAGNATION
+    assert solved_game.steps == 20
+
+    # Straight initial body never comes back, the state after the first move repeats after four more moves.
+    solved_game = get_solved_game(detect_cycles=True)
+    assert solved_game.end_reason == GameEndReason.CYCLE
+    assert solved_game.steps == 5
+
+
+def test_cycle_detection_hashes_body_order():
+    width = 6
+    height = 6
+    input_nodes = width * height + 4
+    output_nodes = 3
+    phenotype = Phenotype([0] * (input_nodes * output_nodes), input_nodes, [], output_nodes, False)
+
+    def get_game(snake):
+        game = Game(width, height, phenotype, 777, Game.get_full_game_representation_strategy, detect_cycles=True)
+        game.snake = snake
+        return game
+
+    # Same cells and head, the body is walked in the opposite order.
+    clockwise_game = get_game([(3, 3), (3, 2), (2, 2), (2, 3)])
+    counterclockwise_game = get_game([(3, 3), (2, 3), (2, 2), (3, 2)])
+    assert clockwise_game.body_hash != counterclockwise_game.body_hash
+
+    # Hash updated while moving matches the hash of the same body set at once.
+    clockwise_game.direction = Direction.DOWN
+    clockwise_game.move_forward(Direction.DOWN)
+    assert clockwise_game.body_hash == get_game([(3, 4), (3, 3), (3, 2), (2, 2)]).body_hash
+
+
+def test_iter_episode():
+    width = 10
+    height = 10
+    input_nodes = 8
+    hidden_layer_nodes = [16]
+    output_nodes = 3
+    number_of_nn_weights = get_number_of_nn_weights(input_nodes, hidden_layer_nodes, output_nodes)
+
+    for seed in range(5):
+        sample_genotype = SimpleGenotype.get_random_genotype(number_of_nn_weights, -1, 1)
+        sample_phenotype = Phenotype(sample_genotype.weights, input_nodes, hidden_layer_nodes, output_nodes, False)
+        sample_game = Game(width, height, sample_phenotype, seed, Game.get_feature_based_game_representation_strategy,
+                           max_steps=200)
+        reference_game = deepcopy(sample_game)
+
+        events = []
+        for event in sample_game.iter_episode():
+            score = reference_game.score
+            Game.get_next_game(reference_game)
+
+            assert event.step == reference_game.steps
+            assert event.head == reference_game.snake[0]
+            assert event.snack == reference_game.snack
+            assert event.ended == (reference_game.status == GameStatus.ENDED)
+            if not event.ended:
+                assert event.action == reference_game.last_action
+                assert event.reward == reference_game.score - score
+            events.append(event)
+
+        assert events[-1].ended and events[-1].end_reason == sample_game.end_reason
+        assert sum(event.reward for event in events) == sample_game.score
+        assert Game.get_game_result(sample_game) == Game.get_game_result(reference_game)
+
+        # Recorded actions play the same episode without the phenotype
+        actions = [event.action for event in events if not event.ended]
+        replayed_game = Game(width, height, None, seed, None, max_steps=200)
+        replayed_events = list(replayed_game.iter_episode(actions + [0]))
+        assert replayed_events == events
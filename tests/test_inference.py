@@ -0,0 +1,70 @@
+from femos.phenotypes import Phenotype
+from numpy import allclose, array
+from numpy.random import uniform
+
+from engine.inference import PhenotypeStack
+from tests.test_batch import get_sample_phenotypes
+
+
+def test_phenotype_stack_predictions():
+    input_nodes = 8
+    phenotypes = get_sample_phenotypes(6, input_nodes, [16, 8], 3)
+    phenotype_stack = PhenotypeStack(phenotypes)
+
+    assert phenotype_stack.layers[0].shape == (6, 8, 16)
+    assert phenotype_stack.layers[2].shape == (6, 8, 3)
+
+    input_values = uniform(-1, 1, (6, input_nodes))
+    predictions = PhenotypeStack.get_predictions(phenotype_stack, array(range(6)), input_values)
+    for index, phenotype in enumerate(phenotypes):
+        assert allclose(predictions[index], Phenotype.get_prediction(phenotype, input_values[index]))
+
+    # Evaluating a minority of rows compacts the stack
+    indices = array([1, 4])
+    predictions = PhenotypeStack.get_predictions(phenotype_stack, indices, input_values[indices])
+    assert phenotype_stack.layers[0].shape == (2, 8, 16)
+    assert allclose(predictions[0], Phenotype.get_prediction(phenotypes[1], input_values[1]))
+    assert allclose(predictions[1], Phenotype.get_prediction(phenotypes[4], input_values[4]))
+
+    predictions = PhenotypeStack.get_predictions(phenotype_stack, array([4]), input_values[[4]])
+    assert allclose(predictions[0], Phenotype.get_prediction(phenotypes[4], input_values[4]))
+
+
+def test_phenotype_stack_predictions_with_bias():
+    input_nodes = 8
+    phenotypes = get_sample_phenotypes(6, input_nodes, [16, 8], 3, True)
+    phenotype_stack = PhenotypeStack(phenotypes)
+
+    assert phenotype_stack.bias_layers[0].shape == (6, 1, 16)
+    assert phenotype_stack.bias_layers[2].shape == (6, 1, 3)
+
+    input_values = uniform(-1, 1, (6, input_nodes))
+    predictions = PhenotypeStack.get_predictions(phenotype_stack, array(range(6)), input_values)
+    for index, phenotype in enumerate(phenotypes):
+        assert allclose(predictions[index], Phenotype.get_prediction(phenotype, input_values[index]))
+
+    indices = array([0, 5])
+    predictions = PhenotypeStack.get_predictions(phenotype_stack, indices, input_values[indices])
+    assert phenotype_stack.bias_layers[0].shape == (2, 1, 16)
+    assert allclose(predictions[1], Phenotype.get_prediction(phenotypes[5], input_values[5])[0])
+
+
+def test_get_phenotype_stacks_groups_topologies():
+    phenotypes = get_sample_phenotypes(3, 8, [16], 3) + get_sample_phenotypes(2, 8, [4], 3)
+    phenotypes = [phenotypes[0], phenotypes[3], phenotypes[1], phenotypes[4], phenotypes[2]]
+    phenotypes += get_sample_phenotypes(1, 8, [16], 3, True)
+
+    phenotype_stacks = PhenotypeStack.get_phenotype_stacks(phenotypes)
+    assert len(phenotype_stacks) == 3
+
+    indices, phenotype_stack = phenotype_stacks[0]
+    assert indices.tolist() == [0, 2, 4]
+    assert phenotype_stack.hidden_layers_nodes == [16]
+
+    indices, phenotype_stack = phenotype_stacks[1]
+    assert indices.tolist() == [1, 3]
+    assert phenotype_stack.hidden_layers_nodes == [4]
+
+    indices, phenotype_stack = phenotype_stacks[2]
+    assert indices.tolist() == [5]
+    assert phenotype_stack.use_bias
@@ -0,0 +1,84 @@
+from femos.phenotypes import Phenotype
+from numpy import zeros
+
+from engine.batch import BatchGame
+from engine.game import Game, GameEndReason
+from engine.kernel import JIT_AVAILABLE, KernelGame, get_solved_game_result
+from tests.test_batch import get_sample_phenotypes
+
+
+def assert_kernel_games_match_scalar_games(game_arguments, phenotypes, seeds, compiled):
+    for phenotype, seed in zip(phenotypes, seeds):
+        kernel_game = KernelGame(phenotype=phenotype, seed=seed, compiled=compiled, **game_arguments)
+        game = Game(phenotype=phenotype, seed=seed, **game_arguments)
+        assert kernel_game.get_snake() == game.snake
+        assert kernel_game.get_snack() == game.snack
+
+        KernelGame.get_solved_kernel_game(kernel_game)
+        Game.get_solved_game(game)
+        assert KernelGame.get_game_result(kernel_game) == Game.get_game_result(game)
+        assert kernel_game.get_snake() == game.snake
+        assert kernel_game.get_snack() == game.snack
+
+
+def test_kernel_game_solved_games_match_scalar_games():
+    seeds = list(range(1, 31))
+    full_game_arguments = {'width': 8, 'height': 6, 'game_representation_strategy':
+                           Game.get_full_game_representation_strategy, 'snake_length': 3, 'snack_eaten_points': 4,
+                           'max_points_threshold': 30, 'min_points_threshold': -5}
+    feature_game_arguments = {'width': 12, 'height': 10, 'game_representation_strategy':
+                              Game.get_feature_based_game_representation_strategy, 'snake_length': 4,
+                              'max_steps': 80, 'max_steps_without_snack': 40}
+
+    full_phenotypes = get_sample_phenotypes(len(seeds), 8 * 6 + 4, [16], 3)
+    feature_phenotypes = get_sample_phenotypes(len(seeds), 8, [], 3)
+    bias_phenotypes = get_sample_phenotypes(len(seeds), 8, [6], 3, True)
+
+    # Plain Python kernel always runs, the compiled one only with numba installed.
+    for compiled in {False, JIT_AVAILABLE}:
+        assert_kernel_games_match_scalar_games(full_game_arguments, full_phenotypes, seeds, compiled)
+        assert_kernel_games_match_scalar_games(feature_game_arguments, feature_phenotypes, seeds, compiled)
+        assert_kernel_games_match_scalar_games(feature_game_arguments, bias_phenotypes, seeds, compiled)
+
+
+def test_kernel_game_falls_back_to_scalar_games():
+    game_arguments = {'width': 10, 'height': 10, 'game_representation_strategy':
+                      Game.get_feature_based_game_representation_strategy, 'detect_cycles': True}
+    assert not KernelGame.is_game_supported(game_arguments)
+
+    phenotype = get_sample_phenotypes(1, 8, [6], 3)[0]
+    game = Game(phenotype=phenotype, seed=7, **game_arguments)
+    assert get_solved_game_result(phenotype, 7, game_arguments) == Game.get_solved_game_result(game)
+
+
+def test_board_filled_games_match_in_all_engines():
+    # Turns up once from the start and then circles the 2x2 board by turning left, cell 0 holds the head whenever
+    # the snake moves left again.
+    weights = zeros(8 * 3)
+    weights[0 * 3 + 0] = -2
+    weights[4 * 3 + 0] = 4
+    phenotype = Phenotype(list(weights) + [-3, 0, -5], 8, [], 3, True)
+    game_arguments = {'width': 2, 'height': 2, 'game_representation_strategy':
+                      Game.get_full_game_representation_strategy, 'snake_length': 1, 'max_points_threshold': 1000,
+                      'min_points_threshold': -1000, 'max_steps': 50}
+    seeds = list(range(4))
+
+    for seed in seeds:
+        game_result = Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **game_arguments))
+        assert game_result.end_reason == GameEndReason.BOARD_FILLED.value
+        assert game_result.length == 4
+
+    for compiled in {False, JIT_AVAILABLE}:
+        assert_kernel_games_match_scalar_games(game_arguments, [phenotype] * len(seeds), seeds, compiled)
+
+    batch_game_arguments = dict(game_arguments)
+    batch_game_arguments['game_representation_strategy'] = BatchGame.get_full_game_representation_strategy
+    batch_game = BatchGame(phenotypes=[phenotype] * len(seeds), seeds=seeds, **batch_game_arguments)
+    BatchGame.get_solved_batch_game(batch_game)
+    for index, seed in enumerate(seeds):
+        game = Game.get_solved_game(Game(phenotype=phenotype, seed=seed, **game_arguments))
+        assert batch_game.scores[index] == game.score
+        assert batch_game.steps[index] == game.steps
+        assert batch_game.get_snake(index) == game.snake
+        assert batch_game.get_snack(index) == game.snack
+        assert batch_game.end_reasons[index] == game.end_reason.value
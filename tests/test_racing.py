@@ -0,0 +1,45 @@
+from engine.game import Game
+from engine.racing import FitnessAggregation, get_aggregated_fitness, get_raced_fitness, get_score_bounds
+
+
+def test_get_aggregated_fitness():
+    scores = [4, -2, 1, 5]
+
+    assert get_aggregated_fitness(scores) == 2
+    assert get_aggregated_fitness(scores, FitnessAggregation.MIN) == -2
+    assert get_aggregated_fitness(scores, FitnessAggregation.QUANTILE, 0.5) == 2.5
+
+
+def test_get_score_bounds():
+    assert get_score_bounds({}) == (-10.2, 201)
+
+    game_arguments = {'width': 10, 'height': 10,
+                      'game_representation_strategy': Game.get_full_game_representation_strategy,
+                      'snack_eaten_points': 4, 'max_points_threshold': 10}
+    assert get_score_bounds(game_arguments) == (-10.2, 14)
+
+
+def test_get_raced_fitness():
+    # Candidate scores do not depend on the seed
+    candidate_scores = [10, -10, 9, -9, 0]
+    evaluated_candidates = []
+
+    def evaluate_episodes(indices, seeds):
+        evaluated_candidates.append(list(indices))
+        return [candidate_scores[index] for index in indices]
+
+    episode_seeds = [[1] * 5, [2] * 5, [3] * 5, [4] * 5]
+    fitness, played_episodes = get_raced_fitness(evaluate_episodes, episode_seeds, (-10, 10), 2)
+
+    assert fitness == candidate_scores
+    assert played_episodes[0] == 4
+    assert played_episodes[2] == 4
+    assert played_episodes[1] < 4
+    assert played_episodes[3] < 4
+    assert evaluated_candidates[0] == [0, 1, 2, 3, 4]
+    assert evaluated_candidates[-1] == [0, 2]
+
+    # Without racing every candidate plays all episodes
+    evaluated_candidates.clear()
+    fitness, played_episodes = get_raced_fitness(evaluate_episodes, episode_seeds, (-10, 10), 5)
+    assert played_episodes == [4] * 5
@@ -0,0 +1,71 @@
+from os import environ
+
+import pygame
+
+from engine.game import Game, GameStatus
+from engine.renderer import BACKGROUND_COLOR, SNAKE_COLOR, BlockSurfaces, BoardView, Renderer, \
+    get_snake_block_color
+from tests.test_batch import get_sample_phenotypes
+
+# Surfaces are drawn without opening a window.
+environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+
+def get_sample_games(number_of_games, width=8, height=6):
+    phenotypes = get_sample_phenotypes(number_of_games, 8, [4], 3)
+    return [Game(width, height, phenotype, seed, Game.get_feature_based_game_representation_strategy, 3)
+            for seed, phenotype in enumerate(phenotypes)]
+
+
+def get_pixels(surface):
+    return pygame.image.tostring(surface, 'RGB')
+
+
+def test_snake_block_colors():
+    assert get_snake_block_color(0) == SNAKE_COLOR
+    assert get_snake_block_color(1) == (128, 255, 128)
+    assert get_snake_block_color(255) == BACKGROUND_COLOR
+
+    block_surfaces = BlockSurfaces(4)
+    assert block_surfaces.get_surface(SNAKE_COLOR) is block_surfaces.get_surface(SNAKE_COLOR)
+    assert block_surfaces.get_surface(SNAKE_COLOR).get_at((3, 3))[:3] == SNAKE_COLOR
+
+
+def test_board_view_draws_only_changed_cells():
+    game = get_sample_games(1)[0]
+    block_surfaces = BlockSurfaces(4)
+    view = BoardView(game, 0, 0, block_surfaces)
+    screen = pygame.Surface(view.get_rect().size)
+
+    assert view.draw(screen, full=True) == [view.get_rect()]
+    assert view.draw(screen) == []
+
+    while game.status != GameStatus.ENDED:
+        snake_length = len(game.snake_blocks)
+        Game.get_next_game(game)
+        dirty_rects = view.draw(screen)
+
+        # Head, tail, snack and the cells whose gradient changed, never the whole board
+        assert 0 < len(dirty_rects) <= snake_length + 3 or game.status == GameStatus.ENDED
+
+        reference_screen = pygame.Surface(screen.get_size())
+        BoardView(game, 0, 0, block_surfaces).draw(reference_screen, full=True)
+        assert get_pixels(screen) == get_pixels(reference_screen)
+
+
+def test_renderer_grid():
+    games = get_sample_games(5)
+    renderer = Renderer(games, scale=4, border=1)
+
+    # Three columns of 8x6 boards
+    assert renderer.size == (1 + 3 * 33, 1 + 2 * 25)
+    assert [(view.left, view.top) for view in renderer.views][:4] == [(1, 1), (34, 1), (67, 1), (1, 26)]
+
+    screen = pygame.Surface(renderer.size)
+    assert renderer.draw(screen, full=True) == [screen.get_rect()]
+
+    while renderer.step():
+        for dirty_rect in renderer.draw(screen):
+            assert any(view.get_rect().contains(dirty_rect) for view in renderer.views)
+
+    assert all(game.status == GameStatus.ENDED for game in games)
@@ -0,0 +1,59 @@
+from os.path import getsize
+
+from engine.game import Game, GameStatus
+from engine.replay import EPISODE_HEADER, ReplayReader, ReplayRecorder, encode_actions
+from tests.test_batch import get_sample_phenotypes
+
+
+def test_encode_actions():
+    assert encode_actions([]) == b''
+    assert encode_actions([0, 1, 2, 1, 2]) == bytes([0b01100100, 0b10])
+
+
+def test_replay_recording_and_playback(tmp_path):
+    path = str(tmp_path / 'episodes.replay')
+    full_game_arguments = {'width': 8, 'height': 6, 'game_representation_strategy':
+                           Game.get_full_game_representation_strategy, 'snake_length': 3, 'snack_eaten_points': 4,
+                           'max_points_threshold': 30}
+    feature_game_arguments = {'width': 12, 'height': 10, 'game_representation_strategy':
+                              Game.get_feature_based_game_representation_strategy, 'max_steps': 60,
+                              'detect_cycles': True}
+
+    expected_games = []
+    with ReplayRecorder(path) as recorder:
+        for seed, phenotype in enumerate(get_sample_phenotypes(5, 8 * 6 + 4, [16], 3)):
+            expected_games.append(recorder.record_game(Game(phenotype=phenotype, seed=seed, **full_game_arguments)))
+
+    # Episodes are appended to the existing file
+    with ReplayRecorder(path) as recorder:
+        for seed, phenotype in enumerate(get_sample_phenotypes(5, 8, [4], 3)):
+            expected_games.append(recorder.record_game(Game(phenotype=phenotype, seed=seed, **feature_game_arguments)))
+
+    number_of_steps = sum(game.steps for game in expected_games)
+    assert getsize(path) <= len(expected_games) * (EPISODE_HEADER.size + 1) + number_of_steps // 4
+
+    with ReplayReader(path) as reader:
+        assert len(reader) == 10
+
+        for replay, expected_game in zip(reader, expected_games):
+            assert replay.seed == expected_game.seed
+            assert replay.number_of_steps == expected_game.steps
+            assert replay.end_reason == expected_game.end_reason
+
+            steps = [game.steps for game in reader.get_replayed_games(replay)]
+            assert steps == list(range(expected_game.steps + 1)) + [expected_game.steps]
+
+            game = reader.get_replayed_game(replay)
+            assert game.status == GameStatus.ENDED
+            assert Game.get_game_result(game) == Game.get_game_result(expected_game)
+            assert game.snake == expected_game.snake
+            assert game.snack == expected_game.snack
+
+
+def test_empty_replay_file(tmp_path):
+    path = str(tmp_path / 'empty.replay')
+    ReplayRecorder(path).close()
+
+    with ReplayReader(path) as reader:
+        assert len(reader) == 0
+        assert list(reader) == []
@@ -0,0 +1,28 @@
+from engine.seeding import SeedStream
+
+
+def test_seed_stream():
+    seed_stream = SeedStream(777)
+    first_seeds = seed_stream.get_generation_seeds(6, 2)
+    second_seeds = seed_stream.get_generation_seeds(6, 2)
+
+    assert len(first_seeds) == 2 and all(len(seeds) == 6 for seeds in first_seeds)
+    assert all(type(seed) is int for seed in first_seeds[0])
+    assert first_seeds != second_seeds
+    assert len(set(first_seeds[0] + first_seeds[1])) == 12
+
+    # Seeds only depend on the root seed and the generation.
+    assert SeedStream(777).get_generation_seeds(6, 2) == first_seeds
+    assert SeedStream(778).get_generation_seeds(6, 2) != first_seeds
+
+    # Seeds of a bigger population start with the seeds of a smaller one within an episode block.
+    assert SeedStream(777).get_generation_seeds(12)[0][:6] == SeedStream(777).get_generation_seeds(6)[0]
+
+    restored_seed_stream = SeedStream(777)
+    restored_seed_stream.setstate(seed_stream.getstate())
+    assert seed_stream.getstate() == 2
+    assert restored_seed_stream.get_generation_seeds(6, 2) == seed_stream.get_generation_seeds(6, 2)
+
+    same_environment_seeds = SeedStream(777).get_generation_seeds(4, 3, same_environment=True)
+    assert all(len(set(seeds)) == 1 for seeds in same_environment_seeds)
+    assert len(set(seeds[0] for seeds in same_environment_seeds)) == 3
@@ -0,0 +1,109 @@
+import asyncio
+from os import path
+from threading import Event, Thread
+
+from pytest import raises
+
+from engine.cells import SnackPlacement
+from engine.features import FeatureBasedRepresentation
+from engine.game import Game
+from engine.server import EvaluationClient, EvaluationServer, decode_game_arguments, encode_game_arguments
+from tests.test_batch import get_sample_phenotypes
+from tests.test_evaluation import get_game_arguments
+
+
+class ServerThread(Thread):
+    """Evaluation server running its event loop next to the blocking clients of a test."""
+
+    def __init__(self, server, **address):
+        super().__init__(daemon=True)
+        self.server = server
+        self.address = address
+        self.started = Event()
+        self.loop = None
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        self.address = self.loop.run_until_complete(self.server.start(**self.address))
+        self.started.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.server.close())
+        self.loop.close()
+
+    def __enter__(self):
+        self.start()
+        self.started.wait()
+        return self.address
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+
+
+def test_encode_game_arguments():
+    game_arguments = get_game_arguments()
+    game_arguments['snack_placement'] = SnackPlacement.FAST
+    assert decode_game_arguments(encode_game_arguments(game_arguments)) == game_arguments
+
+    game_arguments['game_representation_strategy'] = FeatureBasedRepresentation(['snack_direction', 'danger'])
+    encoded_game_arguments = encode_game_arguments(game_arguments)
+    assert encoded_game_arguments['game_representation_strategy'] == ['snack_direction', 'danger']
+    assert repr(decode_game_arguments(encoded_game_arguments)['game_representation_strategy']) == repr(
+        game_arguments['game_representation_strategy'])
+
+    game_arguments['game_representation_strategy'] = lambda game: []
+    with raises(ValueError):
+        encode_game_arguments(game_arguments)
+
+
+def test_evaluation_server_matches_games(tmp_path):
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(12, 10 * 10 + 4, [16], 3)
+    seeds = list(range(1, 13))
+    expected_results = [Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **game_arguments))
+                        for phenotype, seed in zip(phenotypes, seeds)]
+
+    # Tiny limit makes every request wait for the previous ones to be answered.
+    server = EvaluationServer(processes=2, batch_evaluation=True, minimum_chunk_size=4, max_pending_games=6)
+    with ServerThread(server, path=path.join(str(tmp_path), 'evaluation.socket')) as address:
+        clients = [EvaluationClient(game_arguments, address) for index in range(3)]
+        client_results = [None] * len(clients)
+
+        def evaluate(index):
+            client_results[index] = clients[index].evaluate(phenotypes, seeds)
+
+        threads = [Thread(target=evaluate, args=(index,)) for index in range(len(clients))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert client_results == [expected_results] * len(clients)
+        assert server.solved_games == 3 * 12
+        assert server.pending_games == 0
+
+        # Request is answered with an error and the connection stays usable.
+        with raises(RuntimeError):
+            clients[0].evaluate(get_sample_phenotypes(2, 10, [4], 3), [1, 2])
+        assert clients[0].evaluate(phenotypes[:2], seeds[:2]) == expected_results[:2]
+
+        for client in clients:
+            client.close()
+
+    # Different game arguments over TCP are batched separately.
+    feature_game_arguments = dict(game_arguments)
+    feature_game_arguments['game_representation_strategy'] = Game.get_feature_based_game_representation_strategy
+    feature_phenotypes = get_sample_phenotypes(4, 8, [4], 3)
+    expected_feature_results = [
+        Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **feature_game_arguments))
+        for phenotype, seed in zip(feature_phenotypes, seeds)]
+
+    bias_phenotypes = get_sample_phenotypes(4, 8, [4], 3, True)
+    expected_bias_results = [
+        Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **feature_game_arguments))
+        for phenotype, seed in zip(bias_phenotypes, seeds)]
+
+    with ServerThread(EvaluationServer(processes=2), port=0) as address:
+        with EvaluationClient(feature_game_arguments, address) as client:
+            assert client.evaluate(feature_phenotypes, seeds[:4]) == expected_feature_results
+            assert client.evaluate(bias_phenotypes, seeds[:4]) == expected_bias_results
@@ -0,0 +1,62 @@
+from pickle import dumps, loads
+
+from engine.evaluation import EvaluationService
+from engine.game import Game, GameEndReason
+from engine.stats import GameStats
+from tests.test_batch import get_sample_phenotypes
+from tests.test_evaluation import get_game_arguments
+
+
+def test_game_stats_merge():
+    stats = GameStats(histogram_bin_size=10)
+    stats.add_time('prediction', 1.5)
+    stats.count('steps', 12)
+    stats.add_episode(12, GameEndReason.COLLISION)
+    stats.add_episode(3, GameEndReason.COLLISION)
+
+    other_stats = GameStats(histogram_bin_size=10)
+    other_stats.add_time('prediction', 0.5)
+    other_stats.add_time('move', 0.25)
+    other_stats.add_episode(15, GameEndReason.MAX_POINTS_THRESHOLD)
+
+    merged_stats = GameStats.get_merged([stats, loads(dumps(other_stats))])
+    assert merged_stats.phase_times == {'prediction': 2.0, 'move': 0.25}
+    assert merged_stats.counters == {'steps': 12, 'episodes': 3, 'end_reason/COLLISION': 2,
+                                     'end_reason/MAX_POINTS_THRESHOLD': 1}
+    assert merged_stats.episode_lengths == {0: 1, 10: 2}
+    assert 'prediction' in merged_stats.get_summary()
+
+
+def test_games_collect_stats():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(10, 10 * 10 + 4, [16], 3)
+
+    stats = GameStats()
+    results = [Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, stats=stats, **game_arguments)) for
+               seed, phenotype in enumerate(phenotypes)]
+
+    assert stats.counters['steps'] == sum(result.steps for result in results)
+    assert stats.counters.get('snacks', 0) == sum(result.length - 4 for result in results)
+    assert stats.counters['episodes'] == 10
+    assert sum(stats.episode_lengths.values()) == 10
+    assert set(stats.phase_times) >= {'rules', 'representation', 'prediction', 'move'}
+
+    # Stats do not change results
+    assert results == [Game.get_solved_game_result(Game(phenotype=phenotype, seed=seed, **game_arguments)) for
+                       seed, phenotype in enumerate(phenotypes)]
+
+
+def test_evaluation_service_collects_stats():
+    game_arguments = get_game_arguments()
+    phenotypes = get_sample_phenotypes(12, 10 * 10 + 4, [16], 3)
+
+    for batch_evaluation, kernel_evaluation in [(False, False), (True, False), (False, True)]:
+        with EvaluationService(game_arguments, batch_evaluation, processes=2, kernel_evaluation=kernel_evaluation,
+                               collect_stats=True) as evaluation_service:
+            results = evaluation_service.evaluate(phenotypes, list(range(12)))
+
+            stats = evaluation_service.stats[-1]
+            assert stats.counters['episodes'] == 12
+            assert stats.counters['steps'] == sum(result.steps for result in results)
+            assert stats.counters.get('snacks', 0) == sum(result.length - 4 for result in results)
+            assert 'dispatch' in stats.phase_times